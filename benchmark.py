@@ -0,0 +1,640 @@
+import contextlib  # For temporarily swapping helpers back to their old behaviour
+import os  # For swallowing the output of animated_print
+import time  # For timing the benchmarks
+import tkinter as tk  # For benchmarking GUI rendering
+import tracemalloc  # For measuring how much memory a call allocates
+from typing import Iterable  # For type hinting
+
+import helpers  # Custom helper functions
+import main  # The functions being benchmarked
+
+
+def timed(func, *args, repeat:int = 3) -> float:
+    """
+    Run a function a few times and return the best time.
+
+    Args:
+        func (callable): The function to time
+        *args: Arguments passed to the function
+        repeat (int): How many times to run it
+
+    Returns:
+        float: The fastest run in seconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = helpers.min(best, time.perf_counter() - start)
+    return best
+
+
+def sample_text(size:int) -> str:
+    """
+    Build a benchmark text of roughly the given size out of the bundled test files.
+
+    Args:
+        size (int): Wanted size in characters
+
+    Returns:
+        str: The bundled test files repeated until the text is at least `size` characters long
+    """
+    base = ""
+    for file in ("test1_1.txt", "test2_1.txt", "guided1.txt", "guided2.txt"):
+        base += main.read_file(file) + "\n"
+    return base * (size // len(base) + 1)
+
+
+def legacy_replace_insert(original_text:tk.Text, modified_text:tk.Text, content:str, target_word:str, replacement_word:str):
+    """
+    The replace preview as it used to be rendered: several Text.insert calls per word on every line.
+
+    Kept here only to compare against GUI_APP.insert_highlighted.
+    """
+    for i, line in enumerate(content.split("\n")):
+        if not line.strip():
+            if i > 0:
+                original_text.insert(tk.END, "\n")
+                modified_text.insert(tk.END, "\n")
+            continue
+        words = line.split()
+        positions = []
+        for idx, word in enumerate(words):
+            clean_word = "".join(c.lower() for c in word if main.alphanumerical(c) or c == "'" or c == "-")
+            if clean_word == target_word.lower():
+                positions.append(idx)
+        if i > 0:
+            original_text.insert(tk.END, "\n")
+            modified_text.insert(tk.END, "\n")
+        if positions:
+            current_pos = 0
+            for pos in positions:
+                if pos > current_pos:
+                    original_text.insert(tk.END, " ".join(words[current_pos:pos]) + " ")
+                    modified_text.insert(tk.END, " ".join(words[current_pos:pos]) + " ")
+                original_word = words[pos]
+                leading_punct = ""
+                trailing_punct = ""
+                j = 0
+                while j < len(original_word) and not main.alphanumerical(original_word[j]):
+                    leading_punct += original_word[j]
+                    j += 1
+                j = len(original_word) - 1
+                while j >= 0 and not main.alphanumerical(original_word[j]):
+                    trailing_punct = original_word[j] + trailing_punct
+                    j -= 1
+                original_text.insert(tk.END, original_word, "highlight")
+                modified_text.insert(tk.END, leading_punct + replacement_word + trailing_punct, "highlight")
+                if pos < len(words) - 1:
+                    original_text.insert(tk.END, " ")
+                    modified_text.insert(tk.END, " ")
+                current_pos = pos + 1
+            if current_pos < len(words):
+                original_text.insert(tk.END, " ".join(words[current_pos:]))
+                modified_text.insert(tk.END, " ".join(words[current_pos:]))
+        else:
+            original_text.insert(tk.END, line)
+            modified_text.insert(tk.END, line)
+
+
+def benchmark_replace_preview(size:int = 1_000_000, target_word:str = "the", replacement_word:str = "THE"):
+    """
+    Compare per-word insertion of the replace preview with the batched renderer.
+
+    Args:
+        size (int): Size of the benchmark text in characters (default: about 1 MB)
+        target_word (str): Word to replace
+        replacement_word (str): Replacement text
+    """
+    content = sample_text(size)
+    print(f"Replace preview ({len(content)} characters, replacing {target_word!r}):")
+    replacements = {target_word.lower(): replacement_word}
+    print(f"  building text and offsets:   {timed(main.replace_text, content, replacements):.3f}s")
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        print("  no display available, skipping the Tk rendering benchmarks")
+        return
+    root.withdraw()  # No need to show the window
+    original_text = tk.Text(root)
+    modified_text = tk.Text(root)
+
+    def clear():
+        original_text.delete(1.0, tk.END)
+        modified_text.delete(1.0, tk.END)
+
+    def legacy():
+        clear()
+        legacy_replace_insert(original_text, modified_text, content, target_word, replacement_word)
+
+    def batched():
+        clear()
+        modified, edits = main.replace_text(content, replacements)
+        main.GUI_APP.insert_highlighted(original_text, content, [original for original, _ in edits])
+        main.GUI_APP.insert_highlighted(modified_text, modified, [new for _, new in edits])
+
+    legacy_time = timed(legacy, repeat=1)
+    batched_time = timed(batched, repeat=1)
+    print(f"  per-word Text.insert calls:  {legacy_time:.3f}s")
+    print(f"  single insert + bulk tags:   {batched_time:.3f}s ({legacy_time / batched_time:.1f}x faster)")
+    root.destroy()
+
+
+def legacy_split_exclude_ANSI(text:str, sep:str|list[str]|tuple[str] = "") -> list[str]:
+    """
+    helpers.split_exclude_ANSI as it used to be: an index-by-index walk slicing for every separator at every position.
+
+    Kept here only to check and compare against the regex tokenizer.
+    """
+    # Check the type of `sep` to ensure it is valid
+    if not (isinstance(sep, str) or helpers.all(isinstance(s, str) for s in sep)):
+        raise TypeError(
+            "sep should be either string or an iterable that contains only strings"
+        )
+
+    # Handle case where text is empty
+    if not text:
+        return []  # Return an empty list if there is no text
+
+    # Convert `sep` to a list for uniform handling
+    separators = [sep] if isinstance(sep, str) else list(sep)
+
+    # Initialize variables for splitting logic
+    result = []  # Resultant list of split strings
+    i = 0  # Index to traverse the text
+    start = 0  # Start index for current segment
+    in_ansi = False  # Flag indicating if we are within an ANSI sequence
+    ansi_start = -1  # Start index of the ANSI sequence
+
+    while i < len(text):
+        # Check if entering an ANSI escape sequence
+        if text[i] == "\x1b" and i + 1 < len(text) and text[i + 1] == "[":
+            in_ansi = True  # Set flag indicating we are inside an ANSI sequence
+            ansi_start = i  # Mark the start index of the ANSI sequence
+
+        # Check if at the end of an ANSI sequence
+        if in_ansi and i > ansi_start + 1 and text[i] > "@" and text[i] < "~":
+            in_ansi = False  # Reset flag when we exit the ANSI sequence
+
+        # Split logic outside of ANSI sequences
+        if not in_ansi:
+            # Special case: if separator is empty, split into individual characters
+            if separators == [""]:
+                i += 1  # Increment index to read next character
+            # Check for any specified separator matches
+            for separator in separators:
+                if (
+                    i + len(separator) <= len(text)
+                    and text[i : i + len(separator)] == separator
+                ):
+                    result.append(text[start:i])  # Append current segment
+                    i += len(separator) - 1  # Move index past the separator
+                    start = i + 1  # Update start for the next segment
+                    break  # Break to re-check for more separators as needed
+
+        i += 1  # Advance the iterator
+
+    # Add the last segment post-loop
+    result.append(text[start:])
+
+    # Remove any trailing empty strings in the result
+    while result and result[-1] == "":
+        del result[-1]  # Delete empty strings at the end of the list
+
+    return result  # Return the list of split sections
+
+
+
+
+def benchmark_split_exclude_ANSI(repeat:int = 200):
+    """
+    Check that the regex tokenizer splits exactly like the old walk, then compare their speed.
+
+    Args:
+        repeat (int): How many times the corpus is split for timing
+    """
+    corpus = [
+        "",
+        "plain text without any codes",
+        "\x1b[31mHello\x1b[0m World",
+        "\x1b[1;31mbold \x1b[4munderlined\x1b[24m still bold\x1b[0m done",  # Nested colour codes
+        "\x1b[38;5;208morange \x1b[48;2;0;0;255mon blue\x1b[49m\x1b[39m",
+        "\x1b[3\x1b[31mrestarted sequence\x1b[0m",
+        "unterminated \x1b[31",
+        "lone \x1b escape and \x1b[[ odd end",
+        "\x1b[31mmmm\x1b[0m m m",
+        "  leading and trailing spaces  ",
+        "tabs\tand\nnew lines",
+        "\x1b[1m\x1b[93mWelcome to WAPDS\x1b[0m, choose an option (1-7):",
+    ]
+    corpus += [line * 20 for line in corpus]  # Some longer lines too
+    separators = ["", " ", "m", "\x1b", ["  ", " "], (" ", "\n", "\t")]
+
+    for text in corpus:
+        for sep in separators:
+            expected = legacy_split_exclude_ANSI(text, sep)
+            got = helpers.split_exclude_ANSI(text, sep)
+            assert got == expected, f"split_exclude_ANSI({text!r}, {sep!r}) gave {got!r}, expected {expected!r}"
+    print(f"split_exclude_ANSI: identical on {len(corpus) * len(separators)} cases")
+
+    def run(split):
+        for text in corpus:
+            for sep in separators:
+                split(text, sep)
+
+    legacy_time = timed(lambda: [run(legacy_split_exclude_ANSI) for _ in range(repeat)], repeat=1)
+    helpers._split_exclude_ANSI.cache_clear()
+    fresh_time = timed(lambda: run(helpers.split_exclude_ANSI), repeat=1)
+    cached_time = timed(lambda: [run(helpers.split_exclude_ANSI) for _ in range(repeat)], repeat=1)
+    print(f"  index walk ({repeat} rounds):     {legacy_time:.3f}s")
+    print(f"  regex, uncached (1 round):   {fresh_time:.3f}s ({legacy_time / repeat / fresh_time:.1f}x faster per round)")
+    print(f"  regex, cached ({repeat} rounds):  {cached_time:.3f}s ({legacy_time / cached_time:.1f}x faster)")
+
+
+def peak_allocation(func, *args) -> int:
+    """
+    Run a function once and return the most memory it had allocated at any point.
+
+    Args:
+        func (callable): The function to measure
+        *args: Arguments passed to the function
+
+    Returns:
+        int: Peak of the memory allocated during the call, in bytes
+    """
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def materializing(reducer):
+    """
+    Wrap helpers.max/min/all/any the way they used to work: a single iterable is copied into a list first.
+
+    Kept here only to compare against the lazy versions.
+    """
+    def wrapper(*args):
+        if len(args) == 1 and isinstance(args[0], Iterable):
+            args = (list(args[0]),)
+        return reducer(*args)
+    return wrapper
+
+
+@contextlib.contextmanager
+def legacy_reducers():
+    """
+    Temporarily make helpers.max/min/all/any materialize their argument again.
+    """
+    saved = {name: getattr(helpers, name) for name in ("max", "min", "all", "any")}
+    for name, reducer in saved.items():
+        setattr(helpers, name, materializing(reducer))
+    try:
+        yield
+    finally:
+        for name, reducer in saved.items():
+            setattr(helpers, name, reducer)
+
+
+def benchmark_reducers(size:int = 1_000_000):
+    """
+    Compare time and peak memory of the lazy helpers.max/min/all/any with the list-building ones.
+
+    Args:
+        size (int): Size of the benchmark text in characters, and ten times the number of batch records (default: about 1 MB)
+    """
+    content = sample_text(size)
+    characters = list(content)  # animated_print checks every item, then merges single characters back into lines
+
+    def quiet_animated_print(txt):
+        # Not a terminal, so animated_print only validates its input and prints it plainly
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            helpers.animated_print(txt)
+
+    def exit_status(records):
+        # The same check run_headless() uses for its exit status
+        return 1 if helpers.any("error" in record for record in records) else 0
+
+    # alphanumerical() and word search used to be measured here too, but they now use
+    # str.translate and WordIndex, so they never reach the helpers reducers
+    records = [{"file": f"file{n}.txt", "total_words": n} for n in range(size // 10)]
+    cases = [
+        ("animated_print validation", quiet_animated_print, characters),
+        ("run_headless exit status, no errors", exit_status, records),
+        ("run_headless exit status, first fails", exit_status, [{"error": "could not read file"}] + records),
+    ]
+    print(f"Lazy helpers.max/min/all/any ({len(content)} characters, {len(records)} records):")
+    for name, func, *args in cases:
+        with legacy_reducers():
+            legacy_time = timed(func, *args)
+            legacy_peak = peak_allocation(func, *args)
+        lazy_time = timed(func, *args)
+        lazy_peak = peak_allocation(func, *args)
+        print(f"  {name + ':':38} {legacy_time:.3f}s -> {lazy_time:.3f}s, "
+              f"peak {legacy_peak / 1024:,.0f} KiB -> {lazy_peak / 1024:,.0f} KiB "
+              f"({(legacy_peak - lazy_peak) / 1024:,.0f} KiB saved)")
+
+
+def legacy_alphanumerical(text:str) -> bool:
+    """
+    main.alphanumerical as it used to be: lowercasing and a generator through helpers.all on every call.
+
+    Kept here only to check and compare against the character tables.
+    """
+    return helpers.all(("a" <= char <= "z" or "0" <= char <= "9") for char in text.lower())
+
+
+def legacy_clean_text(text:str) -> str:
+    """
+    main.clean_text as it used to be: a join over every character, then replacing double spaces until none are left.
+
+    Kept here only to check and compare against the character tables.
+    """
+    cleaned_text = "".join((char if "a" <= char <= "z" or "0" <= char <= "9"
+                            or char == " " or char == "-" else " ") for char in text.lower())
+    while "  " in cleaned_text:
+        cleaned_text = cleaned_text.replace("  ", " ")
+    return cleaned_text.strip()
+
+
+def legacy_normalize_word(word:str) -> str:
+    """
+    main.normalize_word as it used to be: legacy_alphanumerical() for every character.
+
+    Kept here only to check and compare against the character tables.
+    """
+    return "".join(c for c in word.lower() if legacy_alphanumerical(c) or c == "'" or c == "-")
+
+
+def legacy_strip_punctuation(word:str) -> tuple[int, int]:
+    """
+    The punctuation trimming of main.replace_text as it used to be: one alphanumerical check per character from both ends.
+
+    Kept here only to check and compare against the character tables.
+
+    Returns:
+        tuple: (start, end) of the part of the word that gets replaced
+    """
+    start, end = 0, len(word)
+    while start < end and not legacy_alphanumerical(word[start]):
+        start += 1
+    while end > start and not legacy_alphanumerical(word[end - 1]):
+        end -= 1
+    if start == end:
+        return 0, len(word)
+    return start, end
+
+
+def legacy_word_index(text:str) -> tuple[list, list, dict]:
+    """
+    Building main.WordIndex as it used to be: every word matched and normalized by itself with legacy_normalize_word().
+
+    Kept here only to check and compare against the character tables.
+
+    Returns:
+        tuple: The offsets, words and positions of the index
+    """
+    offsets, words, positions = [], [], {}
+    for position, match in enumerate(main.re.finditer(r"\S+", text)):
+        word = legacy_normalize_word(match.group())
+        offsets.append(match.span())
+        words.append(word)
+        positions.setdefault(word, []).append(position)
+    return offsets, words, positions
+
+
+def legacy_replace_text(text:str, replacements:dict[str, str]) -> tuple[str, list]:
+    """
+    main.replace_text (word replacements) as it used to be: legacy_normalize_word() and legacy_strip_punctuation() on every word.
+
+    Kept here only to check and compare against the character tables.
+    """
+    modified, edits = [], []
+    last_end = modified_len = 0
+    for match in main.re.finditer(r"\S+", text):
+        replacement = replacements.get(legacy_normalize_word(match.group()))
+        if replacement is None:
+            continue
+        start, end = legacy_strip_punctuation(match.group())
+        start, end = match.start() + start, match.start() + end
+        modified.append(text[last_end:start])
+        modified_len += start - last_end
+        edits.append(((start, end), (modified_len, modified_len + len(replacement))))
+        modified.append(replacement)
+        modified_len += len(replacement)
+        last_end = end
+    modified.append(text[last_end:])
+    return "".join(modified), edits
+
+
+def benchmark_character_tables():
+    """
+    Check that the str.translate based text helpers give the same results as the old per-character code, then compare their speed.
+
+    Runs over the bundled test files, plus some non-ASCII text whose lowercase turns into ASCII or into several characters.
+    """
+    content = sample_text(0)  # Every bundled test file once
+    content += "\n\u212a\u0130stanbul \u00c9t\u00e9 \u03a3\u039f\u03a3 na\u00efve-caf\u00e9 \u2014\"quoted\"\u2014 \u00a1Hola! \uff21\uff22\uff23 \u2460\u2461 \U0001f600 \tdon't ---"
+    words = content.split()
+    characters = list(content)
+
+    assert main.clean_text(content) == legacy_clean_text(content), "clean_text differs"
+    for word in words:
+        assert main.normalize_word(word) == legacy_normalize_word(word), f"normalize_word({word!r}) differs"
+    for char in set(characters):
+        assert main.alphanumerical(char) == legacy_alphanumerical(char), f"alphanumerical({char!r}) differs"
+    expected = []
+    for match in main.re.finditer(r"\S+", content):
+        start, end = legacy_strip_punctuation(match.group())
+        expected.append((match.start() + start, match.start() + end))
+    replacements = dict.fromkeys(main.normalize_word(word) for word in words)
+    for key in replacements:
+        replacements[key] = key.upper()
+    _, edits = main.replace_text(content, replacements)
+    assert [original for original, _ in edits] == expected, "replace_text trims punctuation differently"
+    assert main.replace_text(content, replacements) == legacy_replace_text(content, replacements), "replace_text differs"
+    index = main.WordIndex(content)
+    assert (index.offsets, index.words, index.positions) == legacy_word_index(content), "WordIndex differs"
+    print(f"Character tables: identical results on {len(content)} characters, {len(words)} words")
+
+    cases = [
+        ("clean_text", legacy_clean_text, main.clean_text, content),
+        ("normalize_word, every word", lambda: [legacy_normalize_word(word) for word in words],
+         lambda: [main.normalize_word(word) for word in words]),
+        ("alphanumerical, every character", lambda: [legacy_alphanumerical(char) for char in characters],
+         lambda: [main.alphanumerical(char) for char in characters]),
+    ]
+    for name, legacy, table, *args in cases:
+        legacy_time = timed(legacy, *args)
+        table_time = timed(table, *args)
+        print(f"  {name + ':':34} {legacy_time:.4f}s -> {table_time:.4f}s ({legacy_time / table_time:.1f}x faster)")
+
+    # Whole search index and replace
+    cases = [
+        ("WordIndex (search)", legacy_word_index, main.WordIndex, content),
+        ("replace_text, every word", legacy_replace_text, main.replace_text, content, replacements),
+    ]
+    for name, legacy, table, *args in cases:
+        legacy_time = timed(legacy, *args)
+        table_time = timed(table, *args)
+        print(f"  {name + ':':34} {legacy_time:.4f}s -> {table_time:.4f}s ({legacy_time / table_time:.1f}x faster)")
+
+
+def legacy_calculate_similarity(word_count1:tuple[list, list], word_count2:tuple[list, list]) -> tuple[float, float]:
+    """
+    main.calculate_similarity as it used to be: a linear search through the second text for every word of the first.
+
+    Kept here only to check and compare against the merge of WordCounts.
+    """
+    common_freq = 0
+    count1_freq = 0
+    count2_freq = 0
+    for idx1, word1 in enumerate(word_count1[0]):
+        freq1 = word_count1[1][idx1]
+        count1_freq += freq1
+        idx2 = helpers.linear_search(word_count2[0], word1)
+        if idx2 != -1:
+            common_freq += helpers.min(freq1, word_count2[1][idx2])
+    for freq2 in word_count2[1]:
+        count2_freq += freq2
+    return ((common_freq / count1_freq) * 100 if count1_freq > 0 else 0,
+            (common_freq / count2_freq) * 100 if count2_freq > 0 else 0,)
+
+
+def benchmark_word_counts(references:int = 20, vocabulary_size:int = 20_000):
+    """
+    Compare the memory of word counts kept as lists with the interned WordCounts, and check similarity gives the same results.
+
+    Args:
+        references (int): Number of reference documents
+        vocabulary_size (int): Distinct words per document, mostly shared with the other documents like in real texts
+    """
+    def reference_word_count(n):
+        # Words are built per document, like they are when every file is counted (or loaded) on its own
+        first = n * vocabulary_size // 40
+        return ([f"word{i}" for i in range(first, first + vocabulary_size)],
+                [(i * 7919) % 997 + 1 for i in range(first, first + vocabulary_size)])
+
+    tracemalloc.start()
+    word_counts = [reference_word_count(n) for n in range(references)]
+    list_memory = tracemalloc.get_traced_memory()[0]
+    del word_counts
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    counts = [main.WordCounts.from_word_count(reference_word_count(n)) for n in range(references)]
+    compact_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"Word counts of {references} documents with {vocabulary_size} distinct words each:")
+    print(f"  lists of str and int: {list_memory / 1024:,.0f} KiB")
+    print(f"  WordCounts + shared vocabulary: {compact_memory / 1024:,.0f} KiB ({compact_memory / list_memory:.0%})")
+
+    word_count1, word_count2 = reference_word_count(0), reference_word_count(1)
+    assert main.calculate_similarity(counts[0], counts[1]) == legacy_calculate_similarity(word_count1, word_count2)
+    legacy_time = timed(legacy_calculate_similarity, word_count1, word_count2, repeat=1)
+    merge_time = timed(main.calculate_similarity, counts[0], counts[1])
+    print(f"  calculate_similarity: {legacy_time:.3f}s -> {merge_time:.4f}s ({legacy_time / merge_time:.0f}x faster)")
+
+
+def benchmark_nearest_references(references:int = 5_000, k:int = 5):
+    """
+    Compare listing every cosine similarity score with only retrieving the k closest references.
+
+    Args:
+        references (int): Size of the synthetic reference bank
+        k (int): How many of the closest references are retrieved
+    """
+    if main.nearest_references is None:
+        print("nearest_references: skipped, nltk_tools could not be imported")
+        return
+    import nltk_tools  # Only importable when NLTK and scikit-learn are installed
+
+    # Texts that already went through preprocess_text(), drawn from a shared vocabulary
+    words = [f"word{i}" for i in range(5_000)]
+    reference_texts = [" ".join(words[(i * 7919 + j * 31) % len(words)] for j in range(200)) for i in range(references)]
+    query_text = reference_texts[references // 2]
+
+    def legacy_nearest_references():
+        # Every score is listed with its reference text, then the whole list is sorted
+        results = nltk_tools.get_similarity_score(query_text, reference_texts, preprocessed=True)
+        return helpers.quick_sort(results, key=lambda result: result[1], reverse=True)[:k]
+
+    assert main.nearest_references(query_text, reference_texts, k=k, preprocessed=True)[0][0] == references // 2
+    legacy_time = timed(legacy_nearest_references, repeat=1)
+    print(f"Closest {k} of {references} reference texts:")
+    print(f"  every score, sorted: {legacy_time:.3f}s")
+    top_time = timed(main.nearest_references, query_text, reference_texts, k, True)
+    print(f"  nearest_references: {top_time:.3f}s ({legacy_time / top_time:.1f}x faster)")
+
+
+def legacy_diff_equal_words(words1:list, words2:list) -> int:
+    """
+    Count the words a smallest diff keeps unchanged, with the full O(n*m) LCS table a naive diff uses.
+
+    Args:
+        words1 (list): Words of the original text
+        words2 (list): Words of the changed text
+
+    Returns:
+        int: Length of the longest common subsequence
+    """
+    table = [[0] * (len(words2) + 1) for _ in range(len(words1) + 1)]
+    for i, word1 in enumerate(words1):
+        for j, word2 in enumerate(words2):
+            table[i + 1][j + 1] = table[i][j] + 1 if word1 == word2 else helpers.max(table[i][j + 1], table[i + 1][j])
+    return table[-1][-1]
+
+
+def benchmark_diff(words:int = 2_000, edits:int = 40):
+    """
+    Compare the full LCS table with the linear-space Myers diff on an edited text.
+
+    Args:
+        words (int): Number of words in the original text
+        edits (int): Number of words changed, deleted or inserted in the edited text
+    """
+    original = sample_text(words * 8).split()[:words]
+    edited = list(original)
+    for n in range(edits):
+        position = (n * 7919) % len(edited)
+        if n % 3 == 0:
+            edited[position] = f"changed{n}"
+        elif n % 3 == 1:
+            del edited[position]
+        else:
+            edited.insert(position, f"inserted{n}")
+    ids1 = [main.vocabulary.intern(word) for word in original]
+    ids2 = [main.vocabulary.intern(word) for word in edited]
+
+    def equal_words(opcodes:list) -> int:
+        count = 0
+        for tag, start1, end1, _, _ in opcodes:
+            if tag == "equal":
+                count += end1 - start1
+        return count
+
+    # Without a cost limit the diff is the smallest one, as long as the LCS
+    expected = legacy_diff_equal_words(ids1, ids2)
+    assert equal_words(helpers.myers_diff(ids1, ids2)) == expected
+    assert equal_words(helpers.myers_diff(ids1, ids2, main.DIFF_MAX_COST)) == expected
+
+    legacy_time = timed(legacy_diff_equal_words, ids1, ids2, repeat=1)
+    legacy_memory = peak_allocation(legacy_diff_equal_words, ids1, ids2)
+    myers_time = timed(helpers.myers_diff, ids1, ids2, main.DIFF_MAX_COST)
+    myers_memory = peak_allocation(helpers.myers_diff, ids1, ids2, main.DIFF_MAX_COST)
+    print(f"Diff of {words} words with {edits} edits:")
+    print(f"  LCS table: {legacy_time:.3f}s, {legacy_memory / 1024:,.0f} KiB")
+    print(f"  Myers: {myers_time:.4f}s, {myers_memory / 1024:,.0f} KiB ({legacy_time / myers_time:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    benchmark_diff()
+    benchmark_nearest_references()
+    benchmark_word_counts()
+    benchmark_character_tables()
+    benchmark_reducers()
+    benchmark_split_exclude_ANSI()
+    benchmark_replace_preview()
@@ -1,3 +1,5 @@
+import codecs  # For decoding raw keyboard bytes that may split multibyte characters
+import functools  # For caching split results of repeated prompts
 import os  # For temporarily overriding the terminal's settings used by animated print/input
 import re  # For regular expression operations for string matching
 import string  # For grabbing printable characters
@@ -9,7 +11,9 @@ from typing import Iterable  # For type hinting (basically does nothing practica
 if sys.platform == "win32":
     import ctypes  # Required for Windows console control
     import ctypes.wintypes  # Required for Windows data types
+    import msvcrt  # For reading every queued key press at once
 else:
+    import select  # For checking whether more key presses are already queued
     import termios  # For controlling terminal settings on Unix/Linux
     import tty  # For setting terminal to character-by-character input mode
 
@@ -21,6 +25,7 @@ def animated_print(
     line_offset: int = 1,
     _override: bool = False,
     wrap_override: bool = False,
+    max_duration: float = 1.5,
 ) -> None:
     """
     Prints text with an animation effect, simulating a typewriter-style output.
@@ -67,6 +72,13 @@ def animated_print(
         wrap_override (bool):
             When True, enables line wrapping even when _override is True (default: False).
             Intended for direct use when you touched the "Not intended for direct use" _override parameter
+        max_duration (float):
+            Upper bound in seconds for the whole animation (default: 1.5s).
+            Long texts get a shorter per-frame delay instead of taking forever to show up.
+
+    Each frame is composed into a single buffer and written with one write + flush,
+    so the terminal only redraws once per frame instead of once per character.
+    When stdout is not a terminal (piped or redirected) the text is printed plainly.
 
     Raises:
         TypeError: If `end` is not a string, `delay` is not a number, or `txt` is not
@@ -109,6 +121,14 @@ def animated_print(
             "txt must be a str or iterable of str"
         )  # Raise an error for incorrect types
 
+    # No animation when the output is not a terminal, cursor movements would only end up as garbage in the file/pipe
+    if not sys.stdout.isatty():
+        print(
+            "\n".join(line if isinstance(line, str) else "".join(line) for line in txt),
+            end=end,
+        )
+        return
+
     # Get terminal size for proper text wrapping
     term_size = os.get_terminal_size()
     txt_lst = []  # Initialize a list to hold processed text lines
@@ -179,52 +199,116 @@ def animated_print(
     # Find the maximum line length for animation timing
     max_wordlen = max(len(line) for line in txt_lst)
 
+    # Number of frames needed, every line starts `line_offset` frames after the previous one
+    frames = max_wordlen + line_offset * len(txt_lst)
+    # Shrink the per-frame delay so the whole animation fits in max_duration
+    frame_delay = min(delay, max(max_duration, 0) / (frames + 1))
+    write = sys.stdout.write  # Alias for writing output
+
     # Print spaces for the animation based on the number of lines
-    print("\n" * (len(txt_lst)), end="\x1b[A")  # Move cursor up to start animation
+    write("\n" * (len(txt_lst)) + "\x1b[A")  # Move cursor up to start animation
+    sys.stdout.flush()
 
+    start = time.perf_counter()  # Frames are paced against this instead of sleeping a fixed amount
     # Animate the text character by character
-    for i in range(max_wordlen + line_offset * len(txt_lst)):
+    for i in range(frames):
         # Move cursor up to the top of the animation output
-        print("\x1b[A" * (len(txt_lst) - 1), end="")
-        time.sleep(delay)  # Pause between characters
+        frame = ["\x1b[A" * (len(txt_lst) - 1)]
         for j, line in enumerate(txt_lst):
             current_char = j * line_offset + 1  # Track the current character position
             # Update lines that need to be redrawn
             if i - current_char >= 0 and i - current_char < len(line):
-                # Print current character with front effect
-                print(
+                # Current character with front effect
+                frame.append(
                     "\x1b["
                     + str(current_char)
                     + "D"  # Move cursor left to overwrite character
-                    + line[i - current_char]  # Print the current character
+                    + line[i - current_char]  # The current character
                     + "\x1b["
                     + str(current_char)
                     + "C"  # Move cursor right
-                    + "\b\x1b[B",  # Move cursor to the next line
-                    end="",
-                    flush=True,
-                )  # Ensure immediate printing
+                    + "\b\x1b[B"  # Move cursor to the next line
+                )
             else:
-                print("\x1b[B", end="", flush=True)  # Move line without printing
-        print(
-            "\x1b[A\x1b[C", end="", flush=True
-        )  # Move cursor back up for the next iteration
+                frame.append("\x1b[B")  # Move line without printing
+        frame.append("\x1b[A\x1b[C")  # Move cursor back up for the next iteration
 
-    time.sleep(delay)  # Additional delay to complete character output
+        # Wait for this frame's turn, time spent building the frame is already counted
+        remaining = start + (i + 1) * frame_delay - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+        write("".join(frame))  # One write per frame
+        sys.stdout.flush()  # Ensure immediate printing
+
+    time.sleep(frame_delay)  # Additional delay to complete character output
     # Reset cursor position for any following outputs
-    print(
-        "\x1b[" + str(line_offset * len(txt_lst)) + "D",
-        end="\n" if truncated else "",
-        flush=True,
-    )
+    write("\x1b[" + str(line_offset * len(txt_lst)) + "D" + ("\n" if truncated else ""))
+    sys.stdout.flush()
 
-    # Recursively handle any truncated text for complete output
+    # Recursively handle any truncated text for complete output, sharing what is left of the time budget
     animated_print(
-        truncated, end, delay, line_offset, _override=True, wrap_override=wrap_override
+        truncated,
+        end,
+        delay,
+        line_offset,
+        _override=True,
+        wrap_override=wrap_override,
+        max_duration=max_duration - (time.perf_counter() - start),
     )
     return
 
 
+# Characters the input animation cycles through, and how many of them each typed character cycles through
+PRINTABLES = " " + string.printable[:-6]  # Space and printable ASCII characters without the other whitespace
+GLYPH_CYCLES = {char: i + 1 for i, char in enumerate(PRINTABLES)}  # Precomputed once instead of searching per keystroke
+
+_pending_keys = ""  # Keys read ahead of time (pasted past a newline) and kept for the next animated_input
+
+
+def _key_waiting(stdin_fd: int) -> bool:
+    """
+    Checks whether more input is already waiting to be read, without blocking.
+
+    Args:
+        stdin_fd (int): File descriptor of the standard input.
+
+    Returns:
+        bool: True if at least one more key can be read right away.
+    """
+    if sys.platform == "win32":
+        return msvcrt.kbhit()
+    return bool(select.select([stdin_fd], [], [], 0)[0])
+
+
+def _read_keys(stdin_fd: int, decoder: codecs.IncrementalDecoder) -> str:
+    """
+    Waits for at least one key, then returns every key that is already queued.
+
+    Pasted text or fast typing arrives as a single string here, so it can be
+    handled in one go rather than one read (and one animation) per character.
+
+    Args:
+        stdin_fd (int): File descriptor of the standard input.
+        decoder (codecs.IncrementalDecoder): UTF-8 decoder keeping multibyte characters split across reads.
+
+    Returns:
+        str: The queued keys, "\\x04" (Ctrl+D) if the input was closed.
+    """
+    if sys.platform == "win32":
+        keys = msvcrt.getwch()
+        while msvcrt.kbhit():
+            keys += msvcrt.getwch()
+        return keys.replace("\r", "\n")  # Enter is reported as a carriage return
+
+    keys = ""
+    while not keys:  # A read may stop in the middle of a multibyte character
+        data = os.read(stdin_fd, 1024)
+        if not data:
+            return "\x04"  # Treat a closed input like Ctrl+D
+        keys = decoder.decode(data)
+    return keys
+
+
 def animated_input(
     prompt: str = "",
     delay: float = 0.01,
@@ -239,6 +323,10 @@ def animated_input(
     character-by-character animation. Special keys like backspace are handled,
     and ANSI escape sequences in the input are supported.
 
+    Keys that arrive together (pasting, fast typing) are drawn straight away without
+    animation, and an animation is cut short as soon as the next key comes in, so
+    the input never lags behind the keyboard.
+
     Warning: Multi-line prompts including ANSI codes may not output as expected
     due to implementation complexity.
 
@@ -261,6 +349,12 @@ def animated_input(
     Returns:
         str: The user's input string (without the trailing newline).
     """
+    global _pending_keys
+
+    # Nothing to animate when not talking to a terminal, fall back to the plain input
+    if not (sys.stdin.isatty() and sys.stdout.isatty()):
+        return input(prompt + " ")
+
     # Display the prompt with animated typing effect
     animated_print(prompt, " ", delay, line_offset)
 
@@ -268,6 +362,7 @@ def animated_input(
     columns = os.get_terminal_size().columns - 2  # Adjust for prompt/other text
 
     # Set terminal to character-by-character input mode (raw mode)
+    stdin = sys.stdin.fileno()  # Get standard input file descriptor
     if sys.platform == "win32":  # Windows implementation
         dword = ctypes.wintypes.DWORD()
         kernel = ctypes.windll.kernel32
@@ -276,155 +371,146 @@ def animated_input(
         kernel.GetConsoleMode(kernel.GetStdHandle(-11), ctypes.byref(dword))
         kernel.SetConsoleMode(kernel.GetStdHandle(-11), 7)  # Enable ANSI support
     else:  # Unix/Linux implementation
-        stdin = sys.stdin.fileno()  # Get standard input file descriptor
         original_term = termios.tcgetattr(stdin)  # Get current terminal attributes
         tty.setcbreak(
             stdin, termios.TCSANOW
         )  # Set terminal to raw mode for character input
 
-    # Check if single letter input mode is enabled
-    if single_letter:
-        if _log:  # If logging is enabled, write to log file
-            with open("input_log.txt", "a") as f:
-                f.write("\n-----\nInput started (single letter)\n-----\n")
-        result = "\n"  # Initialize result with newline
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")  # Keeps multibyte keys in one piece
+    log = open("input_log.txt", "a") if _log else None  # One buffered handle for the whole input
+    output = sys.stdout.write  # Alias for writing output
 
-        while result == "\n":  # Await input until a character is provided
-            # This loop is to handle Windows stdin buffering issues
+    try:
+        # Check if single letter input mode is enabled
+        if single_letter:
+            if log:  # If logging is enabled, write to log file
+                log.write("\n-----\nInput started (single letter)\n-----\n")
+            # Await input until a character is provided
+            # This is to handle Windows stdin buffering issues
             # On Windows, sometimes need to press enter twice due to buffer behavior
-            result = sys.stdin.read(1)  # Read one character from stdin
-        # Handle keyboard Interrupt (Ctrl+C and Ctrl+D)
-        if result in "\x03\x04":
-            if _log:  # If logging is enabled, note the event
-                with open("input_log.txt", "a") as f:
-                    f.write(f"KeyboardInterrupt with {result}\n")
-            raise KeyboardInterrupt  # Raise KeyboardInterrupt if Ctrl+C is pressed
-        print(result)  # Print the character immediately
-        # Restore terminal state
+            keys = _pending_keys.lstrip("\n")
+            while not keys:
+                keys = _read_keys(stdin, decoder).lstrip("\n")
+            result, _pending_keys = keys[0], keys[1:]  # Keep the rest for the next input
+            # Handle keyboard Interrupt (Ctrl+C and Ctrl+D)
+            if result in "\x03\x04":
+                if log:  # If logging is enabled, note the event
+                    log.write(f"KeyboardInterrupt with {result}\n")
+                raise KeyboardInterrupt  # Raise KeyboardInterrupt if Ctrl+C is pressed
+            print(result)  # Print the character immediately
+            if log:  # Log the submitted input
+                log.write(f"submitted {repr(result)} \n")
+            return result  # Return the single character
+
+        # Get cursor position for multi-character input
+        output("\x1b[?25l\x1b[6n")  # Hide cursor and request cursor position
+        sys.stdout.flush()  # Ensure stdout is updated
+        keys = _pending_keys
+        reg = re.search(r"\x1b\[(\d*);(\d*)R", keys)
+        while not reg:  # Await complete cursor position response
+            keys += _read_keys(stdin, decoder)  # Append additional read characters
+            reg = re.search(r"\x1b\[(\d*);(\d*)R", keys)
+        ptr = int(reg.groups()[1] or 1)  # Get current cursor position
+        # Anything typed around the response is regular input
+        pending = keys[: reg.start()] + keys[reg.end() :]
+        _pending_keys = ""
+
+        result = ""  # Input string to gather characters
+        ansi = ""  # Holder for ANSI escape sequences
+
+        if log:  # Log input start
+            log.write("\n-----\nInput started\n-----\n")
+
+        # Main input loop, continues until Enter key
+        while True:
+            if not pending:
+                pending = _read_keys(stdin, decoder)  # Everything typed/pasted since the last read
+            char, pending = pending[0], pending[1:]
+            if char == "\n":  # Enter key
+                _pending_keys = pending  # Pasted text after the newline belongs to the next input
+                break
+
+            # Handle Keyboard Interrupt (Ctrl+C and Ctrl+D)
+            if char in "\x03\x04":  # Ctrl+C or Ctrl+D
+                if log:  # Log the keyboard interrupt
+                    log.write(f"KeyboardInterrupt with {char}\n")
+                raise KeyboardInterrupt
+            # Handle backspace character for deleting input
+            if char in "\x7f\x08":
+                if len(result) > 0:  # If there is a character to backspace
+                    if log:  # Log the deletion action
+                        log.write("del\n")
+                    result = result[:-1]  # Remove last character from result
+
+                    if ptr % columns != 0:  # If not at start of the line
+                        output("\b \b")  # Erase character on same line
+                    else:  # If at the start of the line
+                        output(
+                            f"\x1b[F\x1b[{columns-1}G\b \b"
+                        )  # Move up one line and back to the last character
+                    ptr -= 1  # Move cursor back
+            else:  # If a normal input character
+                if log:  # Log addition of character
+                    log.write(f"add {repr(char)} \n")
+                result += char  # Add character to result
+
+                if ptr % columns == 0:  # If at end of terminal width
+                    output(" \n")  # Create a new line to continue input
+
+                # Handle ANSI escape sequences explicitly here
+                if char == "\x1b":  # Start of ANSI escape sequence
+                    ansi = char  # Store starting ANSI sequence
+                elif ansi:  # Continue building ANSI sequence
+                    ansi += char
+
+                # Determine animation length based on character type
+                if char in "\0 \b\n" or ansi:  # Handle special characters and ANSI
+                    end_cyc = 0
+                else:  # Printables stop at themselves, anything else goes through the whole cycle
+                    end_cyc = GLYPH_CYCLES.get(char, len(PRINTABLES))
+
+                # Animation effect: cycle through characters, only when nothing else is waiting
+                # (pasted text is drawn at once, and a new key press cuts the animation short)
+                if not pending:
+                    for c in PRINTABLES[:end_cyc]:  # Show each character in printables
+                        if _key_waiting(stdin):
+                            break
+                        output(
+                            ansi + c + "\b"
+                        )  # Show character then backspace to show just the animated char
+                        sys.stdout.flush()  # Prompt for immediate output
+                        time.sleep(delay / 10)  # Shorter sleep for quicker animation
+
+                # Handle final character display
+                if ansi == "":
+                    output(char)  # Print character if no ANSI involved
+                elif ansi == "\x1b[" or ansi[-1] < "@" or ansi[-1] > "~":
+                    pass  # Incomplete ANSI sequence, do nothing
+                else:
+                    output(result + " \b")  # Display result string followed by backspace
+                    ansi = ""  # Reset ANSI storage for next sequence
+                ptr += 1  # Increment cursor position
+
+            if not pending:
+                sys.stdout.flush()  # Show the whole batch of keys at once
+
+        output("\n")  # Final newline to complete input
+        sys.stdout.flush()
+
+        # Log final result if logging is enabled
+        if log:
+            log.write(f"submitted {repr(result)} \n")
+
+        return result  # Return the string input by the user
+    finally:
+        # Restore terminal state to original settings based on platform, even after Ctrl+C
         if sys.platform == "win32":  # Windows restoration
             kernel.SetConsoleMode(kernel.GetStdHandle(-10), dword)
             kernel.SetConsoleMode(kernel.GetStdHandle(-11), dword)
         else:  # Unix/Linux restoration
             termios.tcsetattr(stdin, termios.TCSANOW, original_term)
-        if _log:  # Log the submitted input
-            with open("input_log.txt", "a") as f:
-                f.write(f"submitted {repr(result)} \n")
-        return result  # Return the single character
-
-    # Get cursor position for multi-character input
-    sys.stdout.write("\x1b[?25l\x1b[6n")  # Hide cursor and request cursor position
-    sys.stdout.flush()  # Ensure stdout is updated
-    result = sys.stdin.read(1)  # Read initial character
-    while not result.endswith("R"):  # Await complete cursor position response
-        result += sys.stdin.read(1)  # Append additional read characters
-
-    # Parse cursor position response from terminal
-    reg = re.match(
-        r"^\x1b\[(\d*);(\d*)R", result
-    )  # Extract row and column from ANSI response
-    ptr = int(reg.groups()[1]) if reg else 1  # Get current cursor position
-
-    # Prepare character sets for animation
-    printables = [" "] + list(string.printable)[:-6]  # Include printable ASCII characters
-    output = sys.stdout.write  # Alias for writing output
-
-    # Read input character by character until the Enter key
-    char = sys.stdin.read(1)  # Read first character
-    result = ""  # Input string to gather characters
-    ansi = ""  # Holder for ANSI escape sequences
-
-    if _log:  # Log input start
-        with open("input_log.txt", "a") as f:
-            f.write("\n-----\nInput started\n-----\n")
-
-    # Main input loop
-    while char != "\n":  # Continue until Enter key
-        # Handle Keyboard Interrupt (Ctrl+C and Ctrl+D)
-        if char in "\x03\x04":  # Ctrl+C or Ctrl+D
-            if _log:  # Log the keyboard interrupt
-                with open("input_log.txt", "a") as f:
-                    f.write(f"KeyboardInterrupt with {char}\n")
-            raise KeyboardInterrupt
-        # Handle backspace character for deleting input
-        if char in "\x7f\x08":
-            if len(result) > 0:  # If there is a character to backspace
-                if _log:  # Log the deletion action
-                    with open("input_log.txt", "a") as f:
-                        f.write("del\n")
-                result = result[:-1]  # Remove last character from result
-
-                if ptr % columns != 0:  # If not at start of the line
-                    output("\b \b")  # Erase character on same line
-                else:  # If at the start of the line
-                    output(
-                        f"\x1b[F\x1b[{columns-1}G\b \b"
-                    )  # Move up one line and back to the last character
-
-                sys.stdout.flush()  # Show updated result immediately
-                ptr -= 1  # Move cursor back
-        else:  # If a normal input character
-            if _log:  # Log addition of character
-                with open("input_log.txt", "a") as f:
-                    f.write(f"add {repr(char)} \n")
-            result += char  # Add character to result
-
-            if ptr % columns == 0:  # If at end of terminal width
-                output(" \n")  # Create a new line to continue input
-
-            # Handle ANSI escape sequences explicitly here
-            if char == "\x1b":  # Start of ANSI escape sequence
-                ansi = char  # Store starting ANSI sequence
-            elif ansi:  # Continue building ANSI sequence
-                ansi += char
-
-            # Determine animation length based on character type
-            if char in printables:  # If character is printable
-                end_cyc = (
-                    linear_search(printables, char) + 1
-                )  # Index for animation limit
-            elif char in "\0 \b\n" or ansi:  # Handle special characters and ANSI
-                end_cyc = 0
-            else:  # If not special
-                end_cyc = len(printables)
-
-            # Animation effect: cycle through characters
-            for c in printables[:end_cyc]:  # Show each character in printables
-                output(ansi)  # Print any ANSI information
-                output(
-                    c + "\b"
-                )  # Show character then backspace to show just the animated char
-                sys.stdout.flush()  # Prompt for immediate output
-                time.sleep(delay / 10)  # Shorter sleep for quicker animation
-
-            # Handle final character display
-            if ansi == "":
-                output(char)  # Print character if no ANSI involved
-            elif ansi == "\x1b[" or ansi[-1] < "@" or ansi[-1] > "~":
-                pass  # Incomplete ANSI sequence, do nothing
-            else:
-                output(result + " \b")  # Display result string followed by backspace
-                ansi = ""  # Reset ANSI storage for next sequence
-
-            sys.stdout.flush()  # Prompt for immediate output
-            ptr += 1  # Increment cursor position
-
-        char = sys.stdin.read(1)  # Read next character
-
-    output("\n")  # Final newline to complete input
-
-    # Restore terminal state to original settings based on platform
-    if sys.platform == "win32":  # Windows restoration
-        kernel.SetConsoleMode(kernel.GetStdHandle(-10), dword)
-        kernel.SetConsoleMode(kernel.GetStdHandle(-11), dword)
-    else:  # Unix/Linux restoration
-        termios.tcsetattr(stdin, termios.TCSANOW, original_term)
-
-    # Log final result if logging is enabled
-    if _log:
-        with open("input_log.txt", "a") as f:
-            f.write(f"submitted {repr(result)} \n")
-
-    return result  # Return the string input by the user
+        if log:
+            log.close()
 
 
 def quick_sort(iterable: Iterable, /, *, key=None, reverse: bool = False) -> list:
@@ -432,7 +518,7 @@ def quick_sort(iterable: Iterable, /, *, key=None, reverse: bool = False) -> lis
     Sorts a list using the quick sort algorithm.
 
     This is a recursive implementation of the quick sort algorithm that uses
-    the first element as the pivot. It creates new lists rather than sorting in-place.
+    the middle element as the pivot. It creates new lists rather than sorting in-place.
 
     Args:
         Iterable (Iterable):
@@ -447,7 +533,7 @@ def quick_sort(iterable: Iterable, /, *, key=None, reverse: bool = False) -> lis
 
     Time Complexity:
         - Average case: O(n log n)
-        - Worst case: O(n^2) when the list is already sorted
+        - Worst case: O(n^2) when the middle elements keep being the smallest or largest
 
     Space Complexity:
         O(n) due to the creation of new lists during recursion.
@@ -456,15 +542,19 @@ def quick_sort(iterable: Iterable, /, *, key=None, reverse: bool = False) -> lis
     if len(iterable) < 2:
         return iterable
 
-    pivot = iterable[0]  # Choose the first element as the pivot
+    middle = len(iterable) // 2
+    pivot = iterable[middle]  # Choose the middle element as the pivot, so sorted input is not the worst case
     comp_pivot = pivot if key is None else key(pivot)
     less = []  # List to hold elements less than the pivot
-    more = []  # List to hold elements greater than or equal to the pivot
+    equal = []  # List to hold elements equal to the pivot (including itself), so repeated keys don't deepen the recursion
+    more = []  # List to hold elements greater than the pivot
 
     # Divide the input list into smaller partitions based on the pivot
-    for item in iterable[1:]:
+    for i, item in enumerate(iterable):
         comp_item = item if key is None else key(item)
-        if not reverse:
+        if i == middle or comp_item == comp_pivot:
+            equal.append(item)  # Add to "equal" if it ties with the pivot
+        elif not reverse:
             if comp_item < comp_pivot:
                 less.append(item)  # Add to "less" if it's smaller than the pivot
             else:
@@ -480,9 +570,9 @@ def quick_sort(iterable: Iterable, /, *, key=None, reverse: bool = False) -> lis
     # Recursively sort both partitions and combine them
     # Reverse the result if descending order is requested
     return (
-        list(quick_sort(less, reverse=reverse))
-        + [pivot]
-        + list(quick_sort(more, reverse=reverse))
+        list(quick_sort(less, key=key, reverse=reverse))
+        + equal
+        + list(quick_sort(more, key=key, reverse=reverse))
     )
 
 
@@ -524,6 +614,545 @@ def linear_search(
     return -1  # Return -1 if the value is not found
 
 
+def build_aho_corasick(patterns: Iterable[Iterable]) -> tuple[list[dict], list[int], list[list[int]]]:
+    """
+    Builds an Aho-Corasick automaton for finding many patterns at once.
+
+    The patterns are put into a trie, then every trie node gets a failure link to the
+    longest proper suffix of it that is also in the trie. The automaton works on any
+    sequence of hashable symbols, e.g. characters of a string or words of a text.
+
+    Args:
+        patterns (Iterable[Iterable]):
+            The patterns to search for, each one a sequence of symbols.
+
+    Returns:
+        tuple: A tuple containing three lists, indexed by state (state 0 is the root):
+            - goto: dict of symbol -> next state for every state
+            - fail: the failure link of every state
+            - output: indices of the patterns that end at every state
+
+    Time Complexity:
+        O(m) where m is the total length of all patterns.
+    """
+    goto = [{}]  # Trie edges of every state
+    fail = [0]  # Failure link of every state
+    output = [[]]  # Patterns ending at every state
+
+    # Put every pattern into the trie
+    for pattern_index, pattern in enumerate(patterns):
+        state = 0
+        for symbol in pattern:
+            if symbol not in goto[state]:  # Create a new state for this symbol
+                goto.append({})
+                fail.append(0)
+                output.append([])
+                goto[state][symbol] = len(goto) - 1
+            state = goto[state][symbol]
+        output[state].append(pattern_index)  # The pattern ends here
+
+    # Breadth-first search to set failure links, so shorter states are always done first
+    queue = list(goto[0].values())  # Children of the root fail back to the root
+    head = 0  # Index of the next state in the queue
+    while head < len(queue):
+        state = queue[head]
+        head += 1
+        for symbol, child in goto[state].items():
+            queue.append(child)
+            # Follow failure links until a state that can continue with this symbol
+            link = fail[state]
+            while link and symbol not in goto[link]:
+                link = fail[link]
+            if symbol in goto[link] and goto[link][symbol] != child:
+                fail[child] = goto[link][symbol]
+            # Patterns ending at the failure state also end here
+            output[child] = output[child] + output[fail[child]]
+
+    return goto, fail, output
+
+
+def aho_corasick_search(automaton: tuple[list[dict], list[int], list[list[int]]], sequence: Iterable) -> list[tuple[int, int],]:
+    """
+    Finds every occurrence of every pattern of an Aho-Corasick automaton in a single pass.
+
+    Args:
+        automaton (tuple):
+            The automaton returned by build_aho_corasick().
+        sequence (Iterable):
+            The sequence of symbols to search in.
+
+    Returns:
+        list[tuple[int, int]]: (end index, pattern index) of every match, in the order they end.
+                               The match starts at end index - len(pattern) + 1.
+
+    Time Complexity:
+        O(n + z) where n is the length of the sequence and z is the number of matches.
+    """
+    goto, fail, output = automaton
+    matches = []  # Found matches
+    state = 0  # Start at the root
+
+    for index, symbol in enumerate(sequence):
+        # Fall back along failure links until the symbol can be matched (or we are at the root)
+        while state and symbol not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(symbol, 0)
+        for pattern_index in output[state]:  # Report every pattern ending here
+            matches.append((index, pattern_index))
+
+    return matches
+
+
+def build_suffix_automaton(sequence: Iterable) -> tuple[list[dict], list[int], list[int], list[int]]:
+    """
+    Builds a suffix automaton that recognizes every contiguous run of a sequence.
+
+    Every state stands for a group of runs that end at the same places in the sequence.
+    The automaton works on any sequence of hashable symbols, e.g. characters of a string
+    or word IDs of a text, and has at most 2n states.
+
+    Args:
+        sequence (Iterable):
+            The sequence of symbols to index.
+
+    Returns:
+        tuple: A tuple containing four lists, indexed by state (state 0 is the empty run):
+            - goto: dict of symbol -> next state for every state
+            - link: the suffix link of every state (-1 for state 0)
+            - length: the length of the longest run of every state
+            - first_end: the index in the sequence where the runs of every state first end
+
+    Time Complexity:
+        O(n) where n is the length of the sequence.
+    """
+    goto = [{}]  # Transitions of every state
+    link = [-1]  # Suffix link of every state
+    length = [0]  # Longest run of every state
+    first_end = [-1]  # Where the runs of every state first end
+    last = 0  # State of the whole sequence read so far
+
+    for index, symbol in enumerate(sequence):
+        # New state for the sequence read so far
+        current = len(goto)
+        goto.append({})
+        link.append(0)
+        length.append(length[last] + 1)
+        first_end.append(index)
+
+        # Every suffix without a transition for this symbol can now continue into the new state
+        state = last
+        while state != -1 and symbol not in goto[state]:
+            goto[state][symbol] = current
+            state = link[state]
+
+        if state != -1:
+            next_state = goto[state][symbol]
+            if length[state] + 1 == length[next_state]:
+                link[current] = next_state
+            else:
+                # The next state also holds longer runs, split the shorter ones off into a clone
+                clone = len(goto)
+                goto.append(dict(goto[next_state]))
+                link.append(link[next_state])
+                length.append(length[state] + 1)
+                first_end.append(first_end[next_state])
+                while state != -1 and goto[state].get(symbol) == next_state:
+                    goto[state][symbol] = clone
+                    state = link[state]
+                link[next_state] = clone
+                link[current] = clone
+        last = current
+
+    return goto, link, length, first_end
+
+
+def suffix_automaton_matches(automaton: tuple[list[dict], list[int], list[int], list[int]], sequence: Iterable,
+                             min_length: int = 1) -> list[tuple[int, int, int],]:
+    """
+    Finds the longest runs of a sequence that also appear in the sequence of a suffix automaton, in a single pass.
+
+    At every index, the longest run ending there that the automaton knows is tracked.
+    A run is reported when it can't be made any longer at either end, so every shared
+    passage is reported once instead of once for every run inside it.
+
+    Args:
+        automaton (tuple):
+            The automaton returned by build_suffix_automaton().
+        sequence (Iterable):
+            The sequence of symbols to search in.
+        min_length (int):
+            The shortest run to report.
+
+    Returns:
+        list[tuple[int, int, int]]: (start in sequence, start in the indexed sequence, length)
+                                    of every run, in the order they end.
+                                    Runs may overlap if the indexed sequence has them in different places.
+
+    Time Complexity:
+        O(n) where n is the length of the sequence.
+    """
+    goto, link, length, first_end = automaton
+    matches = []  # Found runs
+    state = 0  # State of the longest run ending at the previous index
+    matched = 0  # Length of that run
+    index = -1  # Index of the last symbol, stays -1 for an empty sequence
+
+    for index, symbol in enumerate(sequence):
+        if symbol in goto[state]:
+            state = goto[state][symbol]
+            matched += 1
+            continue  # The run just got longer, so it isn't reported yet
+
+        # The run ending at the previous index can't be made longer
+        if matched and matched >= min_length:
+            matches.append((index - matched, first_end[state] - matched + 1, matched))
+        # Drop symbols from the start of the run until it can continue with this symbol
+        while state != -1 and symbol not in goto[state]:
+            state = link[state]
+        if state == -1:
+            state, matched = 0, 0  # The symbol doesn't appear at all
+        else:
+            matched = length[state] + 1
+            state = goto[state][symbol]
+
+    # The run reaching the end of the sequence
+    if matched and matched >= min_length:
+        matches.append((index + 1 - matched, first_end[state] - matched + 1, matched))
+    return matches
+
+
+def _middle_split(a, b, a_lo: int, a_hi: int, b_lo: int, b_hi: int, max_cost: int | None) -> tuple[int, int] | None:
+    """
+    Finds where an optimal edit path of a[a_lo:a_hi] and b[b_lo:b_hi] crosses its middle (Myers' middle snake).
+
+    Edit paths are followed from the start and from the end at the same time, one more edit
+    each round, until they meet. Only one row of furthest reaching points is kept per
+    direction, so the memory used is linear in the length of the ranges.
+
+    Args:
+        a, b: The sequences being compared.
+        a_lo, a_hi, b_lo, b_hi (int): The ranges being compared, which don't start or end with equal symbols.
+        max_cost (int | None): Most rounds to try before settling for the furthest point reached from the start.
+
+    Returns:
+        tuple[int, int] | None: The (index in a, index in b) to split the ranges at,
+                                or None if they have nothing in common worth splitting at.
+    """
+    n = a_hi - a_lo
+    m = b_hi - b_lo
+    max_d = (n + m + 1) // 2  # The paths meet after at most this many rounds
+    offset = max_d + 1  # Diagonal k is stored at k + offset
+    forward = [-1] * (2 * max_d + 3)  # Furthest x reached on every diagonal from the start
+    backward = [-1] * (2 * max_d + 3)  # Furthest x reached on every diagonal from the end
+    forward[offset + 1] = 0
+    backward[offset + 1] = 0
+    delta = n - m
+    odd = delta & 1  # If odd, the paths meet during a forward round, otherwise during a backward round
+    # Diagonals that already left the ranges are skipped from then on
+    forward_start = forward_end = backward_start = backward_end = 0
+    rounds = max_d if max_cost is None or max_cost >= max_d else max_cost
+
+    for d in range(rounds + 1):
+        # One more edit from the start
+        for k in range(-d + forward_start, d + 1 - forward_end, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]  # Step down (insert from b)
+            else:
+                x = forward[offset + k - 1] + 1  # Step right (delete from a)
+            y = x - k
+            while x < n and y < m and a[a_lo + x] == b[b_lo + y]:  # Follow the diagonal while symbols are equal
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            if x > n:
+                forward_end += 2  # Off the right edge
+            elif y > m:
+                forward_start += 2  # Off the bottom edge
+            elif odd and 0 <= delta - k + offset < len(backward) and backward[offset + delta - k] != -1:
+                if x >= n - backward[offset + delta - k]:  # Met the path from the end
+                    return a_lo + x, b_lo + y
+
+        # One more edit from the end
+        for k in range(-d + backward_start, d + 1 - backward_end, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[a_hi - x - 1] == b[b_hi - y - 1]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+            if x > n:
+                backward_end += 2
+            elif y > m:
+                backward_start += 2
+            elif not odd and 0 <= delta - k + offset < len(forward) and forward[offset + delta - k] != -1:
+                forward_x = forward[offset + delta - k]
+                if forward_x >= n - x:  # Met the path from the start
+                    return a_lo + forward_x, b_lo + forward_x - delta + k
+
+    if rounds == max_d:
+        return None  # Every round was tried, the ranges have nothing in common
+
+    # Too expensive: split at the point furthest from the start that was reached, so the rest is cheaper
+    best_x = best_y = 0
+    for k in range(-rounds, rounds + 1, 2):
+        x = forward[offset + k]
+        y = x - k
+        if 0 <= x <= n and 0 <= y <= m and x + y > best_x + best_y:
+            best_x, best_y = x, y
+    if best_x + best_y in (0, n + m):
+        return None  # Splitting there wouldn't make the ranges any smaller
+    return a_lo + best_x, b_lo + best_y
+
+
+def myers_diff(a, b, max_cost: int | None = None) -> list[tuple[str, int, int, int, int],]:
+    """
+    Finds the fewest insertions and deletions that turn one sequence into another (Myers' algorithm).
+
+    Equal starts and ends are matched right away, and the rest is split where an optimal
+    edit path crosses its middle, which is then done again for both halves. The symbols
+    can be anything comparable with ==, e.g. characters of a string or word IDs of a text.
+
+    Args:
+        a (Sequence):
+            The original sequence.
+        b (Sequence):
+            The changed sequence.
+        max_cost (int | None):
+            Most edits to look for at once in each part before settling for a good, but
+            not always the smallest, difference. None always finds the smallest one.
+
+    Returns:
+        list[tuple[str, int, int, int, int]]: (tag, a_start, a_end, b_start, b_end) of consecutive
+            parts of both sequences, like difflib.SequenceMatcher.get_opcodes(). tag is "equal",
+            "delete" (a[a_start:a_end] was removed), "insert" (b[b_start:b_end] was added) or
+            "replace" (a[a_start:a_end] became b[b_start:b_end]).
+
+    Time Complexity:
+        O((n + m) * d) where d is the number of edits (at most max_cost per part),
+        using O(n + m) memory.
+    """
+    matches = []  # (a index, b index, length) of equal runs, in order
+    stack = [("range", 0, len(a), 0, len(b))]  # Parts still to do, the next one on top
+    while stack:
+        item = stack.pop()
+        if item[0] == "equal":
+            matches.append(item[1:])
+            continue
+        _, a_lo, a_hi, b_lo, b_hi = item
+
+        # Match the equal start now and the equal end after the middle
+        start = 0
+        while a_lo + start < a_hi and b_lo + start < b_hi and a[a_lo + start] == b[b_lo + start]:
+            start += 1
+        if start:
+            matches.append((a_lo, b_lo, start))
+            a_lo += start
+            b_lo += start
+        end = 0
+        while a_lo < a_hi - end and b_lo < b_hi - end and a[a_hi - end - 1] == b[b_hi - end - 1]:
+            end += 1
+        if end:
+            a_hi -= end
+            b_hi -= end
+            stack.append(("equal", a_hi, b_hi, end))
+
+        if a_lo == a_hi or b_lo == b_hi:
+            continue  # Only insertions or only deletions are left
+        split = _middle_split(a, b, a_lo, a_hi, b_lo, b_hi, max_cost)
+        if split is not None:
+            stack.append(("range", split[0], a_hi, split[1], b_hi))  # Done after the first half
+            stack.append(("range", a_lo, split[0], b_lo, split[1]))
+
+    # Turn the equal runs into consecutive parts, with the gaps between them as changes
+    opcodes = []
+    i = j = 0
+    for a_start, b_start, length in matches + [(len(a), len(b), 0)]:
+        if i < a_start and j < b_start:
+            opcodes.append(("replace", i, a_start, j, b_start))
+        elif i < a_start:
+            opcodes.append(("delete", i, a_start, j, j))
+        elif j < b_start:
+            opcodes.append(("insert", i, i, j, b_start))
+        if length:
+            if opcodes and opcodes[-1][0] == "equal":  # Runs matched in different parts may touch
+                opcodes[-1] = ("equal", opcodes[-1][1], a_start + length, opcodes[-1][3], b_start + length)
+            else:
+                opcodes.append(("equal", a_start, a_start + length, b_start, b_start + length))
+        i, j = a_start + length, b_start + length
+    return opcodes
+
+
+def levenshtein(a: str, b: str) -> int:
+    """
+    Computes the Levenshtein (edit) distance between two strings.
+
+    Args:
+        a (str): The first string.
+        b (str): The second string.
+
+    Returns:
+        int: The smallest number of single-character insertions, deletions and
+             substitutions that turn one string into the other.
+
+    Time Complexity:
+        O(n * m) where n and m are the lengths of the strings.
+    """
+    if len(a) < len(b):
+        a, b = b, a  # Keep the rows as short as possible
+    previous = list(range(len(b) + 1))  # Distances from the previous prefix of a
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1,  # Delete char_a
+                               current[j - 1] + 1,  # Insert char_b
+                               previous[j - 1] + (char_a != char_b)))  # Substitute (free if equal)
+        previous = current
+    return previous[-1]
+
+
+def build_bk_tree(words: Iterable[str]) -> tuple[list[str], list[dict]]:
+    """
+    Builds a BK-tree (Burkhard-Keller tree) for finding words within an edit distance.
+
+    Every node holds a word, and its children are keyed by their edit distance to it.
+    Because the edit distance is a metric, a search only has to visit the children whose
+    key is close to the distance between the query and the node, skipping most of the tree.
+
+    Args:
+        words (Iterable[str]):
+            The words to put into the tree (duplicates are ignored).
+
+    Returns:
+        tuple: A tuple containing two lists, indexed by node (node 0 is the root):
+            - words: the word of every node
+            - children: dict of distance -> child node for every node
+
+    Time Complexity:
+        O(n * d * l^2) where n is the number of words, d is the depth of the tree
+        and l is the length of the words.
+    """
+    tree_words = []  # Word of every node
+    children = []  # Edges of every node
+
+    for word in words:
+        if not tree_words:  # The first word becomes the root
+            tree_words.append(word)
+            children.append({})
+            continue
+        node = 0
+        while True:
+            distance = levenshtein(word, tree_words[node])
+            if distance == 0:
+                break  # Already in the tree
+            if distance not in children[node]:  # Add the word as a new child here
+                tree_words.append(word)
+                children.append({})
+                children[node][distance] = len(tree_words) - 1
+                break
+            node = children[node][distance]
+
+    return tree_words, children
+
+
+def bk_tree_search(tree: tuple[list[str], list[dict]], word: str, max_distance: int) -> list[tuple[str, int],]:
+    """
+    Finds every word of a BK-tree within an edit distance of a word.
+
+    Args:
+        tree (tuple):
+            The tree returned by build_bk_tree().
+        word (str):
+            The word to search for.
+        max_distance (int):
+            The largest edit distance to accept.
+
+    Returns:
+        list[tuple[str, int]]: (word, distance) of every word found, in no particular order.
+
+    Time Complexity:
+        Depends on max_distance, but usually only a small part of the tree is visited
+        for small distances.
+    """
+    tree_words, children = tree
+    found = []  # Words within the distance
+    stack = [0] if tree_words else []  # Nodes still to visit
+
+    while stack:
+        node = stack.pop()
+        distance = levenshtein(word, tree_words[node])
+        if distance <= max_distance:
+            found.append((tree_words[node], distance))
+        # By the triangle inequality, only children this close can be within the distance
+        for child_distance, child in children[node].items():
+            if distance - max_distance <= child_distance <= distance + max_distance:
+                stack.append(child)
+
+    return found
+
+
+# An ANSI CSI sequence as animated print/input see it: "\x1b[" up to the first character between "@" and "~" (both exclusive).
+# A "\x1b[" inside the sequence restarts it, an unterminated sequence runs until the end of the text.
+ANSI_BODY = r"\x1b\[(?:[^A-}\x1b]|\x1b\[|\x1b(?!\[))*"
+ANSI_CHAR_PATTERN = re.compile(ANSI_BODY + r"[A-}]|\x1b\[.*|.", re.DOTALL)  # One ANSI sequence or one character
+
+
+@functools.lru_cache(maxsize=256)
+def _split_pattern(separators: tuple[str, ...]) -> re.Pattern:
+    """
+    Builds the tokenizer for the given separators, cached since the same separators are used over and over.
+
+    ANSI sequences are matched up to (not including) their final character, as that character
+    may still start a separator, and are then simply skipped.
+
+    Args:
+        separators (tuple[str, ...]): The separators, in order of priority.
+
+    Returns:
+        re.Pattern: Pattern whose "sep" group is set when a separator is matched.
+    """
+    return re.compile(
+        "(?:" + ANSI_BODY + r"(?=[A-}])|\x1b\[.*)|(?P<sep>"
+        + "|".join(re.escape(separator) for separator in separators)
+        + ")",
+        re.DOTALL,
+    )
+
+
+@functools.lru_cache(maxsize=512)
+def _split_exclude_ANSI(text: str, separators: tuple[str, ...]) -> tuple[str, ...]:
+    """
+    Cached part of split_exclude_ANSI, see there.
+
+    Args:
+        text (str): The string to split.
+        separators (tuple[str, ...]): Separator(s) to split by, ("",) to split into characters.
+
+    Returns:
+        tuple[str, ...]: The split sections.
+    """
+    if separators == ("",):  # Every ANSI sequence or character is its own section
+        return tuple(ANSI_CHAR_PATTERN.findall(text))
+
+    result = []  # Resultant list of split strings
+    start = 0  # Start index for current segment
+    for match in _split_pattern(separators).finditer(text):
+        if match.group("sep") is not None:  # Only separators split, ANSI sequences are skipped over
+            result.append(text[start : match.start()])  # Append current segment
+            start = match.end()  # Next segment starts after the separator
+
+    # Add the last segment post-loop
+    result.append(text[start:])
+
+    # Remove any trailing empty strings in the result
+    while result and result[-1] == "":
+        del result[-1]  # Delete empty strings at the end of the list
+
+    return tuple(result)
+
+
 def split_exclude_ANSI(text: str, sep: str | list[str] | tuple[str] = ""):
     r"""
     Splits a string by separator(s) while preserving ANSI escape sequences.
@@ -532,6 +1161,9 @@ def split_exclude_ANSI(text: str, sep: str | list[str] | tuple[str] = ""):
     resulting substring. If the separator is empty, it splits into individual characters
     while keeping ANSI sequences together.
 
+    The text is tokenized in one pass by a compiled regular expression, and results are
+    memoized since the same prompts get split again and again by animated print/input.
+
     Args:
         text (str):
             The string to split.
@@ -546,8 +1178,8 @@ def split_exclude_ANSI(text: str, sep: str | list[str] | tuple[str] = ""):
         TypeError: If `sep` is not a string, a list of strings, or a tuple of strings.
 
     Example:
-        >>> split_exclude_ANSI("\x1b[31mHello\x1b[0m World", "")
-        ['\x1b[31m', 'Hello, '\x1b[0m', 'World']
+        >>> split_exclude_ANSI("\x1b[31mHi\x1b[0m World", "")
+        ['\x1b[31m', 'H', 'i', '\x1b[0m', ' ', 'W', 'o', 'r', 'l', 'd']
         >>> split_exclude_ANSI("\x1b[31mHello\x1b[0m World", " ")
         ['\x1b[31mHello\x1b[0m', 'World']
     """
@@ -561,52 +1193,10 @@ def split_exclude_ANSI(text: str, sep: str | list[str] | tuple[str] = ""):
     if not text:
         return []  # Return an empty list if there is no text
 
-    # Convert `sep` to a list for uniform handling
-    separators = [sep] if isinstance(sep, str) else list(sep)
+    # Convert `sep` to a tuple so it can be used as a cache key
+    separators = (sep,) if isinstance(sep, str) else tuple(sep)
 
-    # Initialize variables for splitting logic
-    result = []  # Resultant list of split strings
-    i = 0  # Index to traverse the text
-    start = 0  # Start index for current segment
-    in_ansi = False  # Flag indicating if we are within an ANSI sequence
-    ansi_start = -1  # Start index of the ANSI sequence
-
-    while i < len(text):
-        # Check if entering an ANSI escape sequence
-        if text[i] == "\x1b" and i + 1 < len(text) and text[i + 1] == "[":
-            in_ansi = True  # Set flag indicating we are inside an ANSI sequence
-            ansi_start = i  # Mark the start index of the ANSI sequence
-
-        # Check if at the end of an ANSI sequence
-        if in_ansi and i > ansi_start + 1 and text[i] > "@" and text[i] < "~":
-            in_ansi = False  # Reset flag when we exit the ANSI sequence
-
-        # Split logic outside of ANSI sequences
-        if not in_ansi:
-            # Special case: if separator is empty, split into individual characters
-            if separators == [""]:
-                i += 1  # Increment index to read next character
-            # Check for any specified separator matches
-            for separator in separators:
-                if (
-                    i + len(separator) <= len(text)
-                    and text[i : i + len(separator)] == separator
-                ):
-                    result.append(text[start:i])  # Append current segment
-                    i += len(separator) - 1  # Move index past the separator
-                    start = i + 1  # Update start for the next segment
-                    break  # Break to re-check for more separators as needed
-
-        i += 1  # Advance the iterator
-
-    # Add the last segment post-loop
-    result.append(text[start:])
-
-    # Remove any trailing empty strings in the result
-    while result and result[-1] == "":
-        del result[-1]  # Delete empty strings at the end of the list
-
-    return result  # Return the list of split sections
+    return list(_split_exclude_ANSI(text, separators))  # A fresh list, the cached tuple stays untouched
 
 
 def max(*args):
@@ -624,6 +1214,7 @@ def max(*args):
 
     Raises:
         TypeError: If no arguments are provided.
+        ValueError: If the single iterable provided is empty.
 
     Example:
         >>> max(1, 2, 3)
@@ -636,15 +1227,17 @@ def max(*args):
 
     elif len(args) == 1:  # Handle single iterable input
         args = args[0]
-        if isinstance(args, Iterable):  # Convert to list if it's an iterable
-            args = list(args)
-        else:
+        if not isinstance(args, Iterable):
             return (
                 args  # Directly return the value if it's a single non-iterable argument
             )
 
-    maximum = args[0]  # Initialize maximum with the first argument
-    for n in args:  # Loop to find maximum
+    values = iter(args)  # Consume the values lazily, generators are never copied into a list
+    for maximum in values:  # Initialize maximum with the first value
+        break
+    else:
+        raise ValueError("max() arg is an empty sequence")
+    for n in values:  # Loop to find maximum
         if n > maximum:  # If current value is greater than maximum
             maximum = n  # Update maximum
     return maximum  # Return the largest value found
@@ -665,6 +1258,7 @@ def min(*args):
 
     Raises:
         TypeError: If no arguments are provided.
+        ValueError: If the single iterable provided is empty.
 
     Example:
         >>> min(1, 2, 3)
@@ -677,15 +1271,17 @@ def min(*args):
 
     elif len(args) == 1:  # Handle single iterable input
         args = args[0]
-        if isinstance(args, Iterable):  # Convert to list if it's an iterable
-            args = list(args)
-        else:
+        if not isinstance(args, Iterable):
             return (
                 args  # Directly return the value if it's a single non-iterable argument
             )
 
-    minimum = args[0]  # Initialize minimum with the first argument
-    for n in args:  # Loop to find minimum
+    values = iter(args)  # Consume the values lazily, generators are never copied into a list
+    for minimum in values:  # Initialize minimum with the first value
+        break
+    else:
+        raise ValueError("min() arg is an empty sequence")
+    for n in values:  # Loop to find minimum
         if n < minimum:  # If current value is smaller than minimum
             minimum = n  # Update minimum
     return minimum  # Return the smallest value found
@@ -715,12 +1311,10 @@ def all(*args):
 
     elif len(args) == 1:  # Handle single iterable input
         args = args[0]
-        if isinstance(args, Iterable):  # Convert iterable to list
-            args = list(args)
-        else:
+        if not isinstance(args, Iterable):
             return args  # Directly return value if it's a single non-iterable argument
 
-    for n in args:  # Iterate through each argument
+    for n in args:  # Iterate lazily, so a generator stops being evaluated at the first false value
         if not n:  # If any argument evaluates to False
             return False  # return False
     return True  # All elements are true
@@ -752,12 +1346,10 @@ def any(*args):
 
     elif len(args) == 1:  # Handle single iterable input
         args = args[0]
-        if isinstance(args, Iterable):  # Convert iterable to list
-            args = list(args)
-        else:
+        if not isinstance(args, Iterable):
             return args  # Directly return value if it's a single non-iterable argument
 
-    for n in args:  # Iterate through each argument
+    for n in args:  # Iterate lazily, so a generator stops being evaluated at the first true value
         if n:  # If any argument evaluates to True
             return True  # return True
     return False  # Neither element is true
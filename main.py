@@ -1,21 +1,44 @@
+import array  # For compact word counts that take 4 bytes per number
+import atexit  # For saving computed analysis results when the program ends
+import bisect  # For binary searching sorted lists (jump-to-word in the word lists)
+import codecs  # For decoding large files a chunk at a time
+import collections  # For the least recently used order of cached documents
+import contextlib  # For sending messages to stderr when writing machine-readable output
+import csv  # For machine-readable output of the subcommands
+import functools  # For caching compiled regex patterns
+import glob  # For file patterns given to the batch subcommand
+import hashlib  # For identifying files by their content in the result cache
+import heapq  # For merging sorted lists of search results and picking the most similar references
+import io  # For translating newlines of large files the way text-mode open() does
+import json  # For machine-readable output of the subcommands
+import marshal  # For saving analysis results in a compact binary format
+import mmap  # For memory-mapping large files instead of reading them in one go
+import multiprocessing  # For running user regexes in a worker that can be stopped
 import os  # Import module for terminal size detection and file operations
 
 # I heard that I can use regex for GUI stuff(?)
 import re  # Import regex module for pattern matching
+import shutil  # For copying file permissions when replacing a file and clearing the result cache
+import sys  # For measuring how much memory cached documents use
+import tempfile  # For writing replaced files safely before renaming them into place
 import tkinter as tk  # Import tkinter for GUI implementation
 from tkinter import (  # Import some tkinter components specificly
     filedialog,
     messagebox,
     ttk,
 )
+from tkinter import font as tkfont  # For measuring row heights of the word lists
+from typing import Iterator  # For type hinting generators
+import zlib  # For compressing saved analysis results
 
 import helpers  # Import custom helper functions that avoid using built-in functions
 
 try:
-    from nltk_tools import get_similarity_score  # For advance stuff
+    from nltk_tools import nearest_references, preprocess_text  # For advance stuff
     import numpy as np # For redrawing nltk graph without scikit-learn (in nltk_tools.py)
 except:
-    get_similarity_score = None  # Set get_similarity_score to None so we can check if the entirety of nltk is available later
+    nearest_references = None  # Set nearest_references to None so we can check if the entirety of nltk is available later
+    preprocess_text = None
 try:
     import matplotlib.pyplot as plt  # Import matplotlib for data visualization
     from matplotlib.backends._backend_tk import (
@@ -44,7 +67,7 @@ class config:
         window_size (str): Size of the GUI window in "widthxheight" format
         graph_max_words (int): Maximum number of words to display in graphs
         graph_figsize (list): Size of matplotlib figures [width, height]
-        analyze_max_words (int): Maximum number of words to display in analysis lists
+        analyze_max_words (int): Number of rows the word lists of the analysis show at once
         graph_bar_color_single (str): Color for bars in single file analysis
         graph_bar_color_compare1 (str): Color for bars of first file in comparison
         graph_bar_color_compare2 (str): Color for bars of second file in comparison
@@ -52,6 +75,8 @@ class config:
         graph_label_fontsize (float): Font size for graph labels
         dark_mode (bool): Whether dark mode is enabled
         text_font_size (int): Font size for text labels
+        regex_timeout (float): Seconds a regex search/replace may run before it is stopped
+        top_references (int): Number of closest reference files to show when comparing with several files
     """
 
     # Default values for CLI and GUI settings
@@ -63,14 +88,16 @@ class config:
         "window_size": "1000x700",
         "graph_max_words": 10,
         "graph_figsize": [5.0, 4.0],
-        "analyze_max_words": 5,
+        "analyze_max_words": 15,
         "graph_bar_color_single": "skyblue",
         "graph_bar_color_compare1": "skyblue",
         "graph_bar_color_compare2": "lightgreen",
         "graph_title_fontsize": 12.0,
         "graph_label_fontsize": 10.0,
         "dark_mode": False, 
-        "text_font_size": 10
+        "text_font_size": 10,
+        "regex_timeout": 5.0,
+        "top_references": 5
                     }
                 }
 
@@ -85,7 +112,7 @@ class config:
             window_size = str(config_data[2])  # GUI window size
             graph_max_words = int(config_data[3])  # Max words to display in graphs
             graph_figsize = [float(config_data[4]), float(config_data[5])]  # Figure size for graphs
-            analyze_max_words = int(config_data[6])  # Max words to show in analysis lists
+            analyze_max_words = int(config_data[6])  # Rows shown at once in the analysis word lists
             graph_bar_color_single = str(config_data[7])  # Bar color for single analysis
             graph_bar_color_compare1 = str(config_data[8])  # First file comparison bar color
             graph_bar_color_compare2 = str(config_data[9])  # Second file comparison bar color
@@ -93,6 +120,9 @@ class config:
             graph_label_fontsize = float(config_data[11])  # Font size for graph labels
             dark_mode = bool(int(config_data[12]))  # Dark mode setting (stored as 0/1)
             text_font_size = int(config_data[13])  # Font size for text labels
+            # Settings added later may be missing from older config files
+            regex_timeout = float(config_data[14]) if len(config_data) > 14 else DEFAULTS["GUI"]["regex_timeout"]  # Regex time limit
+            top_references = int(config_data[15]) if len(config_data) > 15 else DEFAULTS["GUI"]["top_references"]  # Closest reference files shown
 
     # trunk-ignore(ruff/E722)
     except:
@@ -113,14 +143,19 @@ class config:
         graph_label_fontsize = DEFAULTS["GUI"]["graph_label_fontsize"]
         dark_mode = DEFAULTS["GUI"]["dark_mode"]
         text_font_size = DEFAULTS["GUI"]["text_font_size"]
+        regex_timeout = DEFAULTS["GUI"]["regex_timeout"]
+        top_references = DEFAULTS["GUI"]["top_references"]
 
     # Write/update config file with current settings
-    with open("WAPDS.config", "w") as f:
-        f.write(f"{single_file_display_line};{compare_file_display_line};{window_size};"
-                f"{graph_max_words};{graph_figsize[0]};{graph_figsize[1]};"
-                f"{analyze_max_words};{graph_bar_color_single};"
-                f"{graph_bar_color_compare1};{graph_bar_color_compare2};"
-                f"{graph_title_fontsize};{graph_label_fontsize};{int(dark_mode)};{text_font_size}")
+    # (worker processes import this module too, only the program itself writes the file)
+    if multiprocessing.parent_process() is None:
+        with open("WAPDS.config", "w") as f:
+            f.write(f"{single_file_display_line};{compare_file_display_line};{window_size};"
+                    f"{graph_max_words};{graph_figsize[0]};{graph_figsize[1]};"
+                    f"{analyze_max_words};{graph_bar_color_single};"
+                    f"{graph_bar_color_compare1};{graph_bar_color_compare2};"
+                    f"{graph_title_fontsize};{graph_label_fontsize};{int(dark_mode)};{text_font_size};"
+                    f"{regex_timeout};{top_references}")
 
     @classmethod
     def reset_to_defaults(cls):
@@ -145,6 +180,8 @@ class config:
         cls.graph_label_fontsize = cls.DEFAULTS["GUI"]["graph_label_fontsize"]
         cls.dark_mode = cls.DEFAULTS["GUI"]["dark_mode"]
         cls.text_font_size = cls.DEFAULTS["GUI"]["text_font_size"]
+        cls.regex_timeout = cls.DEFAULTS["GUI"]["regex_timeout"]
+        cls.top_references = cls.DEFAULTS["GUI"]["top_references"]
 
     @classmethod
     def save(cls):
@@ -161,46 +198,68 @@ class config:
                     f"{cls.analyze_max_words};{cls.graph_bar_color_single};"
                     f"{cls.graph_bar_color_compare1};{cls.graph_bar_color_compare2};"
                     f"{cls.graph_title_fontsize};{cls.graph_label_fontsize};{int(cls.dark_mode)};"
-                    f"{cls.text_font_size}")
+                    f"{cls.text_font_size};{cls.regex_timeout};{cls.top_references}")
 
 
 
-def read_file(file_path:str) -> str|None:
+# Files bigger than this are memory-mapped and decoded in chunks instead of being read in one go
+MMAP_READ_SIZE = 4 * 1024 * 1024  # 4 MB
+# Longest word read_chunks() holds back for the next chunk, longer "words" (e.g. minified text) are split
+MAX_WORD_LENGTH = 64 * 1024  # 64k characters
+
+
+def check_file(file_path:str) -> bool:
     """
-    Read a text file and return its content as a string.
+    Check that a path is an existing file, printing what is wrong if it isn't.
 
     Args:
-        file_path (str): Path to the file to be read
+        file_path (str): Path to the file
 
     Returns:
-        str or None: The content of the file as a string, or None if an error occurred.
-
-    This function handles file reading with error checking for file not found
-    and other exceptions. It also warns if the file is empty.
+        bool: True if the file exists, False otherwise
     """
-    # Get list of text files in current directory for suggestions if file not found
-    txt_files = [file for file in os.listdir() if os.path.isfile(file) and file.endswith(".txt")]
-    
     # Check if file exists
     if not os.path.exists(file_path):
         print(f'\x1b[31mError: File "{file_path}" not found.\x1b[m')
-        # Suggest similar filename if available
-        if file_path+".txt" in txt_files:
+        # Suggest similar filename if available (only looked up once the file is known to be missing)
+        if os.path.isfile(file_path + ".txt"):
             print(f'\x1b[33mDid you mean "{file_path}.txt"?\x1b[m')
-        return None
+        return False
         
     # Check if path is a file (not a directory)
     if not os.path.isfile(file_path):
         print(f'\x1b[31mError: "{file_path}" is not a file.\x1b[m')
+        return False
+    return True
+
+
+def read_file(file_path:str) -> str|None:
+    """
+    Read a text file and return its content as a string.
+
+    Args:
+        file_path (str): Path to the file to be read
+
+    Returns:
+        str or None: The content of the file as a string, or None if an error occurred.
+
+    This function handles file reading with error checking for file not found
+    and other exceptions. It also warns if the file is empty. Large files are
+    memory-mapped and decoded in chunks (see read_chunks()).
+    """
+    if not check_file(file_path):
         return None
-        
+
     try:
-        # Attempt to read the file
-        with open(file_path, "r", encoding="utf-8") as file:
-            content = file.read()  # Read the entire file content
+        if os.path.getsize(file_path) > MMAP_READ_SIZE:
+            content = "".join(read_chunks(file_path))  # Never holds the whole file as bytes
+        else:
+            # Attempt to read the file
+            with open(file_path, "r", encoding="utf-8") as file:
+                content = file.read()  # Read the entire file content
         
-        # Check if file is empty
-        if not content.strip():  # Check if the file is empty
+        # Check if file is empty (searching for any non-space character doesn't copy the text)
+        if not re.search(r"\S", content):
             print(f'\x1b[33mWarning: File "{file_path}" is empty.\x1b[m')
         return content  # Return file content
     except Exception as e:  # Handle other exceptions
@@ -208,6 +267,130 @@ def read_file(file_path:str) -> str|None:
         return None  # Return None for error
 
 
+def read_chunks(file_path:str, chunk_size:int = 1024 * 1024) -> Iterator[str]:
+    """
+    Read a text file piece by piece, without loading all of it into memory.
+
+    Args:
+        file_path (str): Path to the file to be read
+        chunk_size (int): About how many bytes to decode at a time
+
+    Yields:
+        str: Consecutive pieces of the file. Every piece except the last one ends with
+             whitespace, so no word is ever split between two pieces, unless the word is
+             longer than MAX_WORD_LENGTH characters.
+
+    Raises:
+        OSError: If the file can't be opened
+        UnicodeDecodeError: If the file is not valid UTF-8
+
+    The file is memory-mapped, so the operating system pages it in as it is read,
+    and UTF-8 is decoded incrementally so characters split between chunks are fine.
+    Newlines are translated like text-mode open() does (Windows and old Mac line endings
+    become "\\n", also when one is split between chunks), so large files read the same as small ones.
+    """
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(), translate=True)
+    with open(file_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return  # Empty files can't be memory-mapped
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            carry = ""  # Start of a word that continues in the next chunk
+            for offset in range(0, len(mapped), chunk_size):
+                text = carry + decoder.decode(mapped[offset:offset + chunk_size])
+                # Hold back everything after the last whitespace, it may be half a word
+                # (the first whitespace of the reversed end of the text is the last one)
+                last_space = re.search(r"\s", text[:-MAX_WORD_LENGTH - 1:-1])
+                if last_space is None:
+                    split = len(text)  # No word is this long, give it out as is instead of holding it back
+                else:
+                    split = len(text) - last_space.start()
+                carry = text[split:]
+                if split:
+                    yield text[:split]
+            text = carry + decoder.decode(b"", final=True)
+            if text:
+                yield text
+
+
+class CharacterTable(dict):
+    """
+    Translation table for str.translate() that works out what to do with a character once.
+
+    ASCII is filled in right away, any other character is converted the first time it is
+    seen and remembered, so the lowercasing and checks per character happen only once
+    instead of for every character of every word. Deleted characters are stored as None
+    rather than "", which is what keeps str.translate() on its fast path for ASCII text.
+    """
+    def __init__(self, convert):
+        """
+        Build the table.
+
+        Args:
+            convert (callable): Function getting a character and returning what it translates to
+        """
+        super().__init__()
+        self.convert = convert
+        for code in range(128):
+            self[code] = convert(chr(code)) or None
+
+    def __missing__(self, code:int) -> str:
+        """
+        Convert a character that isn't in the table yet, and remember the result.
+
+        Args:
+            code (int): Code point of the character
+
+        Returns:
+            str or None: What the character translates to, None if it is deleted
+        """
+        self[code] = converted = self.convert(chr(code)) or None
+        return converted
+
+    def translate(self, text:str) -> str:
+        """
+        Translate a text with the table, the same as text.translate(self) but faster on long texts.
+
+        Args:
+            text (str): The text to translate
+
+        Returns:
+            str: The translated text
+
+        str.translate() only takes its fast path while the characters are ASCII, so a single
+        curly quote slows down the whole rest of a text. Long texts are translated in blocks
+        instead, and only the blocks with other characters in them take the slow path.
+        """
+        if len(text) <= TRANSLATE_BLOCK_SIZE or text.isascii():
+            return text.translate(self)
+        return "".join([text[start:start + TRANSLATE_BLOCK_SIZE].translate(self) for start in range(0, len(text), TRANSLATE_BLOCK_SIZE)])
+
+
+TRANSLATE_BLOCK_SIZE = 256  # Characters CharacterTable.translate() translates at a time
+
+
+def ascii_alphanumerical(char:str) -> bool:
+    """
+    Check if a single lowercase character is a letter or digit as alphanumerical() means it.
+
+    Args:
+        char (str): The character to check, already lowercased
+
+    Returns:
+        bool: True for a-z and 0-9, False otherwise
+    """
+    return "a" <= char <= "z" or "0" <= char <= "9"
+
+
+# Letters and digits are deleted, the rest is kept, so what is left of a text are the characters that aren't alphanumerical
+NOT_ALPHANUMERICAL_TABLE = CharacterTable(lambda char: "" if helpers.all(ascii_alphanumerical(c) for c in char.lower()) else char)
+# Lowercase letters, digits and hyphens are kept, everything else becomes a space (used by clean_text())
+CLEAN_TABLE = CharacterTable(lambda char: "".join(c if ascii_alphanumerical(c) or c == "-" else " " for c in char.lower()))
+# Lowercase letters, digits, apostrophes and hyphens are kept, everything else is deleted (used by normalize_word())
+WORD_TABLE = CharacterTable(lambda char: "".join(c for c in char.lower() if ascii_alphanumerical(c) or c == "'" or c == "-"))
+# The same, but newlines are kept to tell words apart (used by normalize_words())
+WORD_LINES_TABLE = CharacterTable(lambda char: char if char == "\n" else char.translate(WORD_TABLE))
+
+
 def clean_text(text:str|None) -> str:
     """
     Remove punctuation and convert text to lowercase.
@@ -227,16 +410,83 @@ def clean_text(text:str|None) -> str:
     if text is None:  # If input text is None, return empty string
         return ""
 
-    # Replace any character that isn"t a letter, digit, or space with a space
+    # Replace any character that isn"t a letter, digit, or hyphen with a space, all in one pass
     # This preserves word boundaries while removing punctuation
-    cleaned_text = "".join((char if "a" <= char <= "z" or "0" <= char <= "9"
-                            or char == " " or char == "-" else " ") for char in text.lower())
+    cleaned_text = CLEAN_TABLE.translate(text)
+
+    # Remove extra spaces (only spaces are left, so splitting drops all of them at once)
+    return " ".join(cleaned_text.split())  # Return cleaned and stripped text
+
+def clean_tokens(text:str) -> tuple[list[str], list[tuple[int, int],]]:
+    """
+    Split a text into the words of its cleaned text and find where every word is in the original text.
+
+    Args:
+        text (str): Original text
+
+    Returns:
+        tuple: A tuple containing two lists:
+            - The words, the same as clean_text(text).split(" ")
+            - (start, end) character offsets of every word in text
+    """
+    words = []
+    offsets = []
+    cleaned_text = CLEAN_TABLE.translate(text)
+    if len(cleaned_text) == len(text):
+        # Every character became one character, so the words are at the same offsets in both texts
+        for match in re.finditer(r"\S+", cleaned_text):
+            words.append(match.group())
+            offsets.append(match.span())
+        return words, offsets
+
+    # Some characters became several (e.g. "İ" lowercases to two), so every word is cleaned by itself
+    for match in re.finditer(r"\S+", text):
+        start, end = match.span()
+        cleaned_word = match.group().translate(CLEAN_TABLE)
+        if len(cleaned_word) == end - start:
+            for part in re.finditer(r"\S+", cleaned_word):
+                words.append(part.group())
+                offsets.append((start + part.start(), start + part.end()))
+        else:
+            for part in cleaned_word.split():
+                words.append(part)
+                offsets.append((start, end))  # Where exactly it is in the word is unknown, so the whole word is used
+    return words, offsets
+
+def read_clean(file_path:str) -> str|None:
+    """
+    Read a text file and return its cleaned content, streaming it through clean_text().
+
+    Args:
+        file_path (str): Path to the file to be read
 
-    # Remove extra spaces (replace double spaces with single until no doubles remain)
-    while "  " in cleaned_text:
-        cleaned_text = cleaned_text.replace("  ", " ")
+    Returns:
+        str or None: The same as clean_text(read_file(file_path)), or None if an error occurred.
+
+    Only one chunk of the raw text is in memory at a time, so this is the way to go
+    when the original formatting isn't needed.
+    """
+    if not check_file(file_path):
+        return None
+
+    try:
+        # Chunks end at whitespace, so cleaning them separately gives the same words
+        cleaned = []
+        empty = True  # Whether only whitespace was found so far
+        for chunk in read_chunks(file_path):
+            if empty and re.search(r"\S", chunk):
+                empty = False
+            if clean_chunk := clean_text(chunk):
+                cleaned.append(clean_chunk)
+    except Exception as e:  # Handle other exceptions
+        print(f'\x1b[31mError reading file "{file_path}": {str(e)}\x1b[m')
+        return None  # Return None for error
+
+    # Check if file is empty
+    if empty:
+        print(f'\x1b[33mWarning: File "{file_path}" is empty.\x1b[m')
+    return " ".join(cleaned)
 
-    return cleaned_text.strip()  # Return cleaned and stripped text
 
 def alphanumerical(text: str) -> bool:
     """
@@ -250,7 +500,7 @@ def alphanumerical(text: str) -> bool:
 
     This function checks if the input text contains only alphanumeric characters
     """
-    return helpers.all(("a" <= char <= "z" or "0" <= char <= "9") for char in text.lower())
+    return not text.translate(NOT_ALPHANUMERICAL_TABLE)  # Nothing left once letters and digits are deleted
 
 
 def count_words(text:str) -> tuple[list, list]:
@@ -287,59 +537,1129 @@ def count_words(text:str) -> tuple[list, list]:
             word_count[0].append(word)
             word_count[1].append(1)
 
-    return word_count  # Return the word counts
+    return word_count  # Return the word counts
+
+
+class Vocabulary:
+    """
+    Interner that gives every distinct word a small integer ID, shared by all documents.
+
+    Each word string is kept once here, so documents only need to hold the IDs.
+
+    Attributes:
+        ids (dict): Word -> ID
+        words (list): ID -> word
+    """
+
+    def __init__(self):
+        """
+        Create an empty vocabulary.
+        """
+        self.ids = {}
+        self.words = []
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def intern(self, word:str) -> int:
+        """
+        Get the ID of a word, giving it the next free ID if it hasn't got one yet.
+
+        Args:
+            word (str): The word
+
+        Returns:
+            int: The ID of the word
+        """
+        word_id = self.ids.get(word)
+        if word_id is None:
+            word_id = self.ids[word] = len(self.words)
+            self.words.append(word)
+        return word_id
+
+
+vocabulary = Vocabulary()  # The vocabulary shared by every document
+
+
+class WordCounts:
+    """
+    Compact word counts of a document: two parallel arrays of unsigned ints.
+
+    `ids` holds the vocabulary IDs of the words in increasing order and `counts` how
+    many times each of them appears. That is 8 bytes per distinct word instead of
+    two list slots plus a string and an int object, and since both documents' IDs are
+    sorted, comparing documents is a single merge through the arrays instead of
+    looking every word up in the other document.
+
+    Attributes:
+        ids (array.array): Vocabulary IDs of the words, in increasing order
+        counts (array.array): Frequency of each word
+        total (int): Sum of all frequencies
+    """
+
+    def __init__(self, ids:array.array|None = None, counts:array.array|None = None):
+        """
+        Wrap already sorted arrays.
+
+        Args:
+            ids (array.array): Vocabulary IDs in increasing order (default: empty)
+            counts (array.array): Frequency of each ID (default: empty)
+        """
+        self.ids = array.array("I") if ids is None else ids
+        self.counts = array.array("I") if counts is None else counts
+        self.total = 0
+        for count in self.counts:
+            self.total += count
+
+    @classmethod
+    def from_word_count(cls, word_count:tuple[list, list]) -> "WordCounts":
+        """
+        Convert word counts as returned by count_words().
+
+        Args:
+            word_count (tuple): A tuple of (words, frequencies)
+
+        Returns:
+            WordCounts: The same counts with the words interned in the shared vocabulary
+        """
+        pairs = [(vocabulary.intern(word), count) for word, count in zip(word_count[0], word_count[1])]
+        pairs = helpers.quick_sort(pairs)  # IDs are unique, so this sorts by ID
+        return cls(array.array("I", [word_id for word_id, _ in pairs]),
+                   array.array("I", [count for _, count in pairs]))
+
+    def to_word_count(self) -> tuple[list, list]:
+        """
+        Convert back to the (words, frequencies) format of count_words(), for the parts of the UI that use it.
+
+        Returns:
+            tuple: A tuple of (words, frequencies), ordered by vocabulary ID
+        """
+        return ([vocabulary.words[word_id] for word_id in self.ids], list(self.counts))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, word:str) -> int:
+        """
+        Get the frequency of a word with a binary search.
+
+        Args:
+            word (str): The word
+
+        Returns:
+            int: How many times the word appears, 0 if it doesn't
+        """
+        word_id = vocabulary.ids.get(word)
+        if word_id is None:
+            return 0
+        i = bisect.bisect_left(self.ids, word_id)
+        return self.counts[i] if i < len(self.ids) and self.ids[i] == word_id else 0
+
+    def common(self, other:"WordCounts") -> "WordCounts":
+        """
+        Get the words both documents have, each with the smaller of the two frequencies.
+
+        Args:
+            other (WordCounts): The other document
+
+        Returns:
+            WordCounts: The common words (their total is the frequency both texts share)
+        """
+        ids = array.array("I")
+        counts = array.array("I")
+        i = j = 0
+        while i < len(self.ids) and j < len(other.ids):
+            if self.ids[i] < other.ids[j]:
+                i += 1
+            elif self.ids[i] > other.ids[j]:
+                j += 1
+            else:
+                ids.append(self.ids[i])
+                counts.append(helpers.min(self.counts[i], other.counts[j]))
+                i += 1
+                j += 1
+        return WordCounts(ids, counts)
+
+    def merge(self, other:"WordCounts") -> "WordCounts":
+        """
+        Get the words of either document, with their frequencies added up.
+
+        Args:
+            other (WordCounts): The other document
+
+        Returns:
+            WordCounts: All words of both documents
+        """
+        ids = array.array("I")
+        counts = array.array("I")
+        i = j = 0
+        while i < len(self.ids) and j < len(other.ids):
+            if self.ids[i] < other.ids[j]:
+                ids.append(self.ids[i])
+                counts.append(self.counts[i])
+                i += 1
+            elif self.ids[i] > other.ids[j]:
+                ids.append(other.ids[j])
+                counts.append(other.counts[j])
+                j += 1
+            else:
+                ids.append(self.ids[i])
+                counts.append(self.counts[i] + other.counts[j])
+                i += 1
+                j += 1
+        # One of them is used up, the rest of the other one comes after
+        ids.extend(self.ids[i:])
+        counts.extend(self.counts[i:])
+        ids.extend(other.ids[j:])
+        counts.extend(other.counts[j:])
+        return WordCounts(ids, counts)
+
+
+class CorpusStats:
+    """
+    Statistics of a group of documents, gathered one document at a time.
+
+    Every document is added in time proportional to its number of distinct words,
+    so the statistics of any number of files take linear time in total.
+
+    Attributes:
+        documents (int): Number of documents added
+        total_words (int): Number of words in all documents together
+        frequency (dict): Vocabulary ID -> frequency in all documents together
+        document_frequency (dict): Vocabulary ID -> number of documents the word appears in
+    """
+
+    def __init__(self):
+        """
+        Create statistics of no documents.
+        """
+        self.documents = 0
+        self.total_words = 0
+        self.frequency = {}
+        self.document_frequency = {}
+
+    def __len__(self) -> int:
+        """The number of distinct words across all documents."""
+        return len(self.frequency)
+
+    def add(self, counts:WordCounts, total_words:int|None = None):
+        """
+        Add a document.
+
+        Args:
+            counts (WordCounts): Word counts of the document
+            total_words (int): Number of words in the document (default: the sum of the counts)
+        """
+        self.documents += 1
+        self.total_words += counts.total if total_words is None else total_words
+        for word_id, count in zip(counts.ids, counts.counts):
+            self.frequency[word_id] = self.frequency.get(word_id, 0) + count
+            self.document_frequency[word_id] = self.document_frequency.get(word_id, 0) + 1
+
+    def get_document_frequency(self, word:str) -> int:
+        """
+        Get the number of documents a word appears in.
+
+        Args:
+            word (str): The word
+
+        Returns:
+            int: Number of documents containing the word
+        """
+        return self.document_frequency.get(vocabulary.ids.get(word), 0)
+
+    def shared_by_all(self) -> int:
+        """
+        Count the words that appear in every document.
+
+        Returns:
+            int: Number of words whose document frequency is the number of documents
+        """
+        shared = 0
+        for documents in self.document_frequency.values():
+            if documents == self.documents:
+                shared += 1
+        return shared
+
+
+@functools.lru_cache(maxsize=32)
+def compile_pattern(pattern:str) -> re.Pattern:
+    """
+    Compile a case-insensitive regular expression, reusing it if it was compiled before.
+
+    Args:
+        pattern (str): The regular expression
+
+    Returns:
+        re.Pattern: The compiled pattern
+
+    Raises:
+        re.error: If pattern is not a valid regular expression
+    """
+    return re.compile(pattern, re.IGNORECASE)
+
+
+_worker_text = None  # Worker side: the text regex searches run on, kept until another text is searched
+
+
+def _set_text(text:str):
+    """Worker side of regex_spans(): keep the text to search, so it isn't sent again for every pattern."""
+    global _worker_text
+    _worker_text = text
+
+
+def _find_spans(pattern:str) -> list[tuple[int, int],]:
+    """Worker side of regex_spans(): the (start, end) offsets of every match of pattern in the kept text."""
+    return [match.span() for match in compile_pattern(pattern).finditer(_worker_text)]
+
+
+_regex_pool = None  # Worker process for regex searches, started on the first search
+_regex_pool_text = None  # Text the worker has, so it is only sent again when another text is searched
+
+
+def regex_spans(text:str, pattern:str, timeout:float|None = None) -> list[tuple[int, int],]:
+    """
+    Find every match of a user regular expression in a worker process that is stopped if it takes too long.
+
+    Args:
+        text (str): The text to search
+        pattern (str): The regular expression (case-insensitive)
+        timeout (float | None): Seconds the search may take, defaults to config.regex_timeout
+
+    Returns:
+        list: (start, end) character offsets of every match, in order
+
+    Raises:
+        re.error: If pattern is not a valid regular expression
+        TimeoutError: If the search took longer than the time limit
+
+    Some patterns (like "(a+)+b") can take practically forever, and a running regex
+    can't be interrupted inside the process that started it. Running it in a worker
+    process means it can be killed instead, which keeps the program responsive.
+    Only the search itself is timed: starting the worker (which imports this whole
+    module again on Windows and macOS) and sending it the text happen before that.
+    """
+    global _regex_pool, _regex_pool_text
+    compile_pattern(pattern)  # Report invalid patterns right away, without the worker
+    if timeout is None:
+        timeout = config.regex_timeout
+
+    # Keep the worker alive between searches, starting a process takes a while
+    if _regex_pool is None:
+        _regex_pool = multiprocessing.Pool(1)
+        _regex_pool_text = None
+    if text is not _regex_pool_text:
+        _regex_pool.apply(_set_text, (text,))  # Also waits until a new worker is ready
+        _regex_pool_text = text
+    try:
+        return _regex_pool.apply_async(_find_spans, (pattern,)).get(timeout)
+    except multiprocessing.TimeoutError:
+        # The worker is stuck in the pattern, kill it and start a new one next time
+        _regex_pool.terminate()
+        _regex_pool = None
+        _regex_pool_text = None
+        raise TimeoutError(f"The regular expression took longer than {timeout} seconds and was stopped.")
+
+
+def search_word_position(text:str, target_word:str, regex:bool = False) -> list[tuple[int, str],]:
+    """
+    Search for a target word or pattern in the text and return its positions.
+    
+    Args:
+        text (str): The text to search within (original text with punctuation)
+        target_word (str): The word or pattern to search for
+        regex (bool): Whether to treat target_word as a regular expression
+        
+    Returns:
+        list: A list of tuples (position, matched_text) where the target appears
+              (empty list if word not found or inputs are invalid)
+
+    Raises:
+        TimeoutError: If regex is True and the pattern took longer than config.regex_timeout
+              
+    This function finds all occurrences of the target word or pattern in the original text,
+    ignoring case but preserving the original formatting in the results.
+    """
+    # Check for empty inputs
+    if not text or not target_word:
+        return []
+    
+    results = []  # Initialize list to store results
+    
+    if regex:
+        try:
+            # Run the pattern over the whole text and map the matches back to words
+            results = WordIndex(text).search_regex(target_word)
+        except re.error:
+            # Handle invalid regex pattern
+            return []
+    else:
+        # Standard word search (case-insensitive), answered by a throwaway index of the text
+        results = WordIndex(text).search(target_word)
+
+    return results  # Return all found positions with matched text
+
+
+def normalize_word(word:str) -> str:
+    """
+    Normalize a word the way exact word search compares words.
+
+    Args:
+        word (str): A whitespace-separated word from the original text
+
+    Returns:
+        str: The word in lowercase with everything except letters, digits, apostrophes and hyphens removed
+    """
+    return word.translate(WORD_TABLE)
+
+
+def normalize_words(words:list[str]) -> list[str]:
+    """
+    Normalize many words at once, the same as normalize_word() for every word.
+
+    Args:
+        words (list): Whitespace-separated words from the original text
+
+    Returns:
+        list: The normalized words, in the same order
+
+    The words are joined with newlines (which no word contains) and translated in one go,
+    which saves a str.translate() call per word.
+    """
+    if not words:
+        return []
+    return WORD_LINES_TABLE.translate("\n".join(words)).split("\n")
+
+
+class WordIndex:
+    """
+    Positional inverted index of a document for exact word search.
+
+    The text is split into words once, and every normalized word is mapped to the list
+    of positions it appears at. Searching then only looks up the word, so the time
+    spent depends on how many times the word appears, not on the size of the text.
+
+    Attributes:
+        text (str): The indexed text (original text with punctuation)
+        offsets (list): (start, end) character offsets of every word, in the same order as text.split()
+        words (list): Normalized form of every word, in the same order as offsets
+        positions (dict): Normalized word -> list of word positions it appears at
+        starts (list | None): Start offset of every word, built when a regex search needs it
+        bk_tree (tuple | None): BK-tree of the vocabulary, built when a fuzzy search needs it
+    """
+
+    def __init__(self, text:str):
+        """
+        Build the index of a text.
+
+        Args:
+            text (str): The text to index
+        """
+        self.text = text
+        # \S+ finds the same words as str.split(), together with where they are
+        self.offsets = [match.span() for match in re.finditer(r"\S+", text)]
+        self.words = normalize_words(text.split())
+        self.positions = {}
+        self.starts = None  # Start offsets of the words, built on the first regex search
+        self.bk_tree = None  # Tree of the vocabulary, built on the first fuzzy search
+        for position, word in enumerate(self.words):
+            self.positions.setdefault(word, []).append(position)
+
+    def word(self, position:int) -> str:
+        """
+        Get the original word at a position.
+
+        Args:
+            position (int): Word position (index in text.split())
+
+        Returns:
+            str: The word as it appears in the text
+        """
+        start, end = self.offsets[position]
+        return self.text[start:end]
+
+    def search(self, target_word:str) -> list[tuple[int, str],]:
+        """
+        Find all occurrences of a word.
+
+        Args:
+            target_word (str): The word to search for, normalized like the words of the text
+                               (ignoring case and punctuation, the same as search_many())
+
+        Returns:
+            list: A list of tuples (position, matched_text) in the same format as search_word_position()
+        """
+        target = normalize_word(target_word)
+        if not target:
+            return []  # Only punctuation, which isn't a word
+        return [(position, self.word(position)) for position in self.positions.get(target, [])]
+
+    def search_fuzzy(self, target_word:str, max_distance:int = 1) -> list[tuple[int, str, str],]:
+        """
+        Find all occurrences of words that are spelled like a word, e.g. to catch deliberate misspellings.
+
+        Args:
+            target_word (str): The word to search for (normalized like the words of the text)
+            max_distance (int): The largest number of letters that may be added, removed or changed
+
+        Returns:
+            list: A list of tuples (position, matched_text, vocabulary_word) ordered by position,
+                  where vocabulary_word is the normalized word that was close enough
+
+        The distinct words of the text are put into a BK-tree once, so a search only
+        compares the target with a small part of the vocabulary instead of every word.
+        """
+        target = normalize_word(target_word)
+        if not target:
+            return []
+        if self.bk_tree is None:
+            self.bk_tree = helpers.build_bk_tree(word for word in self.positions if word)
+
+        # Every similar word already has its positions in order, merge them into one list
+        similar = helpers.bk_tree_search(self.bk_tree, target, max_distance)
+        return list(heapq.merge(*([(position, self.word(position), word) for position in self.positions[word]]
+                                  for word, _ in similar)))
+
+    def search_regex(self, pattern:str, timeout:float|None = None) -> list[tuple[int, str],]:
+        """
+        Find all matches of a regular expression and the words they cover.
+
+        Args:
+            pattern (str): The regular expression to search for (case-insensitive)
+            timeout (float | None): Seconds the search may take, defaults to config.regex_timeout
+
+        Returns:
+            list: A list of tuples (position, matched_text) where position is the first word the
+                  match touches and matched_text is every word it touches, joined with spaces
+
+        Raises:
+            re.error: If pattern is not a valid regular expression
+            TimeoutError: If the search took longer than the time limit
+
+        The pattern runs once over the whole text, so a match can span several words.
+        Several matches inside the same word are reported once, and empty matches or
+        matches of whitespace only are skipped.
+        """
+        if self.starts is None:
+            self.starts = [start for start, _ in self.offsets]  # Sorted, so matches can be binary searched
+
+        ranges = []  # [first word, last word] touched by each match
+        for start, end in regex_spans(self.text, pattern, timeout):
+            if start == end:
+                continue  # Empty matches don't touch any word
+
+            # The word the match starts in, or the next one if it starts in whitespace
+            first = bisect.bisect_right(self.starts, start) - 1
+            if first < 0 or start >= self.offsets[first][1]:
+                first += 1
+            # The word the match ends in, or the previous one if it ends in whitespace
+            last = bisect.bisect_right(self.starts, end - 1) - 1
+            if first > last:
+                continue  # Only whitespace was matched
+
+            if ranges and ranges[-1][0] == first:
+                ranges[-1][1] = helpers.max(ranges[-1][1], last)  # Another match in the same word
+            else:
+                ranges.append([first, last])
+
+        return [(first, " ".join(self.word(position) for position in range(first, last + 1))) for first, last in ranges]
+
+    def search_many(self, targets:list[str]) -> list[tuple[int, str, int],]:
+        """
+        Find all occurrences of several words or phrases in one pass over the text.
+
+        Args:
+            targets (list): The words or phrases to search for. Every word of a target is
+                            normalized like the words of the text (ignoring case and punctuation).
+
+        Returns:
+            list: A list of tuples (position, matched_text, target_index) ordered by position,
+                  where position is the position of the first word of the match
+
+        All targets are compiled into one Aho-Corasick automaton over words, so the text is
+        scanned once no matter how many targets there are.
+        """
+        # Normalize every word of every target, phrases become sequences of words
+        patterns = []
+        for target in targets:
+            pattern = [word for word in (normalize_word(part) for part in target.split()) if word]
+            patterns.append(pattern if pattern else [None])  # A target with no words can't match anything
+
+        automaton = helpers.build_aho_corasick(patterns)
+        matches_by_length = {}  # Number of words -> matches, each list is already in the order they start
+        for end, target_index in helpers.aho_corasick_search(automaton, self.words):
+            start = end - len(patterns[target_index]) + 1  # Matches are reported where they end
+            matched_text = " ".join(self.word(position) for position in range(start, end + 1))
+            matches_by_length.setdefault(len(patterns[target_index]), []).append((start, matched_text, target_index))
+
+        # Matches of longer phrases end later, so merge the lists back into the order they start
+        return list(heapq.merge(*matches_by_length.values()))
+
+
+# Rough upper limit of memory used by cached documents before the least recently used ones are dropped
+DOCUMENT_CACHE_SIZE = 256 * 1024 * 1024  # 256 MB
+
+
+class ResultCache:
+    """
+    Analysis results of files saved on disk, so they survive restarts of the program.
+
+    Results are saved per file content (SHA-256 of the file), so an unchanged file is
+    found again even if it was moved or touched. Every entry is a marshal dump of a
+    dict, compressed with zlib. When the cache gets bigger than max_size, the entries
+    used least recently are deleted.
+
+    Attributes:
+        directory (str): Directory the entries are saved in
+        max_size (int): Largest total size of the entries in bytes
+        size (int | None): Estimated total size of the entries, None until the directory is first scanned
+    """
+
+    VERSION = 1  # Change whenever the saved results would be computed differently
+
+    def __init__(self, directory:str = "WAPDS_cache", max_size:int = 64 * 1024 * 1024):
+        """
+        Create a cache (the directory is only created once something is saved).
+
+        Args:
+            directory (str): Directory the entries are saved in
+            max_size (int): Largest total size of the entries in bytes (default: 64 MB)
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.size = None  # Scanned on the first save, then only counted up until it is over max_size
+
+    def path(self, digest:str) -> str:
+        """Path of the entry of a file with the given content hash."""
+        return os.path.join(self.directory, digest + ".bin")
+
+    def load(self, digest:str) -> dict:
+        """
+        Load the saved results of a file.
+
+        Args:
+            digest (str): SHA-256 of the file content
+
+        Returns:
+            dict: Name -> result, empty if nothing (usable) was saved
+        """
+        try:
+            with open(self.path(digest), "rb") as file:
+                results = marshal.loads(zlib.decompress(file.read()))
+            os.utime(self.path(digest))  # Mark as recently used
+        # trunk-ignore(ruff/E722)
+        except:
+            # A missing, corrupted or foreign entry is the same as no entry
+            return {}
+        if not isinstance(results, dict) or results.get("version") != self.VERSION:
+            return {}
+        return results
+
+    def save(self, digest:str, results:dict):
+        """
+        Save the results of a file, replacing what was saved before.
+
+        Args:
+            digest (str): SHA-256 of the file content
+            results (dict): Name -> result, only made of types marshal supports
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            data = zlib.compress(marshal.dumps({**results, "version": self.VERSION}))
+            # Write next to the entry and rename it into place, so entries are never half written
+            temp = tempfile.NamedTemporaryFile("wb", dir=self.directory, suffix=".tmp", delete=False)
+            try:
+                with temp:
+                    temp.write(data)
+                os.replace(temp.name, self.path(digest))
+            except BaseException:
+                os.remove(temp.name)  # Don't leave the half written file behind in the cache
+                raise
+        except OSError as e:
+            print(f"\x1b[33mWarning: could not save analysis results to the cache: {str(e)}\x1b[m")
+            return
+        # The directory is only scanned once per run, and again when the entries may no longer fit
+        # (replaced entries are counted twice, so the estimate only ever errs on the big side)
+        if self.size is not None:
+            self.size += len(data)
+        if self.size is None or self.size > self.max_size:
+            self.trim()
+
+    def trim(self):
+        """Delete the least recently used entries until the cache fits in max_size."""
+        entries = []  # (last used, size, path) of every entry
+        total = 0
+        try:
+            scanned = list(os.scandir(self.directory))
+        except OSError:
+            return  # The directory was removed, nothing to trim
+        for entry in scanned:
+            if entry.name.endswith(".bin"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # Removed meanwhile, e.g. by another process trimming the cache
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        self.size = total
+        if total <= self.max_size:
+            return
+        for _, size, path in helpers.quick_sort(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Someone else removed it already
+            total -= size
+        self.size = total
+
+    def clear(self):
+        """Delete every saved result."""
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+
+
+result_cache = ResultCache()  # The on-disk result cache shared by every document
+
+
+class Document:
+    """
+    A file and everything worked out from it, each part computed the first time it is needed.
+
+    Get documents from the shared `documents` cache instead of creating them, so every tab
+    and CLI option that opens the same file reuses the work already done on it. Word counts,
+    sorted word lists and NLTK-preprocessed text are also saved in the on-disk `result_cache`,
+    so they are loaded instead of computed for files that were analyzed before.
+
+    Attributes:
+        path (str): Path to the file
+        signature (tuple): (modification time, size) of the file when it was opened
+        memory (int): Rough number of bytes used by the parts computed so far
+    """
+
+    def __init__(self, path:str, signature:tuple[int, int]):
+        """
+        Create a document without reading anything yet.
+
+        Args:
+            path (str): Path to the file
+            signature (tuple): (modification time, size) of the file
+        """
+        self.path = path
+        self.signature = signature
+        self.memory = 0
+        self._text = None  # Original text
+        self._clean = None  # Cleaned text
+        self._index = None  # Word index of the original text
+        self._counts = None  # Compact word counts
+        self._tokens = None  # Word IDs of the cleaned text and where they are in the original text
+        self._digest = None  # SHA-256 of the file content
+        self._unreadable = False  # Whether reading the file failed, so it isn't tried (and reported) again
+        self._results = None  # Results that are also saved on disk (word_count, total_words, ...)
+        self._unsaved = False  # Whether results were computed since they were last saved on disk
+
+    def _load_results(self):
+        """
+        Load the results saved on disk for this file, if that hasn't been done yet.
+        """
+        if self._results is None:
+            self._results = {}
+            if (digest := self.digest) is not None:
+                self._results = result_cache.load(digest)
+                self.memory += len(marshal.dumps(self._results))  # Roughly how big the loaded results are
+
+    def _result(self, name:str, compute):
+        """
+        Get a result that is saved on disk, loading or computing it if needed.
+
+        Args:
+            name (str): Name of the result
+            compute (callable): Computes the result, returns None if it can't
+
+        Returns:
+            The result, or None if it could not be computed
+        """
+        self._load_results()
+        if name not in self._results:
+            value = compute()
+            if value is None:
+                return None
+            self._results[name] = value
+            self.memory += len(marshal.dumps(value))
+            self._unsaved = True  # Saved together with the other results later, see save_results()
+        return self._results[name]
+
+    def save_results(self):
+        """
+        Save the results computed since the last save to the result cache, all in one entry write.
+
+        This happens when the document is dropped from the document cache and when the program ends.
+        """
+        if self._unsaved and self.digest is not None:
+            result_cache.save(self.digest, self._results)
+        self._unsaved = False
+
+    def has_result(self, name:str, load:bool = True) -> bool:
+        """
+        Check if a result is known without computing it (results saved on disk count).
+
+        Args:
+            name (str): Name of the result
+            load (bool): Whether to look in the result cache too, which reads the whole file for its digest
+
+        Returns:
+            bool: True if the result is in memory (or in the result cache)
+        """
+        if load:
+            self._load_results()
+        return self._results is not None and name in self._results
+
+    def add_results(self, results:dict, digest:str|None = None):
+        """
+        Take over results computed somewhere else, like in a worker process that already saved them on disk.
+
+        Args:
+            results (dict): Name -> result
+            digest (str or None): SHA-256 of the file content if it is known, so the file isn't read again for it
+        """
+        if digest is not None and self._digest is None:
+            self._digest = digest
+        self._load_results()
+        for name, value in results.items():
+            if name not in self._results:
+                self._results[name] = value
+                self.memory += len(marshal.dumps(value))
+
+    @property
+    def digest(self) -> str|None:
+        """SHA-256 of the file content, or None if the file could not be read."""
+        if self._digest is None:
+            try:
+                sha = hashlib.sha256()
+                with open(self.path, "rb") as file:
+                    while chunk := file.read(1024 * 1024):
+                        sha.update(chunk)
+                self._digest = sha.hexdigest()
+            except OSError:
+                return None  # Reading it for real will report the problem
+        return self._digest
+
+    @property
+    def text(self) -> str|None:
+        """The original text of the file, or None if it could not be read."""
+        if self._text is None and not self._unreadable:
+            self._text = read_file(self.path)
+            if self._text is None:
+                self._unreadable = True  # Until the file changes, which makes a new document
+            else:
+                self.memory += sys.getsizeof(self._text)
+        return self._text
+
+    @property
+    def clean(self) -> str|None:
+        """The cleaned text (see clean_text()), or None if the file could not be read."""
+        if self._clean is None and not self._unreadable:
+            # Stream the file through the cleaning if the original text isn't needed (yet)
+            self._clean = read_clean(self.path) if self._text is None else clean_text(self._text)
+            if self._clean is None:
+                self._unreadable = True
+            else:
+                self.memory += sys.getsizeof(self._clean)
+        return self._clean
+
+    @property
+    def word_count(self) -> tuple[list, list]|None:
+        """The word counts of the cleaned text (see count_words()), or None if the file could not be read."""
+        return self._result("word_count", lambda: None if self.clean is None else count_words(self.clean))
+
+    @property
+    def counts(self) -> WordCounts|None:
+        """The word counts as compact WordCounts, or None if the file could not be read."""
+        if self._counts is None and self.word_count is not None:
+            self._counts = WordCounts.from_word_count(self.word_count)
+            self.memory += (self._counts.ids.itemsize + self._counts.counts.itemsize) * len(self._counts)
+        return self._counts
+
+    @property
+    def tokens(self) -> tuple[array.array, list[tuple[int, int],]]|None:
+        """
+        The words of the cleaned text as vocabulary IDs, and their (start, end) offsets in the original text
+        (see clean_tokens()), or None if the file could not be read.
+        """
+        if self._tokens is None and self.text is not None:
+            words, offsets = clean_tokens(self._text)
+            self._tokens = (array.array("I", [vocabulary.intern(word) for word in words]), offsets)
+            self.memory += 100 * len(offsets)  # ID and offsets of every word
+        return self._tokens
+
+    @property
+    def total_words(self) -> int|None:
+        """The number of words in the cleaned text, or None if the file could not be read."""
+        # Same as len(clean.split(" ")) without splitting
+        return self._result("total_words", lambda: None if self.clean is None else self.clean.count(" ") + 1)
+
+    @property
+    def by_frequency(self) -> list[tuple[str, int],]|None:
+        """The words sorted by frequency (see sort_by_frequency()), or None if the file could not be read."""
+        return self._result("by_frequency", lambda: None if self.word_count is None else sort_by_frequency(self.word_count))
+
+    @property
+    def by_alphabet(self) -> list[tuple[str, int],]|None:
+        """The words sorted alphabetically (see sort_alphabetically()), or None if the file could not be read."""
+        return self._result("by_alphabet", lambda: None if self.word_count is None else sort_alphabetically(self.word_count))
+
+    @property
+    def preprocessed(self) -> str|None:
+        """The text preprocessed for NLTK (see nltk_tools.preprocess_text()), or None if unavailable."""
+        if preprocess_text is None:
+            return None
+        return self._result("preprocessed", lambda: None if self.text is None else preprocess_text(self.text))
+
+    @property
+    def index(self) -> WordIndex|None:
+        """The word index of the original text, or None if the file could not be read."""
+        if self._index is None and self.text is not None:
+            self._index = WordIndex(self._text)
+            self.memory += 200 * len(self._index.offsets)  # Offsets, words and positions of every word
+        return self._index
+
+
+class DocumentCache:
+    """
+    Documents of recently used files, shared by the whole program.
+
+    A document is opened again when its file's modification time or size changes, and
+    the least recently used documents are dropped when they use more than max_memory.
+
+    Attributes:
+        documents (OrderedDict): Absolute file path -> Document, least recently used first
+        max_memory (int): Rough limit of bytes the documents may use together
+    """
+
+    def __init__(self, max_memory:int = DOCUMENT_CACHE_SIZE):
+        """
+        Create an empty cache.
+
+        Args:
+            max_memory (int): Rough limit of bytes the documents may use together
+        """
+        self.documents = collections.OrderedDict()
+        self.max_memory = max_memory
+
+    def get(self, file_path:str) -> Document|None:
+        """
+        Get the document of a file, reusing the cached one if the file hasn't changed.
+
+        Args:
+            file_path (str): Path to the file
+
+        Returns:
+            Document or None: The document, or None if the file doesn't exist (the error is printed)
+        """
+        key = os.path.abspath(file_path)
+        if not check_file(file_path):
+            self.documents.pop(key, None)  # Drop the document of a file that is gone
+            return None
+        stat = os.stat(file_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        document = self.documents.get(key)
+        if document is None or document.signature != signature:
+            if document is not None:
+                document.save_results()  # Results of the old content are still worth keeping
+            document = Document(file_path, signature)  # New or changed file
+            self.documents[key] = document
+        self.documents.move_to_end(key)  # Now the most recently used
+
+        # Drop the least recently used documents while there are too many, but keep this one
+        used = 0
+        for cached in self.documents.values():
+            used += cached.memory
+        while used > self.max_memory and len(self.documents) > 1:
+            _, dropped = self.documents.popitem(last=False)
+            dropped.save_results()
+            used -= dropped.memory
+        return document
+
+    def save_results(self):
+        """Save the unsaved results of every cached document to the result cache."""
+        for document in self.documents.values():
+            document.save_results()
+
+    def clear(self):
+        """Forget every cached document."""
+        self.documents.clear()
+
+
+documents = DocumentCache()  # The document cache shared by every tab and CLI option
+atexit.register(documents.save_results)  # Results are written once per document instead of after every computation
+
+
+def get_word_index(file_path:str) -> WordIndex|None:
+    """
+    Get the word index of a file, building it only when the file is new or has changed.
+
+    Args:
+        file_path (str): Path to the file
+
+    Returns:
+        WordIndex or None: The index of the file, or None if the file could not be read
+    """
+    document = documents.get(file_path)
+    return None if document is None else document.index
+
+
+def replace_text(text:str, replacements:dict[str, str]|None = None, pattern:str|None = None, replacement_word:str = "") -> tuple[str, list[tuple[tuple[int, int], tuple[int, int]],]]:
+    """
+    Replace words or regex matches in a text, and report where every replacement is.
+
+    This is the one replace engine behind the CLI, the GUI and saving to files.
+
+    Args:
+        text (str): The text to replace words in (original text with punctuation)
+        replacements (dict | None): Word -> replacement text, where every word is normalized with
+                                    normalize_word(). Every word of the text is looked up once.
+        pattern (str | None): A regular expression to replace instead of words (case-insensitive)
+        replacement_word (str): What to replace the matches of pattern with
+
+    Returns:
+        tuple: A tuple containing two items:
+            - The modified text
+            - List of edits ((start, end) in text, (start, end) in the modified text), in order
+
+    Raises:
+        re.error: If pattern is not a valid regular expression
+        TimeoutError: If pattern took longer than config.regex_timeout
+
+    Words keep the punctuation around them (only the part from the first to the last
+    letter or digit is replaced), and everything that is not replaced, whitespace
+    included, is kept exactly as it was.
+    """
+    # Find what to replace as (start, end, replacement) in the original text
+    if pattern is not None:
+        found = [(start, end, replacement_word) for start, end in regex_spans(text, pattern)]
+    else:
+        found = []
+        words = text.split()  # The same words as \S+ finds, all normalized at once
+        spans = [match.span() for match in re.finditer(r"\S+", text)]
+        # The characters of every word that aren't alphanumeric, also found in one go (newlines are kept)
+        punctuations = NOT_ALPHANUMERICAL_TABLE.translate("\n".join(words)).split("\n") if words else []
+        # Check if every word is to be replaced (ignoring case and punctuation), with one lookup each
+        for (start, end), word, replacement, punctuation in zip(spans, words, map(replacements.get, normalize_words(words)), punctuations):
+            if replacement is None:
+                continue
+
+            # Skip leading and trailing punctuation (characters that aren't alphanumeric)
+            if punctuation:
+                stripped = word.lstrip(punctuation)
+                if stripped:  # Otherwise it's nothing but punctuation, replace all of it
+                    start += len(word) - len(stripped)
+                    end -= len(stripped) - len(stripped.rstrip(punctuation))
+            found.append((start, end, replacement))
+
+    # Build the modified text from pieces, joining them once at the end
+    modified = []  # Pieces of the modified text
+    edits = []  # Where every replacement is, before and after
+    last_end = 0  # End of the previous replacement in the original text
+    shift = 0  # How much longer the modified text is than the original up to here
+    for start, end, replacement in found:
+        # Text before the replacement is unchanged
+        modified.append(text[last_end:start])
+        modified.append(replacement)
+        edits.append(((start, end), (start + shift, start + shift + len(replacement))))
+        shift += len(replacement) - (end - start)
+        last_end = end
+    modified.append(text[last_end:])
+
+    return "".join(modified), edits
+
+
+def load_replacements(mapping_path:str) -> dict[str, str]:
+    """
+    Read a mapping file of words and what to replace them with.
+
+    Args:
+        mapping_path (str): Path to the mapping file
+
+    Returns:
+        dict: Normalized word -> replacement text, ready for replace_text()
 
+    Raises:
+        OSError: If the file can't be read
+        ValueError: If a line of the file is not a valid mapping
 
+    Every line of the file is "word = replacement". Empty lines and lines starting
+    with # are ignored, and the words are matched ignoring case and punctuation, e.g.:
 
-def search_word_position(text:str, target_word:str, regex:bool = False) -> list[tuple[int, str],]:
+        # Names to anonymize
+        Alice = Student A
+        Bob = Student B
     """
-    Search for a target word or pattern in the text and return its positions.
-    
+    replacements = {}
+    with open(mapping_path, "r", encoding="utf-8") as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue  # Skip empty lines and comments
+
+            term, separator, replacement = line.partition("=")
+            word = normalize_word(term.strip())
+            if not separator or not word:
+                raise ValueError(f'Line {line_number} of "{mapping_path}" should look like "word = replacement".')
+            if len(term.split()) > 1:
+                raise ValueError(f'Line {line_number} of "{mapping_path}": "{term.strip()}" should be a single word.')
+            replacements[word] = replacement.strip()
+    return replacements
+
+
+def stream_replace(file_path:str, replacements:dict[str, str], output_path:str|None = None) -> int:
+    """
+    Replace words in a file line by line, without loading the whole file into memory.
+
     Args:
-        text (str): The text to search within (original text with punctuation)
-        target_word (str): The word or pattern to search for
-        regex (bool): Whether to treat target_word as a regular expression
-        
+        file_path (str): Path to the file to read
+        replacements (dict): Word -> replacement text, where every word is normalized with normalize_word()
+        output_path (str | None): Where to save the result, defaults to file_path (replace in place)
+
     Returns:
-        list: A list of tuples (position, matched_text) where the target appears
-              (empty list if word not found or inputs are invalid)
-              
-    This function finds all occurrences of the target word or pattern in the original text,
-    ignoring case but preserving the original formatting in the results.
+        int: How many words were replaced
+
+    Raises:
+        OSError: If the file can't be read or the result can't be written
+        UnicodeDecodeError: If the file is not valid UTF-8
+
+    The result is written to a temporary file next to output_path, which is then renamed
+    over it. The rename is atomic, so output_path is never left half written, even if
+    something goes wrong in the middle (and it is safe to replace the input file itself).
     """
-    # Check for empty inputs
-    if not text or not target_word:
-        return []
-    
-    results = []  # Initialize list to store results
-    
-    if regex:
-        try:
-            # Use regex pattern to find matches
-            pattern = re.compile(target_word, re.IGNORECASE)
-            words = text.split()
-            
-            # Find all matches with their positions
-            for idx in range(len(words)):
-                word = words[idx]
-                if pattern.search(word):
-                    results.append((idx, word))
-        except re.error:
-            # Handle invalid regex pattern
-            return []
-    else:
-        # Standard word search (case-insensitive)
-        words = text.lower().split()
-        target_word = target_word.lower()
-        
-        # Find all exact matches with their positions
-        for idx, word in enumerate(words):
-            # Remove punctuation for comparison but keep original word
-            clean_word = "".join(c.lower() for c in word if alphanumerical(c) or c == "'" or c == "-")
-            if clean_word == target_word:
-                results.append((idx, word))
-    
-    return results  # Return all found positions with matched text
+    if output_path is None:
+        output_path = file_path
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+
+    count = 0
+    temp = tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=output_dir, suffix=".tmp", delete=False)
+    try:
+        with temp, open(file_path, "r", encoding="utf-8") as file:
+            for line in file:
+                # Words never span lines, so every line can be replaced on its own
+                modified_line, edits = replace_text(line, replacements)
+                temp.write(modified_line)
+                count += len(edits)
+
+        # Keep the permissions of the file being replaced, a new file gets the usual ones
+        # (temporary files are only readable by their owner)
+        if os.path.exists(output_path):
+            shutil.copymode(output_path, temp.name)
+        else:
+            umask = os.umask(0)  # The umask can only be read by setting it
+            os.umask(umask)
+            os.chmod(temp.name, 0o666 & ~umask)
+        os.replace(temp.name, output_path)
+    except BaseException:
+        os.remove(temp.name)  # Don't leave the half written file behind
+        raise
+    return count
 
 
 def sort_alphabetically(word_count:tuple[list, list]) -> list[tuple[str, int],]:
@@ -412,43 +1732,453 @@ def sort_by_frequency(word_count:tuple[list, list]) -> list[tuple[str, int],]:
     return result  # Return sorted pairs by frequency
 
 
-def calculate_similarity(word_count1:tuple[list, list], word_count2:tuple[list, list]) -> tuple[float, float]:
+def calculate_similarity(word_count1:WordCounts|tuple[list, list], word_count2:WordCounts|tuple[list, list]) -> tuple[float, float]:
     """
     Calculate the similarity percentage between two texts based on word frequencies.
 
     Args:
-        word_count1 (tuple): Word count data for the first text
-        word_count2 (tuple): Word count data for the second text
+        word_count1 (WordCounts or tuple): Word count data for the first text
+        word_count2 (WordCounts or tuple): Word count data for the second text
 
     Returns:
         tuple of 2 floats: Similarity percentage (0-100) of text1 and text2 respectively
 
     This function calculates the jaccard(?) similarity of both texts by equation given by teacher
     """
-    # Initialize counters
-    common_freq = 0  # Frequency of common words (minimum of both texts)
-    count1_freq = 0  # Total frequency of text 1
-    count2_freq = 0  # Total frequency of text 2
+    # Work on compact counts, so the common words are found by one merge of the sorted IDs
+    if not isinstance(word_count1, WordCounts):
+        word_count1 = WordCounts.from_word_count(word_count1)
+    if not isinstance(word_count2, WordCounts):
+        word_count2 = WordCounts.from_word_count(word_count2)
 
-    # Calculate total frequency and find common words
-    for idx1, word1 in enumerate(word_count1[0]):
-        freq1 = word_count1[1][idx1]
-        count1_freq += freq1
-        # Check if word exists in second text
-        idx2 = helpers.linear_search(word_count2[0], word1)
-        if idx2 != -1:
-            # Add minimum frequency to common count
-            common_freq += helpers.min(freq1, word_count2[1][idx2])
-
-    for freq2 in word_count2[1]:
-        count2_freq += freq2
+    common_freq = word_count1.common(word_count2).total  # Frequency of common words (minimum of both texts)
+    count1_freq = word_count1.total  # Total frequency of text 1
+    count2_freq = word_count2.total  # Total frequency of text 2
 
     # Calculate similarity percentage
     # Formula: (total common frequency) / (total frequency) * 100%
-    return ((common_freq / count1_freq) * 100 if count1_freq > 0 else 0, 
+    return ((common_freq / count1_freq) * 100 if count1_freq > 0 else 0,
             (common_freq / count2_freq) * 100 if count2_freq > 0 else 0,)
 
 
+def count_file(file_path:str) -> tuple[str, dict]|None:
+    """
+    Read, clean and count the words of a file, meant to run in a worker process.
+
+    Args:
+        file_path (str): Path to the file
+
+    Returns:
+        tuple or None: The SHA-256 of the file content and its "word_count" and "total_words" results
+                       (also saved in the result cache), or None if the file could not be read
+    """
+    document = documents.get(file_path)
+    if document is None or document.word_count is None:
+        return None
+    results = {"word_count": document.word_count, "total_words": document.total_words}
+    document.save_results()  # Worker processes end without running atexit handlers
+    return document.digest, results
+
+
+RANK_POOL_SIZE = 16 * 1024 * 1024  # 16 MB, fewest bytes of uncounted references worth counting in worker processes
+
+_count_pool = None  # Worker processes counting reference files, started the first time there is enough to count
+
+
+def close_pools():
+    """Stop the worker processes of regex searches and reference counting, if they were started."""
+    global _regex_pool, _regex_pool_text, _count_pool
+    for pool in (_regex_pool, _count_pool):
+        if pool is not None:
+            pool.terminate()
+    _regex_pool = None
+    _regex_pool_text = None  # Don't keep a text alive for a worker that is gone
+    _count_pool = None
+
+
+atexit.register(close_pools)
+
+
+def rank_references(document:Document, reference_paths:list[str], k:int|None = None) -> list[tuple[str, float],]:
+    """
+    Score a document against every reference file with the overlap coefficient, most similar first.
+
+    Args:
+        document (Document): The document to check
+        reference_paths (list): Paths to the reference files
+        k (int or None): Only return the k most similar references, or every reference if None
+
+    Returns:
+        list: (reference path, similarity percentage) for the (k most similar) references, highest similarity first
+
+    Raises:
+        OSError: If a reference file can't be read
+
+    The score of a reference is the larger of the two percentages calculate_similarity() gives,
+    which is the overlap coefficient: the shared word frequency over the smaller of the two texts.
+    References whose counts aren't in memory yet are loaded from the result cache or counted.
+    When they add up to more than RANK_POOL_SIZE bytes, that is done in parallel by worker
+    processes (started once and reused), each of them reading its files only there, otherwise
+    it happens right here, since starting workers takes longer than counting a few small files.
+    """
+    global _count_pool
+    references = []
+    for path in reference_paths:
+        reference = documents.get(path)
+        if reference is None:
+            raise OSError(f"Could not read file: {path}")
+        references.append(reference)
+
+    # Count the references that aren't counted in memory in parallel, if there is enough of them (and several CPUs)
+    pending = [reference for reference in references if not reference.has_result("word_count", load=False)]
+    pending_size = 0
+    for reference in pending:
+        pending_size += reference.signature[1]
+    if len(pending) > 1 and pending_size > RANK_POOL_SIZE and (os.cpu_count() or 1) > 1:
+        if _count_pool is None:
+            _count_pool = multiprocessing.Pool(os.cpu_count())
+        # The workers find out the digests themselves and look in the result cache, the files aren't read here
+        counted = _count_pool.map(count_file, [reference.path for reference in pending], chunksize=1)
+        for reference, result in zip(pending, counted):
+            if result is not None:
+                reference.add_results(result[1], digest=result[0])
+
+    scores = []
+    for path, reference in zip(reference_paths, references):
+        if reference.counts is None:
+            raise OSError(f"Could not read file: {path}")
+        scores.append((path, helpers.max(calculate_similarity(document.counts, reference.counts))))
+    if k is None:
+        return helpers.quick_sort(scores, key=lambda item: item[1], reverse=True)
+    # Only the k highest scores are kept and sorted, like nltk_tools.nearest_references() does
+    return heapq.nlargest(k, scores, key=lambda item: item[1])
+
+
+PASSAGE_MIN_WORDS = 8  # Fewest words in a row two texts need to share to count as a copied passage
+
+
+def find_copied_passages(document:Document, reference:Document, min_words:int = PASSAGE_MIN_WORDS) -> list[tuple[tuple[int, int], tuple[int, int], int],]:
+    """
+    Find the passages of a document that appear word for word in a reference document.
+
+    Args:
+        document (Document): The document to check
+        reference (Document): The document it may have been copied from
+        min_words (int): Fewest words a passage needs to be reported
+
+    Returns:
+        list: ((start, end) in the document's text, (start, end) in the reference's text, number of words)
+              of every passage, in the order they appear in the document
+
+    Raises:
+        OSError: If either file can't be read
+
+    Words are compared after cleaning (see clean_text()), so case and punctuation don't break a passage.
+    A suffix automaton of the reference's words is built once and the document's words are streamed
+    through it, so the time taken grows linearly with the length of the two texts. Every passage is
+    as long as it can be made, and reported once at the first place it appears in the reference.
+    """
+    for checked in (document, reference):
+        if checked.tokens is None:
+            raise OSError(f"Could not read file: {checked.path}")
+    ids, offsets = document.tokens
+    reference_ids, reference_offsets = reference.tokens
+
+    automaton = helpers.build_suffix_automaton(reference_ids)
+    passages = []
+    for start, reference_start, words in helpers.suffix_automaton_matches(automaton, ids, min_words):
+        # Turn word positions into character offsets of the first and last word of the passage
+        passages.append(((offsets[start][0], offsets[start + words - 1][1]),
+                         (reference_offsets[reference_start][0], reference_offsets[reference_start + words - 1][1]),
+                         words))
+    return passages
+
+
+DIFF_MAX_COST = 64  # Most edits the diff looks for at once before settling for a good, but not always the smallest, difference
+DIFF_CONTEXT_WORDS = 5  # Unchanged words shown around every change of a diff
+
+
+def diff_documents(document1:Document, document2:Document, context:int = DIFF_CONTEXT_WORDS,
+                   max_cost:int|None = DIFF_MAX_COST) -> list[list[tuple[str, int, int, int, int],],]:
+    """
+    Find the words that were deleted, inserted or replaced to turn one document into another.
+
+    Args:
+        document1 (Document): The original document
+        document2 (Document): The changed document
+        context (int): How many unchanged words to keep before and after every change
+        max_cost (int or None): See helpers.myers_diff(), None always finds the smallest difference
+
+    Returns:
+        list: The hunks (groups of changes close to each other), each a list of
+              (tag, start1, end1, start2, end2) word ranges like helpers.myers_diff() gives,
+              starting and ending with up to `context` unchanged words
+
+    Raises:
+        OSError: If either file can't be read
+
+    Words are compared as vocabulary IDs of the cleaned texts (see Document.tokens), so only
+    changes to the words themselves count, not to case, punctuation or spacing.
+    A negative context is the same as no context.
+    """
+    context = helpers.max(context, 0)  # A negative context would cut into the changes themselves
+    for checked in (document1, document2):
+        if checked.tokens is None:
+            raise OSError(f"Could not read file: {checked.path}")
+    opcodes = helpers.myers_diff(document1.tokens[0], document2.tokens[0], max_cost)
+
+    # Group the changes, cutting the unchanged parts between them down to the context around them
+    hunks = []
+    hunk = []
+    previous = None  # The last unchanged part, before any change
+    for index, (tag, start1, end1, start2, end2) in enumerate(opcodes):
+        if tag != "equal":
+            if not hunk and previous is not None:  # Context before the first change of a hunk
+                length = helpers.min(previous[2] - previous[1], context)
+                if length:
+                    hunk.append(("equal", previous[2] - length, previous[2], previous[4] - length, previous[4]))
+            hunk.append((tag, start1, end1, start2, end2))
+        elif hunk and (end1 - start1 > 2 * context or index == len(opcodes) - 1):
+            # Too far from the next change (or the end), so the hunk ends after the context
+            length = helpers.min(end1 - start1, context)
+            if length:
+                hunk.append(("equal", start1, start1 + length, start2, start2 + length))
+            hunks.append(hunk)
+            hunk = []
+        elif hunk:
+            hunk.append((tag, start1, end1, start2, end2))  # Close enough to the next change to keep whole
+        previous = (tag, start1, end1, start2, end2)
+    if hunk:
+        hunks.append(hunk)
+    return hunks
+
+
+def word_span(offsets:list[tuple[int, int],], start:int, end:int) -> tuple[int, int]:
+    """
+    Get where a range of words is in the original text.
+
+    Args:
+        offsets (list): (start, end) character offsets of every word (see clean_tokens())
+        start (int): Position of the first word
+        end (int): Position after the last word
+
+    Returns:
+        tuple: (start, end) character offsets covering the words, (0, 0) if the range is empty
+    """
+    if start >= end:
+        return 0, 0
+    return offsets[start][0], offsets[end - 1][1]
+
+
+def word_range(start:int, end:int) -> str:
+    """
+    Describe a range of word positions for people, counting words from 1.
+
+    Args:
+        start (int): Position of the first word
+        end (int): Position after the last word
+
+    Returns:
+        str: "first-last" (or just "first" for one word), or where the words would be
+             if the range is empty (e.g. "none, after word 3")
+    """
+    if end - start == 1:
+        return str(end)
+    if start < end:
+        return f"{start + 1}-{end}"
+    return f"none, after word {start}" if start else "none, at the start"
+
+
+class VirtualList(ttk.Frame):
+    """
+    A virtualized word list widget for showing a whole vocabulary.
+
+    Inserting every word of a large vocabulary into a tk.Listbox one by one is slow,
+    so this widget keeps the sorted (word, count) pairs in a plain Python list and only
+    puts the rows that are currently visible into its Listbox. Scrolling, filtering and
+    jumping only move a window over the in-memory list, so redrawing costs the same
+    whether the vocabulary has 50 words or 100k+ words.
+
+    Attributes:
+        items (list): The (word, count) pairs in display order
+        view (list): Indices into items that pass the current filter
+        offset (int): Position in view of the first visible row
+        rows (int): Number of rows that fit in the Listbox
+        sorted_by_word (bool): Whether items are sorted alphabetically (enables nearest-word jumps)
+    """
+
+    def __init__(self, master, sorted_by_word:bool = False, height:int = 15):
+        """
+        Create the list widget with its filter/jump bar, Listbox and scrollbar.
+
+        Args:
+            master: Parent tkinter widget
+            sorted_by_word (bool): Whether the items will be sorted alphabetically,
+                                   so jump-to-word can land on the nearest word when there is no exact match
+            height (int): Requested height of the Listbox in rows
+        """
+        super().__init__(master)
+        self.items = []  # (word, count) pairs in display order
+        self.view = []  # Indices of items that pass the filter
+        self.positions = {}  # word -> index in items, for jump-to-word
+        self.offset = 0  # Position in view of the first visible row
+        self.rows = height  # Number of visible rows, updated when the widget is resized
+        self.selected = None  # Index in items of the selected word
+        self.sorted_by_word = sorted_by_word
+
+        # Filter and jump controls
+        controls = ttk.Frame(self)
+        controls.pack(fill=tk.X)
+        ttk.Label(controls, text="Filter:").pack(side=tk.LEFT, padx=(0, 2))
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *_: self.apply_filter())  # Filter live while typing
+        ttk.Entry(controls, width=10, textvariable=self.filter_var).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Label(controls, text="Jump to:").pack(side=tk.LEFT, padx=(5, 2))
+        self.jump_entry = ttk.Entry(controls, width=10)
+        self.jump_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.jump_entry.bind("<Return>", lambda _: self.jump_to(self.jump_entry.get()))
+
+        # The Listbox only ever holds the visible rows, the scrollbar is driven by us
+        body = ttk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
+        self.scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(body, height=height, activestyle="none", exportselection=False)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # Scroll with the mouse wheel (Windows/macOS send <MouseWheel>, X11 sends buttons 4 and 5)
+        self.listbox.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1) or "break")
+        self.listbox.bind("<Button-4>", lambda _: self.scroll(-1) or "break")
+        self.listbox.bind("<Button-5>", lambda _: self.scroll(1) or "break")
+        # Keyboard navigation over the whole list, not just the visible rows
+        self.listbox.bind("<Up>", lambda _: self.scroll(-1) or "break")
+        self.listbox.bind("<Down>", lambda _: self.scroll(1) or "break")
+        self.listbox.bind("<Prior>", lambda _: self.scroll(-self.rows) or "break")
+        self.listbox.bind("<Next>", lambda _: self.scroll(self.rows) or "break")
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.listbox.bind("<Configure>", self.on_resize)
+
+    def set_items(self, items:list[tuple[str, int],]):
+        """
+        Replace the list content with a new sorted list of (word, count) pairs.
+
+        Args:
+            items (list): (word, count) pairs, already in the order they should be shown
+        """
+        self.items = items
+        self.positions = {word: idx for idx, (word, _) in enumerate(items)}  # One pass, O(1) lookups afterwards
+        self.selected = None
+        self.offset = 0
+        self.apply_filter()
+
+    def apply_filter(self):
+        """
+        Rebuild the filtered view from the filter entry and redraw from the top.
+
+        Only the index list is rebuilt here, the Listbox is still redrawn with just
+        the visible rows afterwards.
+        """
+        needle = self.filter_var.get().strip().lower()
+        if needle:
+            self.view = [idx for idx, (word, _) in enumerate(self.items) if needle in word]
+        else:
+            self.view = list(range(len(self.items)))
+        self.offset = 0
+        self.render()
+
+    def jump_to(self, word:str):
+        """
+        Scroll to a word and select it.
+
+        Args:
+            word (str): The word to jump to. If the list is alphabetical and the word is not
+                        in it, jumps to the first word that comes after it instead.
+        """
+        word = word.strip().lower()
+        if not word or not self.view:
+            return
+
+        if word in self.positions:
+            target = self.positions[word]  # Exact match
+        elif self.sorted_by_word:
+            target = bisect.bisect_left(self.items, (word,))  # Nearest word alphabetically
+        else:
+            self.listbox.bell()  # Nothing sensible to jump to
+            return
+
+        # Find the first visible (filtered) row at or after the target
+        row = bisect.bisect_left(self.view, target)
+        if row >= len(self.view):
+            row = len(self.view) - 1
+        self.selected = self.view[row]
+        self.offset = row
+        self.render()
+
+    def scroll(self, rows:int):
+        """
+        Move the visible window by a number of rows.
+
+        Args:
+            rows (int): Rows to move by (negative to scroll up)
+        """
+        self.offset += rows
+        self.render()
+
+    def on_scrollbar(self, action:str, amount:str, unit:str = ""):
+        """
+        Handle scrollbar drags and clicks.
+
+        Args:
+            action (str): "moveto" when dragging, "scroll" when clicking the arrows or trough
+            amount (str): Fraction for "moveto", number of units/pages for "scroll"
+            unit (str): "units" or "pages" for "scroll"
+        """
+        if action == "moveto":
+            self.offset = int(float(amount) * len(self.view))
+        elif action == "scroll":
+            self.offset += int(amount) * (self.rows if unit == "pages" else 1)
+        self.render()
+
+    def on_select(self, _event):
+        """Remember which item is selected so the selection survives scrolling."""
+        selection = self.listbox.curselection()
+        if selection and self.offset + selection[0] < len(self.view):
+            self.selected = self.view[self.offset + selection[0]]
+
+    def on_resize(self, event):
+        """Recalculate how many rows fit after the Listbox was resized."""
+        line_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1  # +1 for row spacing
+        rows = helpers.max(1, event.height // line_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.render()
+
+    def render(self):
+        """
+        Redraw the visible rows.
+
+        The Listbox is cleared and refilled with at most `rows` entries in a single insert
+        call, so the cost does not depend on how many words are in the list.
+        """
+        # Keep the window inside the list
+        self.offset = helpers.max(0, helpers.min(self.offset, len(self.view) - self.rows))
+
+        visible = self.view[self.offset:self.offset + self.rows]
+        self.listbox.delete(0, tk.END)
+        if visible:
+            self.listbox.insert(tk.END, *(f'{idx + 1}. "{self.items[idx][0]}": {self.items[idx][1]} times' for idx in visible))
+            if self.selected is not None:
+                row = bisect.bisect_left(visible, self.selected)  # Rows are in ascending item order
+                if row < len(visible) and visible[row] == self.selected:
+                    self.listbox.selection_set(row)
+
+        # Update the scrollbar to show where the window is in the whole list
+        if self.view:
+            self.scrollbar.set(self.offset / len(self.view), (self.offset + len(visible)) / len(self.view))
+        else:
+            self.scrollbar.set(0, 1)
+
+
 class GUI_APP:
     """
     GUI application for WAPDS.
@@ -500,6 +2230,8 @@ class GUI_APP:
 
 
 
+    SEARCH_PAGE_SIZE = 50  # Number of search results shown per page
+
     def __init__(self, root:tk.Tk, size:str):
         """
         Initialize the application with the tkinter root window.
@@ -571,6 +2303,7 @@ class GUI_APP:
         # Create tabs for various functionalities
         self.create_analyze_tab()  # Tab for analyzing single file
         self.create_compare_tab()  # Tab for comparing two files
+        self.create_diff_tab()     # Tab for showing the difference between two files
         self.create_search_tab()   # Tab for searching words in a file
         self.create_replace_tab()  # Tab for replacing words in a file
         self.create_config_tab()   # Tab for configuring settings
@@ -619,6 +2352,8 @@ class GUI_APP:
                 )
             elif widget_class == "Canvas":
                 widget.configure(background=theme[7])
+            elif widget_class == "Toplevel":
+                widget.configure(background=theme[0])
             elif widget_class == "Label":
                 widget.configure(background=theme[8], foreground=theme[1], font=("Arial", config.text_font_size))
             elif widget_class == "LabelFrame":
@@ -766,17 +2501,17 @@ class GUI_APP:
         freq_frame = ttk.LabelFrame(lists_frame, text="Most Frequent Words")
         freq_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
 
-        # Listbox to display frequent words
-        self.freq_list = tk.Listbox(freq_frame, height=15)
-        self.freq_list.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        # Virtualized list to display all words by frequency, config.analyze_max_words rows at a time
+        self.freq_list = VirtualList(freq_frame, height=config.analyze_max_words)
+        self.freq_list.pack(fill=tk.X, anchor=tk.N, padx=5, pady=5)
 
         # Alphabetical list frame
         alpha_frame = ttk.LabelFrame(lists_frame, text="Alphabetical Words")
         alpha_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
 
-        # Listbox to display words in alphabetical order
-        self.alpha_list = tk.Listbox(alpha_frame, height=15)
-        self.alpha_list.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        # Virtualized list to display all words in alphabetical order
+        self.alpha_list = VirtualList(alpha_frame, sorted_by_word=True, height=config.analyze_max_words)
+        self.alpha_list.pack(fill=tk.X, anchor=tk.N, padx=5, pady=5)
 
         # Right side - graph display
         right_frame = ttk.Frame(results_frame)
@@ -817,15 +2552,11 @@ class GUI_APP:
                 self.file2_label.config(text="Reference Files:")
                 self.file1_stats_frame.config(text="File Statistics")
                 self.file2_stats_frame.config(text="Reference Files Statistics")
-                # Change browse behavior for file 2 to allow multiple files
-                browse_btn2.config(command=self.browse_compare_file2_nltk)
             else:
                 self.file1_label.config(text="File 1:")
                 self.file2_label.config(text="File 2:")
                 self.file1_stats_frame.config(text="File 1 Statistics")
                 self.file2_stats_frame.config(text="File 2 Statistics")
-                # Change browse behavior back to single file
-                browse_btn2.config(command=self.browse_compare_file2)
             
         
         compare_tab = ttk.Frame(self.notebook)  # Create compare tab frame
@@ -880,6 +2611,12 @@ class GUI_APP:
                                 text="Compare Files",
                                 command=self.compare_files)
         compare_btn.pack(side=tk.TOP, pady=10)
+        # Button to show the passages shared word for word with the (closest) reference file
+        self.passage_paths = None  # (file, closest reference file) of the last comparison
+        passages_btn = ttk.Button(buttons_frame,
+                                  text="Show copied passages",
+                                  command=self.show_copied_passages)
+        passages_btn.pack(side=tk.LEFT, padx=5)
         # Add cosine similarity (uses nltk) checkbox
         self.compare_nltk = tk.BooleanVar(value=False)
         use_nltk = ttk.Checkbutton(buttons_frame, 
@@ -944,6 +2681,49 @@ class GUI_APP:
         self.compare_canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
             
+    def create_diff_tab(self):
+        """Create the Text Difference tab for showing which words changed between two files."""
+        diff_tab = ttk.Frame(self.notebook)
+        self.notebook.add(diff_tab, text="Text Difference")
+
+        # File selection, the original and the changed file
+        self.diff_file_entries = []
+        for label, browse in (("Original file:", self.browse_diff_file1), ("Changed file:", self.browse_diff_file2)):
+            file_frame = ttk.Frame(diff_tab)
+            file_frame.pack(fill=tk.X, pady=5)
+            ttk.Label(file_frame, text=label).pack(side=tk.LEFT, padx=5)
+            file_entry = ttk.Entry(file_frame, width=50)
+            file_entry.pack(side=tk.LEFT,
+                            padx=5,
+                            fill=tk.X,
+                            expand=True)
+            ttk.Button(file_frame,
+                       text="Browse",
+                       command=browse).pack(side=tk.LEFT, padx=5)
+            self.diff_file_entries.append(file_entry)
+
+        diff_btn = ttk.Button(diff_tab,
+                              text="Show difference",
+                              command=self.show_difference)
+        diff_btn.pack(pady=10)
+
+        # Results frame, only the changed parts with a few words around them are shown
+        results_frame = ttk.LabelFrame(diff_tab, text="Changes")
+        results_frame.pack(fill=tk.BOTH, expand=True, pady=10, padx=10)
+
+        self.diff_summary_label = ttk.Label(results_frame, text="")
+        self.diff_summary_label.pack(fill=tk.X, padx=5, pady=5)
+
+        scrollbar = ttk.Scrollbar(results_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.diff_text = tk.Text(results_frame, wrap=tk.WORD, yscrollcommand=scrollbar.set)
+        self.diff_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        scrollbar.config(command=self.diff_text.yview)
+        self.diff_text.tag_configure("deleted", background="#f4a6a6", foreground="black", overstrike=True)
+        self.diff_text.tag_configure("inserted", background="#a6e3a6", foreground="black")
+        self.diff_text.tag_configure("hunk", foreground="gray")
+        self.diff_text.config(state=tk.DISABLED)  # Make the text read-only
+
     def create_search_tab(self):
         """Create the Search tab for word searching."""
         search_tab = ttk.Frame(self.notebook)
@@ -980,6 +2760,23 @@ class GUI_APP:
                                     variable=self.regex_var)
         regex_check.pack(side=tk.LEFT, padx=5)
 
+        # Add multiple words checkbox (words or phrases separated by commas)
+        self.multi_search_var = tk.BooleanVar(value=False)
+        multi_check = ttk.Checkbutton(search_frame,
+                                    text="Multiple words (comma separated)",
+                                    variable=self.multi_search_var)
+        multi_check.pack(side=tk.LEFT, padx=5)
+
+        # Add fuzzy checkbox and how many letters may differ
+        self.fuzzy_var = tk.BooleanVar(value=False)
+        fuzzy_check = ttk.Checkbutton(search_frame,
+                                    text="Fuzzy, max distance:",
+                                    variable=self.fuzzy_var)
+        fuzzy_check.pack(side=tk.LEFT, padx=5)
+        self.fuzzy_distance_var = tk.StringVar(value="1")
+        ttk.Spinbox(search_frame, from_=1, to=5, width=3,
+                    textvariable=self.fuzzy_distance_var).pack(side=tk.LEFT)
+
         search_btn = ttk.Button(search_frame,
                                 text="Search",
                                 command=self.search_word)
@@ -989,10 +2786,37 @@ class GUI_APP:
         results_frame = ttk.LabelFrame(search_tab, text="Search Results")
         results_frame.pack(fill=tk.BOTH, expand=True, pady=10, padx=10)
 
+        # Page navigation for the results (packed first so it stays visible at the bottom)
+        page_frame = ttk.Frame(results_frame)
+        page_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=5)
+
+        ttk.Button(page_frame,
+                   text="< Previous page",
+                   command=lambda: self.show_search_page(self.search_page - 1)).pack(side=tk.LEFT, padx=5)
+        self.search_page_label = ttk.Label(page_frame, text="Page 1 of 1")
+        self.search_page_label.pack(side=tk.LEFT, padx=5)
+        ttk.Button(page_frame,
+                   text="Next page >",
+                   command=lambda: self.show_search_page(self.search_page + 1)).pack(side=tk.LEFT, padx=5)
+
+        ttk.Button(page_frame,
+                   text="Go",
+                   command=self.jump_to_occurrence).pack(side=tk.RIGHT, padx=5)
+        self.occurrence_entry = ttk.Entry(page_frame, width=8)
+        self.occurrence_entry.pack(side=tk.RIGHT, padx=5)
+        self.occurrence_entry.bind("<Return>", lambda _: self.jump_to_occurrence())
+        ttk.Label(page_frame, text="Go to occurrence:").pack(side=tk.RIGHT, padx=5)
+
         self.search_results = tk.Text(results_frame, wrap=tk.WORD)
         self.search_results.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         self.search_results.config(state=tk.DISABLED)  # Make the text read-only
 
+        # Search results state, filled in by search_word()
+        self.search_hits = []  # (position, matched word) of every occurrence
+        self.search_index = WordIndex("")  # Word index of the searched file
+        self.search_summary = ""  # Summary line shown above the results
+        self.search_page = 0  # Page currently shown
+
     def create_replace_tab(self):
         """Create the Replace tab for word replacement."""
         replace_tab = ttk.Frame(self.notebook)
@@ -1050,6 +2874,21 @@ class GUI_APP:
                                 command=self.replace_word)
         replace_btn.pack(pady=5)
 
+        # Mapping file for replacing many words at once
+        mapping_frame = ttk.Frame(replace_frame)
+        mapping_frame.pack(fill=tk.X, pady=5)
+
+        ttk.Label(mapping_frame, text="Mapping file (word = replacement per line):").pack(side=tk.LEFT, padx=5)
+        self.mapping_file_entry = ttk.Entry(mapping_frame, width=30)
+        self.mapping_file_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+
+        ttk.Button(mapping_frame,
+                   text="Browse",
+                   command=self.browse_mapping_file).pack(side=tk.LEFT, padx=5)
+        ttk.Button(mapping_frame,
+                   text="Bulk Replace",
+                   command=self.bulk_replace_words).pack(side=tk.LEFT, padx=5)
+
         # Text display frames
         text_frame = ttk.Frame(replace_tab)
         text_frame.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -1068,6 +2907,7 @@ class GUI_APP:
 
         self.modified_text = tk.Text(modified_frame, wrap=tk.WORD)
         self.modified_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.replace_result = ""  # Modified text of the last replacement, filled in by show_replace_preview()
 
         # Save button
         save_frame = ttk.Frame(replace_tab)
@@ -1141,8 +2981,8 @@ class GUI_APP:
         self.graph_max_words_entry = ttk.Entry(words_frame, width=10, textvariable=self.graph_max_words_var)
         self.graph_max_words_entry.pack(side=tk.LEFT, padx=5)
 
-        # Label and entry for max words to show in text
-        ttk.Label(words_frame, text="Max words to show in text:").pack(side=tk.LEFT, padx=5)
+        # Label and entry for how many rows of the word lists are shown at once
+        ttk.Label(words_frame, text="Word list rows:").pack(side=tk.LEFT, padx=5)
         self.analyze_max_words_var = tk.StringVar(value=str(config.analyze_max_words))  # Bind entry with current value
         self.analyze_max_words_entry = ttk.Entry(words_frame, width=10, textvariable=self.analyze_max_words_var)
         self.analyze_max_words_entry.pack(side=tk.LEFT, padx=5)
@@ -1200,6 +3040,21 @@ class GUI_APP:
         self.bar_color_compare2_var = tk.StringVar(value=str(config.graph_bar_color_compare2))  # Bind entry with current value
         ttk.Entry(colors_frame, width=10, textvariable=self.bar_color_compare2_var).pack(side=tk.LEFT, padx=2)
 
+        # Frame for search settings
+        search_settings_frame = ttk.LabelFrame(GUI_settings_frame, text="Search Settings")
+        search_settings_frame.pack(fill=tk.X, pady=10, padx=5)
+
+        # Label and entry for how long a regex may run
+        ttk.Label(search_settings_frame, text="Regex time limit (seconds):").pack(side=tk.LEFT, padx=5)
+        self.regex_timeout_var = tk.StringVar(value=str(config.regex_timeout))  # Bind entry with current value
+        self.regex_timeout_entry = ttk.Entry(search_settings_frame, width=5, textvariable=self.regex_timeout_var)
+        self.regex_timeout_entry.pack(side=tk.LEFT, padx=5)
+
+        # Label and entry for how many of the closest reference files are shown
+        ttk.Label(search_settings_frame, text="Closest reference files shown:").pack(side=tk.LEFT, padx=5)
+        self.top_references_var = tk.StringVar(value=str(config.top_references))  # Bind entry with current value
+        ttk.Entry(search_settings_frame, width=5, textvariable=self.top_references_var).pack(side=tk.LEFT, padx=5)
+
         # Buttons frame for actions
         buttons_frame = ttk.Frame(config_tab)  
         buttons_frame.pack(fill=tk.X, pady=20)
@@ -1257,18 +3112,8 @@ class GUI_APP:
 
     def browse_compare_file2(self):
         """
-        Open a file dialog to browse for the second file to compare.
-        Updates the file path entry field with the selected path.
-        """
-        if file_path := filedialog.askopenfilename(
-                filetypes=[("Text files", "*.txt"), ("All files", "*.*")]):  # Open dialog for file selection
-            self.compare_file_entry2.delete(0, tk.END)  # Clear entry
-            self.compare_file_entry2.insert(0, file_path)  # Insert selected path
-    
-    def browse_compare_file2_nltk(self):
-        """
-        Open a file dialog to browse for the a set of reference files to compare.
-        Updates the file path entry field with the selected path.
+        Open a file dialog to browse for the second file, or a set of reference files, to compare.
+        Updates the file path entry field with the selected paths.
         """
         if file_path := filedialog.askopenfilenames(
                 filetypes=[("Text files", "*.txt"), ("All files", "*.*")]):  # Open dialog for file selection
@@ -1277,6 +3122,20 @@ class GUI_APP:
                 self.compare_file_entry2.insert(tk.END, file.replace(",", ",\\")+", ")  # Insert selected path
             self.compare_file_entry2.insert(tk.END, file_path[-1].replace(",", ",\\"))
             
+    def browse_diff_file1(self):
+        """Browse for the original file to show the difference of."""
+        if file_path := filedialog.askopenfilename(
+                filetypes=[("Text files", "*.txt"), ("All files", "*.*")]):
+            self.diff_file_entries[0].delete(0, tk.END)
+            self.diff_file_entries[0].insert(0, file_path)
+
+    def browse_diff_file2(self):
+        """Browse for the changed file to show the difference of."""
+        if file_path := filedialog.askopenfilename(
+                filetypes=[("Text files", "*.txt"), ("All files", "*.*")]):
+            self.diff_file_entries[1].delete(0, tk.END)
+            self.diff_file_entries[1].insert(0, file_path)
+
     def browse_search_file(self):
         """Browse for a file to search."""
         if file_path := filedialog.askopenfilename(
@@ -1291,6 +3150,13 @@ class GUI_APP:
             self.replace_file_entry.delete(0, tk.END)
             self.replace_file_entry.insert(0, file_path)
 
+    def browse_mapping_file(self):
+        """Browse for a mapping file for bulk word replacement."""
+        if file_path := filedialog.askopenfilename(
+                filetypes=[("Text files", "*.txt"), ("All files", "*.*")]):
+            self.mapping_file_entry.delete(0, tk.END)
+            self.mapping_file_entry.insert(0, file_path)
+
 
     def analyze_file(self):
         """
@@ -1308,15 +3174,14 @@ class GUI_APP:
             messagebox.showerror("Error", "Please select a file first.")  # Show error message
             return  # Exit method if no file selected
 
-        # Read and process file
-        content = read_file(file_path)  # Read the file using a helper function
-        if content is None:  # Check if content read successfully
+        # Get the cleaned text and word counts from the shared document cache
+        document = documents.get(file_path)
+        if document is None or document.word_count is None:  # Check if content read successfully
             messagebox.showerror("Error", f"Could not read file: {file_path}")  # Show error message
             return  # Exit method on error
 
-        clean_content = clean_text(content)  # Clean the text content
-        word_count = count_words(clean_content)  # Analyze word count from the cleaned text
-        total_words = len(clean_content.split(" "))  # Count total words
+        word_count = document.word_count  # Word counts of the cleaned text
+        total_words = document.total_words  # Count total words
         unique_words = len(word_count[0])  # Count unique words
 
         # Display statistics in the statistics text area
@@ -1325,16 +3190,9 @@ class GUI_APP:
         self.stats_text.insert(tk.END, f"Total words: {total_words}\n")  # Display total words
         self.stats_text.insert(tk.END, f"Unique words: {unique_words}\n")  # Display unique words
 
-        # Display word lists in their respective listboxes
-        self.freq_list.delete(0, tk.END)  # Clear previous frequency list
-        freq_sorted = sort_by_frequency(word_count)[:config.analyze_max_words]  # Get sorted frequency list
-        for i, (word, count) in enumerate(freq_sorted):  # Iterate through sorted list
-            self.freq_list.insert(tk.END, f'{i + 1}. "{word}": {count} times')  # Insert words and counts
-
-        self.alpha_list.delete(0, tk.END)  # Clear previous alphabetical list
-        alpha_sorted = sort_alphabetically(word_count)[:config.analyze_max_words]  # Get sorted alphabetical list
-        for i, (word, count) in enumerate(alpha_sorted):  # Iterate through sorted list
-            self.alpha_list.insert(tk.END, f'{i + 1}. "{word}": {count} times')  # Insert words and counts
+        # Display the whole vocabulary in the word lists (only the visible rows are drawn)
+        self.freq_list.set_items(document.by_frequency)  # Words sorted by frequency
+        self.alpha_list.set_items(document.by_alphabet)  # Words sorted alphabetically
 
         # Create and display the frequency graph
         self.analyze_graph_cmd = f"self.create_frequency_graph({word_count}, self.analyze_canvas, self.analyze_canvas)"
@@ -1422,98 +3280,66 @@ class GUI_APP:
             messagebox.showerror("Error", "Please select both files.")  # Show error if missing
             return  # Exit method on error
 
-        # Read and process the first file
-        content1 = read_file(file_path1)  # Read first file content
-        if content1 is None:  # Check if reading was successful
+        # Get the first file from the shared document cache
+        document1 = documents.get(file_path1)
+        if document1 is None or document1.word_count is None:  # Check if reading was successful
             messagebox.showerror("Error", f"Could not read file: {file_path1}")  # Show error message
             return  # Exit method on error
-        if self.compare_nltk.get() and get_similarity_score is None:
-            self.compare_nltk.set(False)
-            file_path2 = file_path2.split(", ")[0].replace(",\\", ",")  # If NLTK is not available, use the first file only
+        if self.compare_nltk.get() and nearest_references is None:
+            self.compare_nltk.set(False)  # If NLTK is not available, all reference files are compared by word frequency instead
             print("\x1b[33mWarning: some required modules in nltk_tools module is missing, or is corrupted. Please (re)install the necesserary modules by running `python -m pip install nltk scikit-learn` in the terminal\x1b[m")  #Show error message
             messagebox.showerror("Error", "there are some errors trying to use cosine similarity (nltk), jaccard(?) similarity is used instead. Please refer to the error message in the terminal")  # Show more error message
 
+        # Several reference files are separated by ", " (commas in their names are escaped as ",\")
+        file_paths = []
+        for file in file_path2.split(", "):
+            if file:
+                file_paths.append(file.replace(",\\", ","))
+        if not file_paths:
+            messagebox.showerror("Error", "Please select both files.")
+            return
+
         # Process differently based on whether NLTK is enabled
         if self.compare_nltk.get():
             # Handle NLTK-based comparison with multiple reference files
-            file_paths = []
-            for file in file_path2.split(", "):
-                if file:
-                    file_paths.append(file.replace(",\\", ","))
-            
-            # Read all reference files
-            reference_contents = []
+            # Get all reference files, only the ones not opened before are processed
+            reference_documents = []
             reference_file_names = []
             for path in file_paths:
-                content = read_file(path)
-                if content is None:
+                document = documents.get(path)
+                if document is None or document.word_count is None:
                     messagebox.showerror("Error", f"Could not read file: {path}")
                     return
-                reference_contents.append(content)
+                reference_documents.append(document)
                 reference_file_names.append(os.path.basename(path))
             
-            # Display statistics for file 1
-            clean_content1 = clean_text(content1)
-            word_count1 = count_words(clean_content1)
-            total_words1 = len(clean_content1.split(" "))
-            unique_words1 = len(word_count1[0])
-            
-            self.file1_stats_text.delete(1.0, tk.END)
-            self.file1_stats_text.insert(tk.END, f"File: {os.path.basename(file_path1)}\n")
-            self.file1_stats_text.insert(tk.END, f"Total words: {total_words1}\n")
-            self.file1_stats_text.insert(tk.END, f"Unique words: {unique_words1}\n")
-            
-            # Display statistics for reference files
-            self.file2_stats_text.delete(1.0, tk.END)
-            self.file2_stats_text.insert(tk.END, f"Reference Files: {len(file_paths)}\n")
-            
-            total_words2 = 0
-            unique_words = []
-            
-            # Process each reference file
-            reference_word_counts = []
-            for i, content in enumerate(reference_contents):
-                clean_content = clean_text(content)
-                word_count = count_words(clean_content)
-                reference_word_counts.append(word_count)
-                
-                words = clean_content.split(" ")
-                total_words2 += len(words)
-                for word in word_count[0]:
-                    if word not in unique_words:
-                        unique_words.append(word)
-                
-                self.file2_stats_text.insert(tk.END, f"File {i+1}: {reference_file_names[i]}\n")
-            
-            self.file2_stats_text.insert(tk.END, f"Total words across all files: {total_words2}\n")
-            self.file2_stats_text.insert(tk.END, f"Unique words across all files: {len(unique_words)}\n")
+            # Display statistics for file 1 and the reference files
+            reference_counts = self.show_reference_stats(document1, file_path1, reference_documents, reference_file_names)
             
-            # Use NLTK for plagiarism detection
-            plagiarism_results = get_similarity_score(content1, reference_contents)
+            # Use NLTK for plagiarism detection, on texts that are preprocessed once per file
+            # Only the closest reference files are kept, so a large reference bank doesn't flood the results
+            reference_texts = [document.preprocessed for document in reference_documents]
+            plagiarism_results = nearest_references(document1.preprocessed, reference_texts, k=config.top_references, preprocessed=True)
             
             # Display results
             self.comparison_text.delete(1.0, tk.END)
             
-            # Prepare similarity scores for all reference files
-            similarity_scores = [0] * len(reference_contents)
+            # Similarity scores, names and word counts of the closest reference files, most similar first
+            similarity_scores = [score * 100 for _, score in plagiarism_results]  # Convert to percentage
+            reference_file_names = [reference_file_names[match_index] for match_index, _ in plagiarism_results]
+            reference_counts = [reference_counts[match_index] for match_index, _ in plagiarism_results]
             
             if plagiarism_results:
-                # Found plagiarism
-                max_similarity = helpers.max(result[1] for result in plagiarism_results)
-                similarity = max_similarity * 100  # Convert to percentage
+                # Found plagiarism, the closest reference file comes first
+                similarity = similarity_scores[0]
                 
                 self.comparison_text.insert(tk.END, f"Similarity percentage: {similarity:.2f}%\n\n")
                 
-                # List all matches
-                self.comparison_text.insert(tk.END, "Matches found in:\n")
-                for i, result in enumerate(plagiarism_results):
-                    score = result[1] * 100
-                    # Find which reference file this match corresponds to
-                    match_index = helpers.linear_search(reference_contents, result[0])
-                    file_name = reference_file_names[match_index]
-                    similarity_scores[match_index] = score  # Store score for this reference file
-                    
+                # List the closest matches
+                self.comparison_text.insert(tk.END, f"Closest {len(plagiarism_results)} of {len(reference_texts)} reference files:\n")
+                for i, (file_name, score) in enumerate(zip(reference_file_names, similarity_scores)):
                     self.comparison_text.insert(tk.END, f"Match {i+1}: {file_name} - {score:.2f}% similarity\n")
+                self.passage_paths = (file_path1, file_paths[plagiarism_results[0][0]])  # Copied passages are looked for in the closest file
             else:
                 # No plagiarism detected
                 similarity = 0
@@ -1521,40 +3347,30 @@ class GUI_APP:
                 self.comparison_text.insert(tk.END, "Similarity percentage: 0.00%\n")
             
             # Determine plagiarism level based on similarity percentage
-            if similarity > 80:
-                level = "HIGH - These texts are very similar"
-                self.comparison_text.tag_configure("color", foreground="red")
-            elif similarity > 50:
-                level = "MEDIUM - These texts have significant overlap"
-                self.comparison_text.tag_configure("color", foreground="orange")
-            elif similarity > 20:
-                level = "LOW - These texts have some common elements"
-                self.comparison_text.tag_configure("color", foreground="yellow")
-            else:
-                level = "MINIMAL - These texts are mostly different"
-                self.comparison_text.tag_configure("color", foreground="green")
-
-            self.comparison_text.insert(tk.END, f"\nPlagiarism Level: {level}", "color")
+            self.show_plagiarism_level(similarity)
             
             # Create a specialized NLTK-based comparison graph for all reference files
-            if reference_word_counts:
-                self.compare_graph_cmd = f"self.create_nltk_comparison_graph({word_count1}, {reference_word_counts}, '''{os.path.basename(file_path1)}''', {reference_file_names}, {similarity_scores}, self.compare_graph_frame, self.compare_canvas)"
+            if reference_counts:
+                # The counts are kept as arguments instead of being written out into the command
+                self.compare_graph_args = (document1.counts, reference_counts, os.path.basename(file_path1), reference_file_names, similarity_scores)
+                self.compare_graph_cmd = "self.create_nltk_comparison_graph(*self.compare_graph_args, self.compare_graph_frame, self.compare_canvas)"
                 eval(self.compare_graph_cmd)  # Draw graph for NLTK comparisons
+        elif len(file_paths) > 1:
+            # Word frequency comparison with several reference files
+            self.compare_references(document1, file_path1, file_paths)
         else:
             # Standard comparison between two files
-            content2 = read_file(file_path2)  # Read second file content
-            if content2 is None:  # Check if reading was successful
+            file_path2 = file_paths[0]  # The file name without escaped commas
+            document2 = documents.get(file_path2)  # Get the second file from the shared document cache
+            if document2 is None or document2.word_count is None:  # Check if reading was successful
                 messagebox.showerror("Error", f"Could not read file: {file_path2}")  # Show error message
                 return  # Exit method on error
 
-            clean_content1 = clean_text(content1)  # Clean content of the first file
-            clean_content2 = clean_text(content2)  # Clean content of the second file
+            word_count1 = document1.word_count  # Word counts of the first cleaned text
+            word_count2 = document2.word_count  # Word counts of the second cleaned text
             
-            word_count1 = count_words(clean_content1)  # Count words in the first cleaned text
-            word_count2 = count_words(clean_content2)  # Count words in the second cleaned text
-            
-            total_words1 = len(clean_content1.split(" "))  # Count total words in the first text
-            total_words2 = len(clean_content2.split(" "))  # Count total words in the second text
+            total_words1 = document1.total_words  # Count total words in the first text
+            total_words2 = document2.total_words  # Count total words in the second text
             
             unique_words1 = len(word_count1[0])  # Count unique words in the first text
             unique_words2 = len(word_count2[0])  # Count unique words in the second text
@@ -1572,27 +3388,14 @@ class GUI_APP:
             self.file2_stats_text.insert(tk.END, f"Unique words: {unique_words2}\n")  # Display unique words
 
             # Calculate similarity using standard method
-            similarity = calculate_similarity(word_count1, word_count2)  # Calculate similarity percentage
+            similarity = calculate_similarity(document1.counts, document2.counts)  # Calculate similarity percentage
+            self.passage_paths = (file_path1, file_path2)
 
             self.comparison_text.delete(1.0, tk.END)  # Clear previous comparison results
-            self.comparison_text.insert(tk.END, f"Similarity percentage of\ntext 1: {similarity[0]:.2f}%\ntext 2: {similarity[1]:.2f}%\n\n")  # Display similarity percentage
+            self.comparison_text.insert(tk.END, f"Similarity percentage of\ntext 1: {similarity[0]:.2f}%\ntext 2: {similarity[1]:.2f}%\n")  # Display similarity percentage
 
             # Determine plagiarism level based on similarity percentage
-            similarity = helpers.max(similarity)
-            if similarity > 80:
-                level = "HIGH - These texts are very similar"
-                self.comparison_text.tag_configure("color", foreground="red")
-            elif similarity > 50:
-                level = "MEDIUM - These texts have significant overlap"
-                self.comparison_text.tag_configure("color", foreground="orange")
-            elif similarity > 20:
-                level = "LOW - These texts have some common elements"
-                self.comparison_text.tag_configure("color", foreground="yellow")
-            else:
-                level = "MINIMAL - These texts are mostly different"
-                self.comparison_text.tag_configure("color", foreground="green")
-
-            self.comparison_text.insert(tk.END, f"Plagiarism Level: {level}", "color")  # Display plagiarism level
+            self.show_plagiarism_level(helpers.max(similarity))
             
             # Create comparison graph
             self.compare_graph_cmd = f"self.create_comparison_graph({word_count1}, {word_count2}, self.compare_graph_frame, self.compare_canvas)"
@@ -1601,6 +3404,173 @@ class GUI_APP:
 
 
 
+    def show_reference_stats(self, document1, file_path1, reference_documents, reference_file_names):
+        """
+        Show the statistics of a file and of the reference files it is compared with.
+
+        Args:
+            document1 (Document): The file being checked
+            file_path1 (str): Path to the file being checked
+            reference_documents (list): Documents of the reference files
+            reference_file_names (list): Names of the reference files, in the same order
+
+        Returns:
+            list: Word counts (WordCounts) of the reference files, in the same order
+        """
+        # Display statistics for file 1
+        self.file1_stats_text.delete(1.0, tk.END)
+        self.file1_stats_text.insert(tk.END, f"File: {os.path.basename(file_path1)}\n")
+        self.file1_stats_text.insert(tk.END, f"Total words: {document1.total_words}\n")
+        self.file1_stats_text.insert(tk.END, f"Unique words: {len(document1.word_count[0])}\n")
+
+        # Display statistics for reference files
+        self.file2_stats_text.delete(1.0, tk.END)
+        self.file2_stats_text.insert(tk.END, f"Reference Files: {len(reference_documents)}\n")
+
+        # Process each reference file, keeping only their compact word counts
+        reference_counts = []
+        reference_stats = CorpusStats()  # Vocabulary, totals and document frequencies of all reference files
+        for i, document in enumerate(reference_documents):
+            reference_counts.append(document.counts)
+            reference_stats.add(document.counts, document.total_words)
+
+            self.file2_stats_text.insert(tk.END, f"File {i+1}: {reference_file_names[i]}\n")
+
+        self.file2_stats_text.insert(tk.END, f"Total words across all files: {reference_stats.total_words}\n")
+        self.file2_stats_text.insert(tk.END, f"Unique words across all files: {len(reference_stats)}\n")
+        self.file2_stats_text.insert(tk.END, f"Words found in every file: {reference_stats.shared_by_all()}\n")
+        return reference_counts
+
+    def show_plagiarism_level(self, similarity):
+        """
+        Add the plagiarism level of a similarity percentage to the comparison results, in its colour.
+
+        Args:
+            similarity (float): The highest similarity percentage found
+        """
+        if similarity > 80:
+            level = "HIGH - These texts are very similar"
+            self.comparison_text.tag_configure("color", foreground="red")
+        elif similarity > 50:
+            level = "MEDIUM - These texts have significant overlap"
+            self.comparison_text.tag_configure("color", foreground="orange")
+        elif similarity > 20:
+            level = "LOW - These texts have some common elements"
+            self.comparison_text.tag_configure("color", foreground="yellow")
+        else:
+            level = "MINIMAL - These texts are mostly different"
+            self.comparison_text.tag_configure("color", foreground="green")
+
+        self.comparison_text.insert(tk.END, f"\nPlagiarism Level: {level}", "color")
+
+    def compare_references(self, document1, file_path1, file_paths):
+        """
+        Compare a file with several reference files by word frequency and show them ranked.
+
+        Args:
+            document1 (Document): The file being checked
+            file_path1 (str): Path to the file being checked
+            file_paths (list): Paths to the reference files
+
+        The reference files that haven't been counted before are counted in parallel
+        (see rank_references()), and the results are shown the same way as for cosine similarity:
+        only the closest config.top_references files are listed and plotted.
+        """
+        try:
+            ranking = rank_references(document1, file_paths, k=config.top_references)  # Most similar references first
+        except OSError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        # Statistics cover every reference file, the results only the closest ones
+        self.show_reference_stats(document1, file_path1, [documents.get(path) for path in file_paths],
+                                  [os.path.basename(path) for path in file_paths])
+        reference_counts = [documents.get(path).counts for path, _ in ranking]
+        reference_file_names = [os.path.basename(path) for path, _ in ranking]
+        similarity_scores = [score for _, score in ranking]
+
+        # Display the ranked results
+        similarity = similarity_scores[0]
+        self.passage_paths = (file_path1, ranking[0][0])  # Copied passages are looked for in the closest file
+        self.comparison_text.delete(1.0, tk.END)
+        self.comparison_text.insert(tk.END, f"Similarity percentage: {similarity:.2f}%\n\n")
+        self.comparison_text.insert(tk.END, f"Closest {len(ranking)} of {len(file_paths)} reference files:\n")
+        for i, (file_name, score) in enumerate(zip(reference_file_names, similarity_scores)):
+            self.comparison_text.insert(tk.END, f"Match {i+1}: {file_name} - {score:.2f}% similarity\n")
+        self.show_plagiarism_level(similarity)
+
+        # Same graph as for cosine similarity, one plot per reference file
+        self.compare_graph_args = (document1.counts, reference_counts, os.path.basename(file_path1), reference_file_names, similarity_scores)
+        self.compare_graph_cmd = "self.create_nltk_comparison_graph(*self.compare_graph_args, self.compare_graph_frame, self.compare_canvas)"
+        eval(self.compare_graph_cmd)  # Draw graph for the reference files
+
+    def show_copied_passages(self):
+        """
+        Open a window with the passages the compared file shares word for word with its (closest) reference file.
+
+        Both texts are shown side by side with the shared passages highlighted (see find_copied_passages()),
+        and selecting a passage in the list scrolls both texts to it.
+        """
+        if self.passage_paths is None:
+            messagebox.showerror("Error", "Please compare the files first.")
+            return
+        file_path, reference_path = self.passage_paths
+        document = documents.get(file_path)
+        reference = documents.get(reference_path)
+        try:
+            if document is None or reference is None:
+                raise OSError(f"Could not read file: {file_path if document is None else reference_path}")
+            passages = find_copied_passages(document, reference)
+        except OSError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title(f"Copied passages: {os.path.basename(file_path)} and {os.path.basename(reference_path)}")
+        window.geometry("1000x600")
+        ttk.Label(window, text=f"{len(passages)} passages of at least {PASSAGE_MIN_WORDS} words found in both files"
+                  ).pack(fill=tk.X, padx=10, pady=5)
+
+        panes_frame = ttk.Frame(window)
+        panes_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        # List of the passages, in the order they appear in the file
+        list_frame = ttk.LabelFrame(panes_frame, text="Passages")
+        list_frame.pack(side=tk.LEFT, fill=tk.Y, padx=5)
+        passage_list = tk.Listbox(list_frame, width=22, exportselection=False)
+        passage_list.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        passage_list.insert(tk.END, *[f"Passage {i+1}: {words} words" for i, (_, _, words) in enumerate(passages)])
+
+        # Both texts with the passages highlighted
+        text_widgets = []
+        for name, text, spans in ((os.path.basename(file_path), document.text, [span for span, _, _ in passages]),
+                                  (os.path.basename(reference_path), reference.text, [span for _, span, _ in passages])):
+            text_frame = ttk.LabelFrame(panes_frame, text=name)
+            text_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
+            scrollbar = ttk.Scrollbar(text_frame)
+            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            text_widget = tk.Text(text_frame, wrap=tk.WORD, yscrollcommand=scrollbar.set)
+            text_widget.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+            scrollbar.config(command=text_widget.yview)
+            text_widget.tag_configure("highlight", background="yellow", foreground="black")
+            text_widget.tag_configure("current", background="orange", foreground="black")
+            self.insert_highlighted(text_widget, text, spans)
+            text_widget.config(state=tk.DISABLED)  # Read-only
+            text_widgets.append(text_widget)
+
+        def show_passage(_event):
+            """Scroll both texts to the selected passage and mark it."""
+            selection = passage_list.curselection()
+            if not selection:
+                return
+            for text_widget, (start, end) in zip(text_widgets, passages[selection[0]][:2]):
+                text_widget.tag_remove("current", "1.0", tk.END)
+                text_widget.tag_add("current", f"1.0+{start}c", f"1.0+{end}c")
+                text_widget.see(f"1.0+{start}c")
+
+        passage_list.bind("<<ListboxSelect>>", show_passage)
+        self.apply_theme()
+
     def create_comparison_graph(self, word_count1, word_count2, canvas_frame_widget, canvas_widget, max_words=config.graph_max_words):
         """
         Create a comparison graph of word frequencies between two files.
@@ -1689,14 +3659,14 @@ class GUI_APP:
         toolbar.update()
         toolbar.pack(side=tk.BOTTOM, fill=tk.X)
 
-    def create_nltk_comparison_graph(self, word_count1, reference_word_counts, file1_name, reference_file_names, 
+    def create_nltk_comparison_graph(self, counts1, reference_counts, file1_name, reference_file_names, 
                                     similarity_scores, canvas_frame_widget, canvas_widget, max_words=config.graph_max_words):
         """
-        Create a specialized comparison graph for NLTK-based plagiarism detection showing all reference files.
+        Create a comparison graph showing all reference files (cosine similarity or several files by word frequency).
 
         Args:
-            word_count1 (tuple): Word count data for the first file
-            reference_word_counts (list): List of word count data for all reference files
+            counts1 (WordCounts): Word counts of the first file
+            reference_counts (list): Word counts (WordCounts) of all reference files
             file1_name (str): Name of the first file
             reference_file_names (list): Names of all reference files
             similarity_scores (list): List of similarity scores for each reference file
@@ -1717,20 +3687,18 @@ class GUI_APP:
             if widget.winfo_id() != canvas_widget.winfo_id():
                 widget.destroy()
         
-        # Get top words from the query file
-        freq_sorted1 = sort_by_frequency(word_count1)
-        top_words1 = []
-        for word, _ in freq_sorted1[:max_words]:
-            if word not in top_words1:
-                top_words1.append(word)
-
-        # Find common words across all files
+        # Gather the top words of every reference file, to know in how many of them each word is among the top
+        top_stats = CorpusStats()
+        for counts2 in reference_counts:
+            top_words2 = sort_by_frequency(counts2.to_word_count())[:max_words]
+            top_stats.add(WordCounts.from_word_count(([word for word, _ in top_words2], [count for _, count in top_words2])))
+
+        # Common words are the top words of the query file that are among the top words of any reference file,
+        # already sorted by frequency in the query file
         all_common_words = []
-        for word_count2 in reference_word_counts:
-            freq_sorted2 = sort_by_frequency(word_count2)
-            for word, _ in freq_sorted2[:max_words]:
-                if word in top_words1 and word not in all_common_words:
-                    all_common_words.append(word)
+        for word, _ in sort_by_frequency(counts1.to_word_count())[:max_words]:
+            if top_stats.get_document_frequency(word):
+                all_common_words.append(word)
         
         # If no common words found across any files
         if not all_common_words:
@@ -1752,27 +3720,22 @@ class GUI_APP:
             canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
             return
         
-        # Sort common words by frequency in the first file
-        all_common_words_sorted = helpers.quick_sort(all_common_words, 
-                                        key=lambda word: word_count1[1][helpers.linear_search(word_count1[0], word)] if word in word_count1[0] else 0,
-                                        reverse=True)
-        
         # Limit to a reasonable number of words to keep the graph readable
         # For multiple reference files, we need to be more selective
-        display_words = all_common_words_sorted[:max_words]
+        display_words = all_common_words[:max_words]
         
         # Create a figure with enough height for all reference files
-        fig_height = helpers.max(config.graph_figsize[1], 2 + len(reference_word_counts) * 0.5)
+        fig_height = helpers.max(config.graph_figsize[1], 2 + len(reference_counts) * 0.5)
         fig = plt.figure(figsize=(config.graph_figsize[0], fig_height))
         
         # Create a grid of subplots - one for each reference file
-        num_plots = len(reference_word_counts)
+        num_plots = len(reference_counts)
         
         # If there are too many reference files, limit the display
         if num_plots > 10:
             # Sort reference files by similarity score and take top 10
             indices = helpers.quick_sort(range(len(similarity_scores)), key=lambda i: similarity_scores[i], reverse=True)[:10]
-            reference_word_counts = [reference_word_counts[i] for i in indices]
+            reference_counts = [reference_counts[i] for i in indices]
             reference_file_names = [reference_file_names[i] for i in indices]
             similarity_scores = [similarity_scores[i] for i in indices]
             num_plots = 10
@@ -1782,31 +3745,20 @@ class GUI_APP:
             ax = fig.add_subplot(num_plots, 1, i+1)
             
             # Get counts for the query file and this reference file
-            counts1 = []
-            counts2 = []
+            bars1 = []
+            bars2 = []
             
             for word in display_words:
-                # Get count in the query file
-                if word in word_count1[0]:
-                    idx = helpers.linear_search(word_count1[0], word)
-                    counts1.append(word_count1[1][idx])
-                else:
-                    counts1.append(0)
-                    
-                # Get count in this reference file
-                word_count2 = reference_word_counts[i]
-                if word in word_count2[0]:
-                    idx = helpers.linear_search(word_count2[0], word)
-                    counts2.append(word_count2[1][idx])
-                else:
-                    counts2.append(0)
+                # Get count in the query file and in this reference file (0 if the word isn't there)
+                bars1.append(counts1.get(word))
+                bars2.append(reference_counts[i].get(word))
             
             # Create bar chart for common words
             x = range(len(display_words))
             width = 0.35
             
-            ax.bar([j - width/2 for j in x], counts1, width, label=file1_name, color=config.graph_bar_color_compare1)
-            ax.bar([j + width/2 for j in x], counts2, width, 
+            ax.bar([j - width/2 for j in x], bars1, width, label=file1_name, color=config.graph_bar_color_compare1)
+            ax.bar([j + width/2 for j in x], bars2, width, 
                 label=f"{reference_file_names[i]} ({similarity_scores[i]:.1f}%)", 
                 color=config.graph_bar_color_compare2)
             
@@ -1839,6 +3791,56 @@ class GUI_APP:
         toolbar.update()
         toolbar.pack(side=tk.BOTTOM, fill=tk.X)
 
+    def show_difference(self):
+        """
+        Show the words that changed between the two selected files (see diff_documents()).
+
+        Only the hunks are shown: deleted words are struck through in red and inserted words
+        are green, with a few unchanged words around them, so the amount of text put into
+        the widget depends on how much changed, not on how long the files are.
+        """
+        file_path1 = self.diff_file_entries[0].get().strip()
+        file_path2 = self.diff_file_entries[1].get().strip()
+        if not file_path1 or not file_path2:
+            messagebox.showerror("Error", "Please select both files.")
+            return
+
+        document1 = documents.get(file_path1)
+        document2 = documents.get(file_path2)
+        try:
+            if document1 is None or document2 is None:
+                raise OSError(f"Could not read file: {file_path1 if document1 is None else file_path2}")
+            hunks = diff_documents(document1, document2)
+        except OSError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        text1, offsets1 = document1.text, document1.tokens[1]
+        text2, offsets2 = document2.text, document2.tokens[1]
+        deleted = inserted = 0
+        pieces = []  # Text and tag of every piece, all inserted with one call
+        for hunk in hunks:
+            pieces += [f"@@ words {word_range(hunk[0][1], hunk[-1][2])} -> {word_range(hunk[0][3], hunk[-1][4])} @@\n", "hunk"]
+            for tag, start1, end1, start2, end2 in hunk:
+                if tag == "equal":
+                    pieces += [text1[slice(*word_span(offsets1, start1, end1))] + " ", ""]
+                    continue
+                if start1 < end1:  # Deleted or replaced words
+                    pieces += [text1[slice(*word_span(offsets1, start1, end1))], "deleted", " ", ""]
+                    deleted += end1 - start1
+                if start2 < end2:  # Inserted or replacing words
+                    pieces += [text2[slice(*word_span(offsets2, start2, end2))], "inserted", " ", ""]
+                    inserted += end2 - start2
+            pieces += ["\n\n", ""]
+
+        self.diff_summary_label.config(text=f"{len(hunks)} changed parts: {deleted} words deleted, {inserted} words inserted"
+                                            if hunks else "No difference in words")
+        self.diff_text.config(state=tk.NORMAL)
+        self.diff_text.delete(1.0, tk.END)
+        if pieces:
+            self.diff_text.insert(tk.END, *pieces)
+        self.diff_text.config(state=tk.DISABLED)
+
     def search_word(self):
         """
         Search for a word or pattern in the selected file and highlight occurrences.
@@ -1855,8 +3857,10 @@ class GUI_APP:
         file_path = self.search_file_entry.get()  # Get file path from entry
         target_word = self.search_entry.get()  # Get search word/pattern from entry
         
-        # Check if regex checkbox is selected
+        # Check if regex, multiple words or fuzzy checkbox is selected
         regex = self.regex_var.get()
+        multiple = self.multi_search_var.get()
+        fuzzy = self.fuzzy_var.get()
 
         # Validate inputs - ensure both file path and search term are provided
         if not file_path:
@@ -1867,65 +3871,159 @@ class GUI_APP:
             messagebox.showerror("Error", "Please enter a word or pattern to search for.")
             return
 
-        # Read file content
-        content = read_file(file_path)
-        if content is None:
+        if regex + multiple + fuzzy > 1:
+            messagebox.showerror("Error", "Only one of regex, multiple words and fuzzy search can be used at a time.")
+            return
+
+        if fuzzy:
+            try:
+                max_distance = int(self.fuzzy_distance_var.get())
+                if max_distance < 0:
+                    raise ValueError
+            except ValueError:
+                messagebox.showerror("Error", "Please enter a non-negative whole number as the max distance.")
+                return
+
+        # Get the word index of the file (only built again if the file changed)
+        index = get_word_index(file_path)
+        if index is None:
             messagebox.showerror("Error", f"Could not read file: {file_path}")
             return
 
-        # Find word positions in original text using the search helper function
-        positions = search_word_position(content, target_word, regex)
+        # Keep every occurrence, but only render one page of them at a time
+        self.search_index = index  # Snippets are sliced from the index per page
+
+        if multiple:
+            # Find every word/phrase in one pass over the text
+            targets = [target.strip() for target in target_word.split(",") if target.strip()]
+            matches = index.search_many(targets)
+            self.search_hits = [(pos, matched_text) for pos, matched_text, _ in matches]
+
+            # Summarize how many times each word/phrase appears
+            counts = [0] * len(targets)
+            for _, _, target_index in matches:
+                counts[target_index] += 1
+            self.search_summary = f"Found {len(matches)} matches of {len(targets)} words/phrases:\n"
+            self.search_summary += "".join(f'"{target}": {counts[i]} times\n' for i, target in enumerate(targets)) + "\n"
+            self.show_search_page(0)
+            return
+
+        if fuzzy:
+            # Find every word spelled like the target, using the vocabulary tree of the file
+            matches = index.search_fuzzy(target_word, max_distance)
+            self.search_hits = [(pos, matched_text) for pos, matched_text, _ in matches]
+
+            # Summarize how many times each similar word appears, closest words first
+            counts = {}
+            for _, _, word in matches:
+                counts[word] = counts.get(word, 0) + 1
+            target = normalize_word(target_word)
+            similar = helpers.quick_sort(list(counts.items()), key=lambda item: (helpers.levenshtein(target, item[0]), -item[1], item[0]))
+            self.search_summary = f'Found {len(matches)} occurrences of {len(similar)} words similar to "{target_word}":\n'
+            self.search_summary += "".join(f'"{word}" (distance {helpers.levenshtein(target, word)}): {count} times\n'
+                                           for word, count in similar) + "\n"
+            self.show_search_page(0)
+            return
 
-        # Clear previous results and prepare text widget for new content
-        self.search_results.config(state=tk.NORMAL)  # Make the text updatable
-        self.search_results.delete(1.0, tk.END)
+        # Find word positions in original text, exact words are answered straight from the index
+        if regex:
+            try:
+                positions = index.search_regex(target_word)
+            except re.error:
+                positions = []  # Invalid patterns are reported as not found
+            except TimeoutError as e:
+                messagebox.showerror("Error", str(e))
+                return
+        else:
+            positions = index.search(target_word)
 
+        match_text = "pattern" if regex else "word"
+        self.search_hits = positions
         if positions:
             # Display summary of occurrences at the top of results
-            match_text = "pattern" if regex else "word"
-            self.search_results.insert(
-                tk.END,
-                f'The {match_text} "{target_word}" appears {len(positions)} times\n\n'
-            )
-
-            # Configure tag for highlighting the target word with yellow background
-            self.search_results.tag_configure("highlight", background="yellow", foreground="black")
-
-            # Show each occurrence in context with surrounding words
-            words = content.split()
-            for pos, matched_word in positions:
-                # Get a window of words around the occurrence (3 words before, 3 words after)
-                start = helpers.max(0, pos - 3)  # Ensure we don"t go below index 0
-                end = helpers.min(len(words), pos + 4)  # Ensure we don"t exceed array bounds
-
-                # Create context with ellipses if needed to show this is a snippet
-                prefix = "... " if pos > 3 else ""  # Add ellipsis if we"re not at the beginning
-                suffix = " ..." if pos + 4 < len(words) else ""  # Add ellipsis if we"re not at the end
-
-                # Insert position number and prefix
-                self.search_results.insert(tk.END, f"Position {pos}: {prefix}")
-
-                # Insert words before target with normal formatting
-                if start < pos:
-                    self.search_results.insert(tk.END, " ".join(words[start:pos]) + " ")
-
-                # Insert target word with highlighting (yellow background)
-                self.search_results.insert(tk.END, matched_word, "highlight")
-
-                # Insert words after target with normal formatting
-                if pos + 1 < end:
-                    self.search_results.insert(tk.END, " " + " ".join(words[pos+1:end]))
-
-                # Add suffix and newline for readability
-                self.search_results.insert(tk.END, f"{suffix}\n")
+            self.search_summary = f'The {match_text} "{target_word}" appears {len(positions)} times\n\n'
         else:
             # No matches found - inform the user
-            match_text = "pattern" if regex else "word"
-            self.search_results.insert(tk.END, f'The {match_text} "{target_word}" was not found in the file.')
-        
+            self.search_summary = f'The {match_text} "{target_word}" was not found in the file.'
+        self.show_search_page(0)
+
+    def show_search_page(self, page:int, current:int|None = None):
+        """
+        Render one page of search results.
+
+        Args:
+            page (int): The page to show (clamped to the available pages)
+            current (int | None): Index of an occurrence on this page to mark and scroll to
+
+        Only the context snippets of the occurrences on this page are built and inserted,
+        so rendering takes the same time whether the word appears 10 or 100000 times.
+        """
+        total_pages = helpers.max(1, (len(self.search_hits) + self.SEARCH_PAGE_SIZE - 1) // self.SEARCH_PAGE_SIZE)
+        page = helpers.max(0, helpers.min(page, total_pages - 1))  # Stay within the available pages
+        self.search_page = page
+        self.search_page_label.config(text=f"Page {page + 1} of {total_pages}")
+
+        # Build the whole page as one string, remembering where the matched words are
+        index = self.search_index
+        pieces = [self.search_summary]
+        length = len(self.search_summary)
+        spans = []
+        first = page * self.SEARCH_PAGE_SIZE
+        for number, (pos, matched) in enumerate(self.search_hits[first:first + self.SEARCH_PAGE_SIZE], start=first + 1):
+            last = pos + helpers.max(1, len(matched.split())) - 1  # Phrase matches cover several words
+
+            # Get a window of words around the occurrence (3 words before, 3 words after)
+            start = helpers.max(0, pos - 3)  # Ensure we don't go below index 0
+            end = helpers.min(len(index.offsets), last + 4)  # Ensure we don't exceed array bounds
+
+            # Create context with ellipses if needed to show this is a snippet
+            prefix = "... " if pos > 3 else ""  # Add ellipsis if we're not at the beginning
+            suffix = " ..." if last + 4 < len(index.offsets) else ""  # Add ellipsis if we're not at the end
+
+            # Words before the target, the target itself (highlighted), then words after
+            word = " ".join(index.word(i) for i in range(pos, last + 1))
+            before = f"{number}. Position {pos}: {prefix}" + "".join(index.word(i) + " " for i in range(start, pos))
+            after = "".join(" " + index.word(i) for i in range(last + 1, end)) + f"{suffix}\n"
+            spans.append((length + len(before), length + len(before) + len(word)))
+            pieces.append(before + word + after)
+            length += len(before) + len(word) + len(after)
+
+        # Clear previous results and insert the page with one call
+        self.search_results.config(state=tk.NORMAL)  # Make the text updatable
+        self.search_results.delete(1.0, tk.END)
+        self.search_results.tag_configure("highlight", background="yellow", foreground="black")
+        self.search_results.tag_configure("current", background="lightblue", foreground="black")
+        self.insert_highlighted(self.search_results, "".join(pieces), spans)
+
+        # Mark the occurrence the user jumped to
+        if current is not None:
+            line = self.search_summary.count("\n") + current - first + 1  # Result lines start after the summary
+            self.search_results.tag_add("current", f"{line}.0", f"{line}.end")
+            self.search_results.tag_raise("highlight")  # Keep the word highlight on top of the line highlight
+            self.search_results.see(f"{line}.0")
+
         # Make the text read-only again to prevent user edits
         self.search_results.config(state=tk.DISABLED)
 
+    def jump_to_occurrence(self):
+        """
+        Show the page containing the occurrence number typed in the occurrence entry.
+
+        Occurrences are numbered from 1 in the order they appear in the file.
+        """
+        if not self.search_hits:
+            messagebox.showerror("Error", "There are no occurrences to go to.")
+            return
+        try:
+            number = int(self.occurrence_entry.get())
+        except ValueError:
+            messagebox.showerror("Error", "Please enter the number of an occurrence.")
+            return
+        if not 1 <= number <= len(self.search_hits):
+            messagebox.showerror("Error", f"Please enter a number between 1 and {len(self.search_hits)}.")
+            return
+        self.show_search_page((number - 1) // self.SEARCH_PAGE_SIZE, number - 1)
+
     def replace_word(self):
         """
         Replace occurrences of a word or pattern in the selected file.
@@ -1957,12 +4055,76 @@ class GUI_APP:
             messagebox.showerror("Error", "Please enter a word or pattern to replace.")
             return
 
-        # Read file content using the helper function
-        content = read_file(file_path)
+        # Read file content through the shared document cache
+        document = documents.get(file_path)
+        content = None if document is None else document.text
+        if content is None:
+            messagebox.showerror("Error", f"Could not read file: {file_path}")
+            return
+
+        # Replace everything in one go, keeping where the replacements are
+        try:
+            if regex:
+                modified, edits = replace_text(content, pattern=target_word, replacement_word=replacement_word)
+            else:
+                modified, edits = replace_text(content, {target_word.lower(): replacement_word})
+        except re.error:
+            # Handle invalid regex pattern error
+            messagebox.showerror("Error", "Invalid regular expression pattern.")
+            return
+        except TimeoutError as e:
+            # The pattern was too slow and got stopped
+            messagebox.showerror("Error", str(e))
+            return
+
+        self.show_replace_preview(content, modified, edits)
+
+    def bulk_replace_words(self):
+        """
+        Replace every word listed in the mapping file in the selected file, in one pass.
+
+        The mapping file has one "word = replacement" per line (see load_replacements()),
+        and the result is shown the same way as a single word replacement.
+        """
+        file_path = self.replace_file_entry.get()  # Path to the file
+        mapping_path = self.mapping_file_entry.get()  # Path to the mapping file
+
+        # Validate inputs - ensure both files are provided
+        if not file_path:
+            messagebox.showerror("Error", "Please select a file first.")
+            return
+
+        if not mapping_path:
+            messagebox.showerror("Error", "Please select a mapping file.")
+            return
+
+        # Read the words to replace
+        try:
+            replacements = load_replacements(mapping_path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Could not read mapping file: {str(e)}")
+            return
+
+        # Read file content through the shared document cache
+        document = documents.get(file_path)
+        content = None if document is None else document.text
         if content is None:
             messagebox.showerror("Error", f"Could not read file: {file_path}")
             return
 
+        self.show_replace_preview(content, *replace_text(content, replacements))
+
+    def show_replace_preview(self, original:str, modified:str, edits:list[tuple[tuple[int, int], tuple[int, int]],]):
+        """
+        Show the original and modified text of a replacement with the replaced parts highlighted.
+
+        Args:
+            original (str): The original text
+            modified (str): The modified text, which is also what gets saved
+            edits (list): Where the replacements are, as returned by replace_text()
+        """
+        self.replace_result = modified  # Saved as is, without reading it back from the widget
+
         # Prepare text widgets for displaying content
         self.original_text.config(state=tk.NORMAL)  # Make the original text updatable
         
@@ -1974,129 +4136,57 @@ class GUI_APP:
         self.modified_text.delete(1.0, tk.END)
         self.original_text.delete(1.0, tk.END)
 
-        # Perform replacement based on whether regex is enabled
-        if regex:
-            try:
-                # For regex pattern matching, use re.finditer to find all matches
-                matches = list(re.finditer(target_word, content, flags=re.IGNORECASE))
-                
-                if matches:
-                    # Track position of last match to continue from
-                    last_end = 0
-                    for match in matches:
-                        # Insert text before the match (unchanged)
-                        self.original_text.insert(tk.END, content[last_end:match.start()])
-                        self.modified_text.insert(tk.END, content[last_end:match.start()])
-                        
-                        # Insert original text with highlighting in original view
-                        self.original_text.insert(tk.END, content[match.start():match.end()], "highlight")
-                        # Insert replacement with highlighting in modified view
-                        self.modified_text.insert(tk.END, replacement_word, "highlight")
-                        
-                        # Update position tracker
-                        last_end = match.end()
-                    
-                    # Insert remaining text after the last match
-                    self.original_text.insert(tk.END, content[last_end:])
-                    self.modified_text.insert(tk.END, content[last_end:])
-                else:
-                    # No matches found, just display the original content in both views
-                    self.original_text.insert(tk.END, content)
-                    self.modified_text.insert(tk.END, content)
-            except re.error:
-                # Handle invalid regex pattern error
-                messagebox.showerror("Error", "Invalid regular expression pattern.")
-                return
-        else:
-            # For exact word matching, process line by line to preserve formatting
-            # Split content by lines to preserve newlines
-            lines = content.split("\n")
-            
-            # Process each line separately
-            for i, line in enumerate(lines):
-                # Handle empty lines
-                if not line.strip():  # Preserve empty lines
-                    if i > 0:  # Don"t add newline before the first line
-                        self.original_text.insert(tk.END, "\n")
-                        self.modified_text.insert(tk.END, "\n")
-                    continue
-                    
-                # Split line into words for processing
-                words = line.split()
-                
-                # Handle lines with only whitespace
-                if not words:  # Empty line with whitespace
-                    if i > 0:
-                        self.original_text.insert(tk.END, "\n")
-                        self.modified_text.insert(tk.END, "\n")
-                    continue
-                    
-                # Find all occurrences of the target word in this line
-                positions = []
-                for idx, word in enumerate(words):
-                    # Check if this word matches our target (ignoring case and punctuation)
-                    clean_word = "".join(c.lower() for c in word if alphanumerical(c) or c == "'" or c == "-")
-                    if clean_word == target_word.lower():
-                        positions.append(idx)
-                
-                # Add a newline before this line if it's not the first line
-                if i > 0:
-                    self.original_text.insert(tk.END, "\n")
-                    self.modified_text.insert(tk.END, "\n")
-                    
-                if positions:
-                    # Process the line with replacements
-                    current_pos = 0
-                    for pos in positions:
-                        # Add text up to this position (unchanged)
-                        if pos > current_pos:
-                            self.original_text.insert(tk.END, " ".join(words[current_pos:pos]) + " ")
-                            self.modified_text.insert(tk.END, " ".join(words[current_pos:pos]) + " ")
-                        
-                        # Get the original word
-                        original_word = words[pos]
-                        
-                        # Extract leading and trailing punctuation to preserve in replacement
-                        leading_punct = ""
-                        trailing_punct = ""
-                        
-                        # Extract leading punctuation (characters at start that aren"t alphanumeric)
-                        i = 0
-                        while i < len(original_word) and not alphanumerical(original_word[i]):
-                            leading_punct += original_word[i]
-                            i += 1
-                        
-                        # Extract trailing punctuation (characters at end that aren"t alphanumeric)
-                        i = len(original_word) - 1
-                        while i >= 0 and not alphanumerical(original_word[i]):
-                            trailing_punct = original_word[i] + trailing_punct
-                            i -= 1
-                        
-                        # Insert the original and replacement with highlighting
-                        self.original_text.insert(tk.END, original_word, "highlight")
-                        # Preserve punctuation in the replacement
-                        self.modified_text.insert(tk.END, leading_punct + replacement_word + trailing_punct, "highlight")
-                        
-                        # Add a space if this isn"t the last word
-                        if pos < len(words) - 1:
-                            self.original_text.insert(tk.END, " ")
-                            self.modified_text.insert(tk.END, " ")
-                        
-                        # Update position tracker
-                        current_pos = pos + 1
-                    
-                    # Add any remaining text in the line
-                    if current_pos < len(words):
-                        self.original_text.insert(tk.END, " ".join(words[current_pos:]))
-                        self.modified_text.insert(tk.END, " ".join(words[current_pos:]))
-                else:
-                    # No replacements in this line, keep it as is
-                    self.original_text.insert(tk.END, line)
-                    self.modified_text.insert(tk.END, line)
-        
+        # Insert each text once and highlight all replacements in bulk
+        self.insert_highlighted(self.original_text, original, [original_span for original_span, _ in edits])
+        self.insert_highlighted(self.modified_text, modified, [modified_span for _, modified_span in edits])
+        self.modified_text.edit_modified(False)  # Only edits made by the user from now on count
+
         # Make the original text read-only to prevent user edits
         self.original_text.config(state=tk.DISABLED)
 
+    @staticmethod
+    def insert_highlighted(text_widget:tk.Text, text:str, spans:list[tuple[int, int],], tag:str = "highlight"):
+        """
+        Insert a text into a Text widget with a single call and tag many parts of it at once.
+
+        Args:
+            text_widget (tk.Text): The widget to insert into (at the end)
+            text (str): The text to insert
+            spans (list): (start, end) character offsets in text to tag
+            tag (str): Name of the tag to apply
+
+        Offsets are turned into "line.column" indices in Python (Tk would otherwise count
+        characters from the start of the widget for every single "+Nc" index), and all of
+        them are passed to one tag_add call, so the number of Tk calls stays the same no
+        matter how many highlights there are.
+        """
+        base_line = int(text_widget.index("end-1c").split(".")[0])  # Line the text is inserted on
+        base_column = int(text_widget.index("end-1c").split(".")[1])  # Column the text starts at on that line
+        text_widget.insert(tk.END, text)
+        if not spans:
+            return
+
+        # Find the offset every line starts at
+        line_starts = [0]
+        newline = text.find("\n")
+        while newline != -1:
+            line_starts.append(newline + 1)
+            newline = text.find("\n", newline + 1)
+
+        def to_index(offset:int) -> str:
+            """Convert a character offset in text to a Text widget index."""
+            line = bisect.bisect_right(line_starts, offset) - 1
+            column = offset - line_starts[line] + (base_column if line == 0 else 0)
+            return f"{base_line + line}.{column}"
+
+        indices = []
+        for start, end in spans:
+            if start != end:  # Empty spans can't be tagged
+                indices.append(to_index(start))
+                indices.append(to_index(end))
+        if indices:
+            text_widget.tag_add(tag, *indices)
+
     def save_modified_text(self):
         """
         Save the modified text to a new file.
@@ -2110,8 +4200,11 @@ class GUI_APP:
         The method handles potential errors during the save operation
         and notifies the user accordingly.
         """
+        # Save the replace result as is, unless the user has edited it in the text box since
+        modified = self.modified_text.get(1.0, "end-1c") if self.modified_text.edit_modified() else self.replace_result
+
         # Check if there is any modified text to save
-        if not self.modified_text.get(1.0, tk.END).strip():
+        if not modified.strip():
             messagebox.showerror("Error", "No modified text to save.")
             return
 
@@ -2123,7 +4216,7 @@ class GUI_APP:
             try:
                 # Write the modified text to the selected file
                 with open(file_path, "w", encoding="utf-8") as file:
-                    file.write(self.modified_text.get(1.0, tk.END))
+                    file.write(modified)
                 # Show success message with the saved file path
                 messagebox.showinfo("Success",
                                     f'Modified text saved to "{file_path}"')
@@ -2145,19 +4238,21 @@ class GUI_APP:
             single_file_display = int(self.single_file_display_var.get())  # Get single file display line count
             compare_file_display = int(self.compare_file_display_var.get())  # Get compare file display line count
             graph_max_words = int(self.graph_max_words_var.get())  # Get max graph words
-            analyze_max_words = int(self.analyze_max_words_var.get())  # Get max analyze words
+            analyze_max_words = int(self.analyze_max_words_var.get())  # Get rows of the word lists
             graph_width = float(self.graph_width_var.get())  # Get graph width
             graph_height = float(self.graph_height_var.get())  # Get graph height
             title_fontsize = float(self.title_font_var.get())  # Get title font size
             label_fontsize = float(self.label_font_var.get())  # Get label font size
             text_font_size = int(self.text_font_size_var.get())  # Get label font size
+            regex_timeout = float(self.regex_timeout_var.get())  # Get regex time limit
+            top_references = int(self.top_references_var.get())  # Get number of closest reference files shown
 
             # Check for non-positive numbers in the configuration settings
             if helpers.any(x <= 0 for x in [
                 single_file_display, compare_file_display,
                 graph_max_words, analyze_max_words,
                 graph_width, graph_height,
-                title_fontsize, label_fontsize]):
+                title_fontsize, label_fontsize, regex_timeout, top_references]):
                 messagebox.showerror("Error", "All numeric settings must be positive numbers.")
                 return  # Exit method on error
 
@@ -2173,6 +4268,9 @@ class GUI_APP:
             config.graph_bar_color_compare1 = self.bar_color_compare1_var.get()  # Update compare file 1 color
             config.graph_bar_color_compare2 = self.bar_color_compare2_var.get()  # Update compare file 2 color
             config.text_font_size = text_font_size
+            config.regex_timeout = regex_timeout
+            config.top_references = top_references
+            self.resize_word_lists()
             self.apply_theme()
             config.save()  # Save to config file
 
@@ -2190,7 +4288,7 @@ class GUI_APP:
         self.single_file_display_var.set(str(config.single_file_display_line))  # Restore single file display setting
         self.compare_file_display_var.set(str(config.compare_file_display_line))  # Restore compare file display setting
         self.graph_max_words_var.set(str(config.graph_max_words))  # Restore graph max words setting
-        self.analyze_max_words_var.set(str(config.analyze_max_words))  # Restore analyze max words setting
+        self.analyze_max_words_var.set(str(config.analyze_max_words))  # Restore rows of the word lists
         self.graph_width_var.set(str(config.graph_figsize[0]))  # Restore graph width
         self.graph_height_var.set(str(config.graph_figsize[1]))  # Restore graph height
         self.title_font_var.set(str(config.graph_title_fontsize))  # Restore title font size
@@ -2199,8 +4297,16 @@ class GUI_APP:
         self.bar_color_compare1_var.set(str(config.graph_bar_color_compare1))  # Restore color for first compare file
         self.bar_color_compare2_var.set(str(config.graph_bar_color_compare2))  # Restore color for second compare file
         self.text_font_size_var.set(str(config.text_font_size))  # Restore color for second compare file
+        self.regex_timeout_var.set(str(config.regex_timeout))  # Restore regex time limit
+        self.top_references_var.set(str(config.top_references))  # Restore number of closest reference files
+        self.resize_word_lists()
         self.apply_theme()
 
+    def resize_word_lists(self):
+        """Show config.analyze_max_words rows in the word lists of the Analyze tab (redrawn when they are resized)."""
+        for word_list in (self.freq_list, self.alpha_list):
+            word_list.listbox.configure(height=config.analyze_max_words)
+
     def reset_default_config(self):
         """
         Reset the configuration fields to their default values.
@@ -2280,6 +4386,7 @@ def configure():
     - Figure size for graphs
     - Colors for graph bars
     - Font sizes for titles, labels, and text
+    - Time limit for regex searches
     """
     # Initialize unsaved configuration values
     unsaved_single_file_display_line = None
@@ -2294,6 +4401,8 @@ def configure():
     unsaved_graph_title_fontsize = None
     unsaved_graph_label_fontsize = None
     unsaved_text_font_size = None
+    unsaved_regex_timeout = None
+    unsaved_top_references = None
 
     while True:
         # Display the current configurable settings and menu options
@@ -2314,7 +4423,7 @@ def configure():
             ["\x1b[1;4;97mC\x1b[m", *f"ompare files: show first {config.compare_file_display_line if unsaved_compare_file_display_line is None else f'{unsaved_compare_file_display_line} (was {config.compare_file_display_line})'} sorted words appeared"],
             [],
             [*"GUI settings:"],
-            ["a", "\x1b[1;4;97mN\x1b[m", *f"alyse file: show first {config.analyze_max_words if unsaved_analyze_max_words is None else f'{unsaved_analyze_max_words} (was {config.analyze_max_words})'} sorted words appeared"],
+            ["a", "\x1b[1;4;97mN\x1b[m", *f"alyse file: show {config.analyze_max_words if unsaved_analyze_max_words is None else f'{unsaved_analyze_max_words} (was {config.analyze_max_words})'} rows of the sorted word lists at once"],
             [*"Graph: ", "\x1b[1;4;97mM\x1b[m", *f"ax word: show first {config.graph_max_words if unsaved_graph_max_words is None else f'{unsaved_graph_max_words} (was {config.graph_max_words})'} sorted words appeared"],
             [*"Graph figure size: set the figure ", "\x1b[1;4;97mH\x1b[m", *f"eight to {config.graph_figsize[1] if unsaved_graph_figsize_h is None else f'{unsaved_graph_figsize_h} (was {config.graph_figsize[1]})'}"],
             [*"Graph figure size: set the figure ", "\x1b[1;4;97mW\x1b[m", *f"idth to {config.graph_figsize[0] if unsaved_graph_figsize_w is None else f'{unsaved_graph_figsize_w} (was {config.graph_figsize[0]})'}"],
@@ -2324,6 +4433,8 @@ def configure():
             [*"Graph ", "\x1b[1;4;97mT\x1b[m", *f"itle: set font size to {config.graph_title_fontsize if unsaved_graph_title_fontsize is None else f'{unsaved_graph_title_fontsize} (was {config.graph_title_fontsize})'}"],
             [*"Graph ", "\x1b[1;4;97mL\x1b[m", *f"abel: set font size to {config.graph_label_fontsize if unsaved_graph_label_fontsize is None else f'{unsaved_graph_label_fontsize} (was {config.graph_label_fontsize})'}"],
             [*"Text: set ", "\x1b[1;4;97mF\x1b[m", *f"ont size to {config.text_font_size if unsaved_text_font_size is None else f'{unsaved_text_font_size} (was {config.text_font_size})'}"],
+            ["\x1b[1;4;97mR\x1b[m", *f"egex search: stop after {config.regex_timeout if unsaved_regex_timeout is None else f'{unsaved_regex_timeout} (was {config.regex_timeout})'} seconds"],
+            [*"Ran", "\x1b[1;4;97mK\x1b[m", *f"ing: show first {config.top_references if unsaved_top_references is None else f'{unsaved_top_references} (was {config.top_references})'} closest reference files"],
             ["\x1b[1;4mS\x1b[m", *"ave and exit"],
             ["\x1b[1;4;97mE\x1b[m", *"xit without saving"]], _override=True, wrap_override=True)  # Formatting the options menu
         
@@ -2336,7 +4447,7 @@ def configure():
         elif config_option == "C":
             unsaved_compare_file_display_line = configure_test_input("Enter number of sorted words to display in Compare Files mode", int, str(config.compare_file_display_line))
         elif config_option == "N":
-            unsaved_analyze_max_words = configure_test_input("Enter number of sorted words to display in Analyze File mode", int, str(config.analyze_max_words))
+            unsaved_analyze_max_words = configure_test_input("Enter number of rows the word lists show at once in Analyze File mode", int, str(config.analyze_max_words))
         elif config_option == "M":
             unsaved_graph_max_words = configure_test_input("Enter number of sorted words to display in the result figure", int, str(config.graph_max_words))
         elif config_option == "H":
@@ -2355,6 +4466,10 @@ def configure():
             unsaved_graph_label_fontsize = configure_test_input("Enter font size of the figure's labels", float, str(config.graph_label_fontsize))
         elif config_option == "F":
             unsaved_text_font_size = configure_test_input("Enter font size of the text labels", int, str(config.text_font_size))
+        elif config_option == "R":
+            unsaved_regex_timeout = configure_test_input("Enter how many seconds a regex search may take", float, str(config.regex_timeout))
+        elif config_option == "K":
+            unsaved_top_references = configure_test_input("Enter number of closest reference files to show", int, str(config.top_references))
         elif config_option in "ES":  # If user selects Exit or Save, break the loop
             break
         else:
@@ -2387,6 +4502,10 @@ def configure():
             config.graph_label_fontsize = unsaved_graph_label_fontsize
         if unsaved_text_font_size is not None:
             config.text_font_size = unsaved_text_font_size
+        if unsaved_regex_timeout is not None:
+            config.regex_timeout = unsaved_regex_timeout
+        if unsaved_top_references is not None:
+            config.top_references = unsaved_top_references
 
         # Save updated configuration to persistent storage
         config.save()
@@ -2402,23 +4521,84 @@ def search_word(file_path:str, target_word:str):
         target_word (str): Word to search for
         
     This function:
-    1. Reads and cleans the file content
+    1. Gets the word index of the file (only read again if the file changed)
     2. Finds all occurrences of the target word
     3. Displays the results with highlighted context
     
     The function handles file reading errors and provides feedback
-    about the search operation.
+    about the search operation. Positions are word positions in the original
+    text, answered from the file's word index so repeated searches are instant.
     """
-    content = read_file(file_path)
+    index = get_word_index(file_path)
 
-    if content is not None:
-        positions = search_word_position(clean_text(content), target_word)
+    if index is not None:
+        positions = index.search(target_word)
         if positions:
             print(f'The word "{target_word}" appears {len(positions)} times at positions: {", ".join(str(pos[0]) for pos in positions)}')
             return
     print(f'The word "{target_word}" was not found in the file.')
 
 
+def search_words(file_path:str, targets:list[str]):
+    """
+    Search for several words or phrases in a file at once and display their positions.
+
+    Args:
+        file_path (str): Path to the file to search
+        targets (list): Words or phrases to search for
+
+    This function:
+    1. Gets the word index of the file (only read again if the file changed)
+    2. Finds all occurrences of every target in a single pass over the text
+    3. Displays the positions of each target
+
+    Words are compared the same way as in search_word(), ignoring case and punctuation.
+    """
+    index = get_word_index(file_path)
+    if index is None:
+        return
+
+    # Group the positions of the matches by target
+    positions = [[] for _ in targets]
+    for pos, _, target_index in index.search_many(targets):
+        positions[target_index].append(str(pos))
+
+    for i, target in enumerate(targets):
+        if positions[i]:
+            print(f'"{target}" appears {len(positions[i])} times at positions: {", ".join(positions[i])}')
+        else:
+            print(f'"{target}" was not found in the file.')
+
+
+# Files bigger than this are replaced straight from disk to disk instead of being loaded for a preview
+STREAM_REPLACE_SIZE = 50 * 1024 * 1024  # 50 MB
+
+
+def highlight_spans(text:str, spans:list[tuple[int, int],], limit:int = 100) -> str:
+    """
+    Get the start of a text for printing, with parts of it highlighted.
+
+    Args:
+        text (str): The text
+        spans (list): (start, end) character offsets to highlight, in order
+        limit (int): How many characters to show, "..." is added if the text is longer
+
+    Returns:
+        str: The first limit characters of text with ANSI highlighting around the spans
+    """
+    pieces = []
+    last_end = 0
+    for start, end in spans:
+        if start >= limit:
+            break  # The rest is not shown
+        end = helpers.min(end, limit)
+        pieces.append(text[last_end:start])
+        pieces.append(f"\x1b[1;93m{text[start:end]}\x1b[m")
+        last_end = end
+    pieces.append(text[last_end:limit])
+    return "".join(pieces) + ("..." if len(text) > limit else "")
+
+
 def replace_word(file_path:str, target_word:str, replacement_word:str):
     """
     Replace occurrences of a target word with a replacement word in a file.
@@ -2427,93 +4607,75 @@ def replace_word(file_path:str, target_word:str, replacement_word:str):
         file_path (str): Path to the file to modify
         target_word (str): Word to be replaced
         replacement_word (str): Word to replace the target word with
+
+    See replace_words() for how the replacement is previewed and saved.
+    """
+    replace_words(file_path, {target_word.lower(): replacement_word})
+
+
+def bulk_replace(file_path:str, mapping_path:str):
+    """
+    Replace every word listed in a mapping file (see load_replacements()) in a file.
+
+    Args:
+        file_path (str): Path to the file to modify
+        mapping_path (str): Path to the mapping file of words and their replacements
+
+    See replace_words() for how the replacement is previewed and saved.
+    """
+    try:
+        replacements = load_replacements(mapping_path)
+    except (OSError, ValueError) as e:
+        print(f"\x1b[31mError reading mapping file: {str(e)}\x1b[m")
+        return
+    print(f'Loaded {len(replacements)} replacements from "{mapping_path}".')
+    replace_words(file_path, replacements)
+
+
+def replace_words(file_path:str, replacements:dict[str, str]):
+    """
+    Replace words in a file, all in one pass.
+
+    Args:
+        file_path (str): Path to the file to modify
+        replacements (dict): Word -> replacement text, where every word is normalized with normalize_word()
         
     This function:
     1. Reads the file content preserving original formatting
-    2. Replaces all occurrences of the target word
+    2. Replaces all occurrences of the words
     3. Displays a preview of the original and modified text
     4. Offers to save the modified text to a new file
     
     The function handles file reading errors and provides feedback
-    about the replacement operation.
+    about the replacement operation. Files larger than STREAM_REPLACE_SIZE
+    are streamed with stream_replace() instead, without a preview.
     """
-    content = read_file(file_path)
+    # Large files are never loaded into memory as a whole
+    if os.path.isfile(file_path) and os.path.getsize(file_path) > STREAM_REPLACE_SIZE:
+        print(f'"{file_path}" is large, so it will be replaced without a preview.')
+        new_file_path = input("Enter the path for the new file (leave empty to replace the file itself): ").strip() or file_path
+        try:
+            count = stream_replace(file_path, replacements, new_file_path)
+            print(f'Replaced {count} occurrences, modified text saved to "{new_file_path}"')
+        except Exception as e:
+            print(f"Error saving file: {str(e)}")
+        return
+
+    document = documents.get(file_path)  # Shared with the other options
+    content = None if document is None else document.text
 
     if content is not None:
-        # Split by words while preserving newlines and spacing
-        lines = content.split("\n")
-        modified_lines = []
-        
-        for line in lines:
-            if not line.strip():  # Preserve empty lines
-                modified_lines.append("")
-                continue
-                
-            words = line.split()
-            modified_line = ""
-            current_pos = 0
-            
-            # Find all occurrences of the target word in this line
-            positions = []
-            for idx, word in enumerate(words):
-                # Check if this word matches our target (ignoring case and punctuation)
-                clean_word = "".join(c.lower() for c in word if alphanumerical(c) or c == "'" or c == "-")  # Allow apostrophes and hyphens in words
-                if clean_word == target_word.lower():
-                    positions.append(idx)
-            
-            if positions:
-                # Process the line with replacements
-                current_pos = 0
-                for pos in positions:
-                    # Add text up to this position
-                    modified_line += " ".join(words[current_pos:pos]) + (" " if current_pos < pos else "")
-                    
-                    # Get the original word
-                    original_word = words[pos]
-                    
-                    # Extract leading and trailing punctuation
-                    leading_punct = ""
-                    trailing_punct = ""
-                    
-                    # Extract leading punctuation
-                    i = 0
-                    while i < len(original_word) and not alphanumerical(original_word[i]):
-                        leading_punct += original_word[i]
-                        i += 1
-                    
-                    # Extract trailing punctuation
-                    i = len(original_word) - 1
-                    while i >= 0 and not alphanumerical(original_word[i]):
-                        trailing_punct = original_word[i] + trailing_punct
-                        i -= 1
-                    
-                    # Insert the replacement with punctuation preserved
-                    modified_line += leading_punct + replacement_word + trailing_punct
-                    
-                    # Add a space if this isn"t the last word
-                    if pos < len(words) - 1:
-                        modified_line += " "
-                    
-                    current_pos = pos + 1
-                
-                # Add any remaining text in the line
-                if current_pos < len(words):
-                    modified_line += " ".join(words[current_pos:])
-            else:
-                # No replacements in this line, keep it as is
-                modified_line = line
-                
-            modified_lines.append(modified_line)
-        
-        # Join all lines back together with newlines preserved
-        modified_content = "\n".join(modified_lines)
+        # Replace everything in one pass, keeping where the replacements are
+        modified_content, edits = replace_text(content, replacements)
 
         print(f"""
 Original text:
-{(content[:100])+"..." if len(content) > 100 else content}
+{highlight_spans(content, [original for original, _ in edits])}
 
 Modified text:
-{modified_content[:100]+"..." if len(modified_content) > 100 else modified_content}"""
+{highlight_spans(modified_content, [modified for _, modified in edits])}
+
+Replaced {len(edits)} occurrences."""
               )
 
         save_option = input("\n\nDo you want to save the modified text to a new file? (y/n): ", single_letter=True).lower()
@@ -2530,7 +4692,8 @@ Modified text:
 
 
 
-def display_results(file_path:str, word_count:tuple[list, list], total_words:int, unique_words:int, show_nums:int = 10, wrap:int|None = None):
+def display_results(file_path:str, word_count:tuple[list, list], total_words:int, unique_words:int, show_nums:int = 10, wrap:int|None = None,
+                    frequency_sorted:list[tuple[str, int],]|None = None, alpha_sorted:list[tuple[str, int],]|None = None):
     """
     Display analysis results for a single text file in CLI mode.
     
@@ -2546,6 +4709,8 @@ def display_results(file_path:str, word_count:tuple[list, list], total_words:int
         unique_words (int): Number of unique words in the file
         show_nums (int): Number of top words to display (default is 10)
         wrap (int | None): The terminal width to wrap text (None means default, which is the current terminal size)
+        frequency_sorted (list | None): The words already sorted by frequency, sorted here if not given
+        alpha_sorted (list | None): The words already sorted alphabetically, sorted here if not given
     """
     # Limit number of words to display to available words
     show_nums = helpers.min(show_nums, len(word_count[0]))  # Maximum words to show is the smaller of user request or available data
@@ -2566,13 +4731,15 @@ Top {show_nums} Most Frequent Words:
 {"-" * hyphen_wrap}''')
 
     # Print frequency-sorted words
-    frequency_sorted = sort_by_frequency(word_count)  # Get list of words sorted by frequency
+    if frequency_sorted is None:
+        frequency_sorted = sort_by_frequency(word_count)  # Get list of words sorted by frequency
     txt = "".join(f'{i + 1}. "{word}": {count} times\n' for i, (word, count) in enumerate(frequency_sorted[:show_nums]))  # Format output
     print(txt)  # Display formatted word frequency information
 
     # Print alphabetically-sorted words
     txt = f"\nFirst {show_nums} Words (Alphabetically):\n{"-" * hyphen_wrap}\n"  # Setup string for display
-    alpha_sorted = sort_alphabetically(word_count)  # Get list of words sorted alphabetically
+    if alpha_sorted is None:
+        alpha_sorted = sort_alphabetically(word_count)  # Get list of words sorted alphabetically
     for i, (word, count) in enumerate(alpha_sorted[:show_nums]):  # Iterate and format
         txt += f'{i + 1}. "{word}": {count} times\n'  # Append formatted string
     print(txt)  # Display the final formatted alphabetical listings
@@ -2592,33 +4759,33 @@ def compare_files(file_path1:str, file_path2:str):
     columns = os.get_terminal_size().columns  # Get the current terminal width
 
     # Read and process the files
-    content1 = read_file(file_path1)  # Read the first text file's content
-    content2 = read_file(file_path2)  # Read the second text file's content
+    # Get both files from the shared document cache
+    document1 = documents.get(file_path1)  # The first file
+    document2 = documents.get(file_path2)  # The second file
 
     # Check if both files were successfully read
-    if content1 is None or content2 is None:
+    if document1 is None or document2 is None or document1.word_count is None or document2.word_count is None:
         print("\x1b[31mError: Cannot compare files due to reading errors.\x1b[m")  # Display error message
         return  # Exit function early due to error
 
-    # Clean and analyze the text from both files
-    clean_content1 = clean_text(content1)  # Clean text content of the first file
-    clean_content2 = clean_text(content2)  # Clean text content of the second file
+    # Analyze the text from both files
+    word_count1 = document1.word_count  # Word counts of the first cleaned text
+    word_count2 = document2.word_count  # Word counts of the second cleaned text
 
-    word_count1 = count_words(clean_content1)  # Count words from the first cleaned text
-    word_count2 = count_words(clean_content2)  # Count words from the second cleaned text
-
-    total_words1 = len(clean_content1.split(" "))  # Count total words in the first text
-    total_words2 = len(clean_content2.split(" "))  # Count total words in the second text
+    total_words1 = document1.total_words  # Count total words in the first text
+    total_words2 = document2.total_words  # Count total words in the second text
 
     unique_words1 = len(word_count1[0])  # Count unique words in the first text
     unique_words2 = len(word_count2[0])  # Count unique words in the second text
 
     # Display analysis results for each file
-    display_results(file_path1, word_count1, total_words1, unique_words1, config.compare_file_display_line)  # Show results for the first file
-    display_results(file_path2, word_count2, total_words2, unique_words2, config.compare_file_display_line)  # Show results for the second file
+    display_results(file_path1, word_count1, total_words1, unique_words1, config.compare_file_display_line,
+                    frequency_sorted=document1.by_frequency, alpha_sorted=document1.by_alphabet)  # Show results for the first file
+    display_results(file_path2, word_count2, total_words2, unique_words2, config.compare_file_display_line,
+                    frequency_sorted=document2.by_frequency, alpha_sorted=document2.by_alphabet)  # Show results for the second file
 
     # Calculate and display the similarity percentage between the two files
-    similarity = calculate_similarity(word_count1, word_count2)  # Get similarity percentage from both word counts
+    similarity = calculate_similarity(document1.counts, document2.counts)  # Get similarity percentage from both word counts
 
     # Print heading for comparison results
     print(
@@ -2632,7 +4799,30 @@ text 2: {similarity[1]:.2f}%'''
     )
 
     # Determine and display the plagiarism level using the similarity percentage
-    similarity = helpers.max(similarity)
+    print_plagiarism_level(helpers.max(similarity))
+
+    # Show where the texts share passages word for word
+    try:
+        passages = find_copied_passages(document1, document2)
+    except OSError as e:
+        print(f"\x1b[31mError: {e}\x1b[m")
+        return
+    print(f"\nPassages of at least {PASSAGE_MIN_WORDS} words found in both files: {len(passages)}")
+    for i, ((start, end), (reference_start, reference_end), words) in enumerate(passages[:config.compare_file_display_line]):
+        print(f"Passage {i+1}: {words} words, characters {start}-{end} of text 1 and {reference_start}-{reference_end} of text 2")
+        passage = document1.text[start:end]
+        print(f"  {highlight_spans(passage, [(0, len(passage))])}")
+    if len(passages) > config.compare_file_display_line:
+        print(f"...and {len(passages) - config.compare_file_display_line} more")
+
+
+def print_plagiarism_level(similarity:float):
+    """
+    Print the plagiarism level of a similarity percentage, in its colour.
+
+    Args:
+        similarity (float): The highest similarity percentage found
+    """
     if similarity > 80:
         print("\x1b[31mPlagiarism Level: HIGH - These texts are very similar\x1b[m")  # High similarity
     elif similarity > 50:
@@ -2642,6 +4832,45 @@ text 2: {similarity[1]:.2f}%'''
     else:
         print("\x1b[32mPlagiarism Level: MINIMAL - These texts are mostly different\x1b[m")  # Minimal similarity
 
+
+def compare_references(file_path:str, reference_paths:list[str]):
+    """
+    Compare a text file with several reference files and show them ranked by similarity for CLI mode.
+
+    Args:
+        file_path (str): The path to the file to check
+        reference_paths (list): The paths to the reference files
+
+    The reference files that haven't been counted before are counted in parallel (see rank_references()),
+    and only the closest config.top_references files are listed.
+    """
+    columns = os.get_terminal_size().columns  # Get the current terminal width
+
+    document = documents.get(file_path)
+    if document is None or document.word_count is None:
+        print("\x1b[31mError: Cannot compare files due to reading errors.\x1b[m")
+        return
+    try:
+        ranking = rank_references(document, reference_paths, k=config.top_references)  # Most similar references first
+    except OSError as e:
+        print(f"\x1b[31mError: {e}\x1b[m")
+        return
+
+    # Print heading and the ranked references in the same format as the GUI
+    print(
+        f'''\n{"=" * helpers.min(columns, len(file_path) + 45)}
+Comparison between "{file_path}" and {len(reference_paths)} reference files:
+{"=" * helpers.min(columns, len(file_path) + 45)}
+
+Similarity percentage: {ranking[0][1]:.2f}%
+
+Closest {len(ranking)} of {len(reference_paths)} reference files:'''
+    )
+    for i, (path, score) in enumerate(ranking):
+        print(f"Match {i+1}: {path} - {score:.2f}% similarity")
+    print()
+    print_plagiarism_level(ranking[0][1])
+
 def analyze_file(file_path:str):
     """
     Analyze a single text file for CLI mode.
@@ -2653,19 +4882,19 @@ def analyze_file(file_path:str):
     Args:
         file_path (str): The path to the file to analyze
     """
-    # Read and process the file content
-    content = read_file(file_path)  # Attempt to read the file content
+    # Get the cleaned file content and its word counts from the shared document cache
+    document = documents.get(file_path)
 
-    if content is None:  # If reading fails, exit function
+    if document is None or document.word_count is None:  # If reading fails, exit function
         return
 
-    clean_content = clean_text(content)  # Clean the raw file content
-    word_count = count_words(clean_content)  # Count words in the cleaned content
-    total_words = len(clean_content.split(" "))  # Calculate total words
+    word_count = document.word_count  # Count words in the cleaned content
+    total_words = document.total_words  # Calculate total words
     unique_words = len(word_count[0])  # Calculate unique words
 
     # Display analysis results for the analyzed file
-    display_results(file_path, word_count, total_words, unique_words, config.single_file_display_line)  # Show results
+    display_results(file_path, word_count, total_words, unique_words, config.single_file_display_line,
+                    frequency_sorted=document.by_frequency, alpha_sorted=document.by_alphabet)  # Show results
     
 
 def mainGUI():
@@ -2699,6 +4928,7 @@ def mainCLI():
     columns = os.get_terminal_size().columns  # Get terminal width for formatting
     file_path = ""  # Initialize file path for single file analysis
     file_path2 = ""  # Initialize second file path for comparison
+    reference_paths = []  # The second file, and any more reference files it is compared with
     print("Word Analysis and Plagiarism Detection System\n" +
           "-" * helpers.min(columns, 45))  # Print intro header
 
@@ -2711,15 +4941,16 @@ Menu:
 2. Compare two files for plagiarism
 3. Search for a word in a file
 4. Replace a word in a file
-5. Configure settings
-6. Exit
+5. Replace words from a mapping file
+6. Configure settings
+7. Exit
 """)
 
         # Prompt user for choice and capture input
-        choice = input("\nEnter your choice (1-6): ", single_letter=True)
+        choice = input("\nEnter your choice (1-7): ", single_letter=True)
 
         # Handle each choice
-        if choice in "1234":
+        if choice in "12345":
             txt_files = [file for file in os.listdir() if os.path.isfile(file) and file.endswith(".txt")]
             print("Text files in current directory" + (" (enter nothing to use the last chosen file)" if file_path or file_path2 else "") + ":\n" + "\n".join(txt_files))
             if choice == "1":
@@ -2730,19 +4961,32 @@ Menu:
 
             elif choice == "2":
                 new_file_path = input("Enter the path to the first text file" + (f" (last chosen: {file_path})" if file_path else "") + ": ").strip()  # Path for first file
-                new_file_path2 = input("Enter the path to the second text file" + (f" (last chosen: {file_path2})" if file_path2 else "") + ": ").strip()  # Path for second file
+                new_file_path2 = input("Enter the path to the second text file" + (f" (last chosen: {file_path2}" + (f" and {len(reference_paths) - 1} more" if len(reference_paths) > 1 else "") + ")" if file_path2 else "") + ": ").strip()  # Path for second file
                 if new_file_path != "":  # same here
                     file_path = new_file_path
                 if new_file_path2 != "":
                     file_path2 = new_file_path2
-                compare_files(file_path, file_path2)  # Call compare function on selected files
+                    reference_paths = [file_path2]
+                    # One prompt per file, so any character can be in a file name
+                    while more_path := input("Enter the path to another reference file (leave empty to start comparing): ").strip():
+                        reference_paths.append(more_path)
+                if len(reference_paths) > 1:  # Rank all reference files by similarity
+                    compare_references(file_path, reference_paths)
+                else:
+                    compare_files(file_path, reference_paths[0] if reference_paths else file_path2)  # Call compare function on selected files
 
             elif choice == "3":
                 new_file_path = input("Enter the path to the text file" + (f" (last chosen: {file_path})" if file_path else "") + ": ").strip()
-                target_word = input("Enter the word to search for: ").strip()
+                target_word = input("Enter the word to search for (separate multiple words or phrases with commas): ").strip()
                 if new_file_path != "":  # same
                     file_path = new_file_path
-                search_word(file_path, target_word)
+                targets = [target.strip() for target in target_word.split(",") if target.strip()]
+                if len(targets) > 1:  # Several words/phrases are searched in one pass
+                    search_words(file_path, targets)
+                elif targets:
+                    search_word(file_path, targets[0])  # Without the comma of e.g. "hello,"
+                else:
+                    print("Please enter a word to search for.")
 
             elif choice == "4":
                 new_file_path = input("Enter the path to the text file" + (f" (last chosen: {file_path})" if file_path else "") + ": ").strip()
@@ -2751,33 +4995,385 @@ Menu:
                 if new_file_path != "":
                     file_path = new_file_path
                 replace_word(file_path, target_word, replacement_word)
+
+            elif choice == "5":
+                new_file_path = input("Enter the path to the text file" + (f" (last chosen: {file_path})" if file_path else "") + ": ").strip()
+                mapping_path = input("Enter the path to the mapping file (one \"word = replacement\" per line): ").strip()
+                if new_file_path != "":
+                    file_path = new_file_path
+                bulk_replace(file_path, mapping_path)
         
-        elif choice == "5":
+        elif choice == "6":
             configure()  # Call configuration function
 
-        elif choice == "6":
+        elif choice == "7":
             print("Thank you for using WAPDS!")
             break  # Exit the loop
 
         else:
-            print(f"Invalid choice {repr(choice)}. Please enter a number between 1 and 6.")  # Input error handling
+            print(f"Invalid choice {repr(choice)}. Please enter a number between 1 and 7.")  # Input error handling
+
+def analyze_record(file_path:str, top:int = 10) -> dict:
+    """
+    Analyze a file for machine-readable output (see run_headless()).
+
+    Args:
+        file_path (str): The path to the file to analyze
+        top (int): How many of the most frequent words to include
+
+    Returns:
+        dict: The file, its total and unique word counts and its most frequent words,
+              or the file and an error message if it could not be read
+    """
+    document = documents.get(file_path)
+    if document is None or document.word_count is None:
+        return {"file": file_path, "error": "could not read file"}
+    return {"file": file_path,
+            "total_words": document.total_words,
+            "unique_words": len(document.word_count[0]),
+            "top_words": document.by_frequency[:top]}
+
+
+def compare_record(file_path1:str, file_path2:str) -> dict:
+    """
+    Compare two files for machine-readable output (see run_headless()).
+
+    Args:
+        file_path1 (str): The path to the first file
+        file_path2 (str): The path to the second file
+
+    Returns:
+        dict: The files, their similarity percentages (see calculate_similarity()) and the
+              larger of the two, or the files and an error message if one could not be read
+    """
+    document1 = documents.get(file_path1)
+    document2 = documents.get(file_path2)
+    if document1 is None or document2 is None or document1.word_count is None or document2.word_count is None:
+        return {"file1": file_path1, "file2": file_path2, "error": "could not read file"}
+    similarity1, similarity2 = calculate_similarity(document1.counts, document2.counts)
+    return {"file1": file_path1,
+            "file2": file_path2,
+            "similarity1": round(similarity1, 2),
+            "similarity2": round(similarity2, 2),
+            "similarity": round(helpers.max(similarity1, similarity2), 2)}
+
+
+def search_records(file_path:str, targets:list[str], regex:bool = False, fuzzy:int|None = None) -> list[dict]:
+    """
+    Search a file for machine-readable output (see run_headless()).
+
+    Args:
+        file_path (str): The path to the file to search
+        targets (list): Words or phrases to search for (or regular expressions if regex is True)
+        regex (bool): Whether the targets are regular expressions
+        fuzzy (int | None): Also find words this many letters away from the targets (None for exact search)
+
+    Returns:
+        list: One dict per target with how many times and at which word positions it was found
+    """
+    index = get_word_index(file_path)
+    if index is None:
+        return [{"file": file_path, "query": target, "error": "could not read file"} for target in targets]
+
+    records = []
+    if regex or fuzzy is not None:
+        for target in targets:
+            try:
+                if regex:
+                    matches = index.search_regex(target)
+                else:
+                    matches = index.search_fuzzy(target, fuzzy)
+            except (re.error, TimeoutError) as e:
+                records.append({"file": file_path, "query": target, "error": str(e)})
+                continue
+            records.append({"file": file_path, "query": target, "count": len(matches),
+                            "positions": [match[0] for match in matches]})
+            if fuzzy is not None:  # Which words were close enough
+                records[-1]["matched_words"] = helpers.quick_sort(list({match[2]: None for match in matches}))
+        return records
+
+    # Exact words and phrases are all found in one pass
+    positions = [[] for _ in targets]
+    for position, _, target_index in index.search_many(targets):
+        positions[target_index].append(position)
+    for target, target_positions in zip(targets, positions):
+        records.append({"file": file_path, "query": target, "count": len(target_positions), "positions": target_positions})
+    return records
+
+
+def non_negative_int(value:str) -> int:
+    """
+    Parse a command-line argument that has to be a whole number of at least 0.
+
+    Args:
+        value (str): The argument as given
+
+    Returns:
+        int: The number
+
+    Raises:
+        argparse.ArgumentTypeError: If the argument is not a whole number or is negative
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, not {number}")
+    return number
+
+
+def diff_records(file_path1:str, file_path2:str, context:int = DIFF_CONTEXT_WORDS) -> list[dict]:
+    """
+    Find the changed parts between two files for machine-readable output (see run_headless()).
+
+    Args:
+        file_path1 (str): The path to the original file
+        file_path2 (str): The path to the changed file
+        context (int): How many unchanged words to include around every change
+
+    Returns:
+        list: One dict per hunk (see diff_documents()) with its word ranges (start included, end excluded),
+              how many words were deleted and inserted, and its text in both files.
+              Empty if the words are the same, or the files and an error message if one could not be read.
+    """
+    document1 = documents.get(file_path1)
+    document2 = documents.get(file_path2)
+    try:
+        if document1 is None or document2 is None:
+            raise OSError("could not read file")
+        hunks = diff_documents(document1, document2, context)
+    except OSError:
+        return [{"file1": file_path1, "file2": file_path2, "error": "could not read file"}]
+
+    records = []
+    for hunk in hunks:
+        start1, end1, start2, end2 = hunk[0][1], hunk[-1][2], hunk[0][3], hunk[-1][4]
+        deleted = inserted = 0
+        for tag, change_start1, change_end1, change_start2, change_end2 in hunk:
+            if tag != "equal":
+                deleted += change_end1 - change_start1
+                inserted += change_end2 - change_start2
+        records.append({"file1": file_path1,
+                        "file2": file_path2,
+                        "words1": [start1, end1],
+                        "words2": [start2, end2],
+                        "deleted": deleted,
+                        "inserted": inserted,
+                        "text1": document1.text[slice(*word_span(document1.tokens[1], start1, end1))],
+                        "text2": document2.text[slice(*word_span(document2.tokens[1], start2, end2))]})
+    return records
+
+
+def replace_record(file_path:str, replacements:dict[str, str], output_path:str|None = None, in_place:bool = False) -> dict:
+    """
+    Replace words in a file for machine-readable output (see run_headless()).
+
+    Args:
+        file_path (str): The path to the file to modify
+        replacements (dict): Word -> replacement text, where every word is normalized with normalize_word()
+        output_path (str | None): Where to save the result, defaults to a new "<name>_replaced" file next to file_path
+        in_place (bool): Overwrite file_path itself instead (output_path is ignored)
+
+    Returns:
+        dict: The file, where the result was saved and how many words were replaced,
+              or the file and an error message if it failed
+    """
+    if in_place:
+        output_path = file_path
+    elif not output_path:
+        # Never overwrite the input unless asked to, e.g. essay.txt -> essay_replaced.txt
+        root, extension = os.path.splitext(file_path)
+        output_path = f"{root}_replaced{extension}"
+    if not check_file(file_path):
+        return {"file": file_path, "error": "could not read file"}
+    try:
+        count = stream_replace(file_path, replacements, output_path)
+    except Exception as e:
+        return {"file": file_path, "error": str(e)}
+    return {"file": file_path, "output": output_path, "replacements": count}
+
+
+def batch_records(paths:list[str], references:list[str], top:int = 10) -> list[dict]:
+    """
+    Analyze many files, and compare each one with reference files, for machine-readable output.
+
+    Args:
+        paths (list): Files, directories (every .txt file in them) or glob patterns
+        references (list): Files every analyzed file is compared with
+        top (int): How many of the most frequent words to include per file
+
+    Returns:
+        list: One dict per file, see analyze_record(). With references, it also has the
+              similarity with every reference and the most similar reference.
+    """
+    # Expand directories and patterns into files
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += helpers.quick_sort([entry.path for entry in os.scandir(path) if entry.is_file() and entry.name.endswith(".txt")])
+        elif glob.has_magic(path):
+            files += helpers.quick_sort(glob.glob(path))
+        else:
+            files.append(path)
+
+    records = []
+    for file_path in files:
+        record = analyze_record(file_path, top)
+        if references and "error" not in record:
+            similarities = [[reference, compare_record(file_path, reference).get("similarity")] for reference in references]
+            record["similarities"] = similarities
+            best = similarities[0]  # The reference with the highest similarity (references that failed are None)
+            for item in similarities:
+                if item[1] is not None and (best[1] is None or item[1] > best[1]):
+                    best = item
+            record["most_similar"], record["max_similarity"] = best
+        records.append(record)
+    return records
+
+
+def write_records(records:list[dict], output_format:str = "json", stream = None):
+    """
+    Write records as JSON or CSV.
+
+    Args:
+        records (list): The records to write, every one a dict
+        output_format (str): "json" (a list of objects) or "csv" (one row per record)
+        stream (file | None): Where to write, defaults to sys.stdout
+
+    In CSV, every key of any record becomes a column. Lists are written as space-separated
+    items, where pairs like [word, count] become word:count.
+    """
+    stream = sys.stdout if stream is None else stream
+    if output_format == "json":
+        json.dump(records, stream, ensure_ascii=False)
+        stream.write("\n")
+        return
+
+    columns = {}  # Keys of every record, in the order they first appear (a dict keeps the order)
+    for record in records:
+        for key in record:
+            columns[key] = None
+    writer = csv.writer(stream)
+    writer.writerow(columns)
+    for record in records:
+        row = []
+        for column in columns:
+            value = record.get(column, "")
+            if isinstance(value, (list, tuple)):
+                value = " ".join(":".join(str(part) for part in item) if isinstance(item, (list, tuple)) else str(item)
+                                 for item in value)
+            row.append(value)
+        writer.writerow(row)
+
+
+def run_headless(args:argparse.Namespace) -> int:
+    """
+    Run one of the non-interactive subcommands and write its result as JSON or CSV.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments
+
+    Returns:
+        int: The exit status, 1 if any record has an error and 0 otherwise
+
+    Messages printed while working (like file errors) go to stderr,
+    so stdout only has the machine-readable result.
+    """
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.run_type == "analyze":
+            records = [analyze_record(file_path, args.top) for file_path in args.files]
+        elif args.run_type == "compare":
+            records = [compare_record(args.file1, args.file2)]
+        elif args.run_type == "diff":
+            records = diff_records(args.file1, args.file2, args.context)
+        elif args.run_type == "search":
+            records = search_records(args.file, args.targets, args.regex, args.fuzzy)
+        elif args.run_type == "replace":
+            if args.map:
+                try:
+                    replacements = load_replacements(args.map)
+                except (OSError, ValueError) as e:
+                    print(f"Error reading mapping file: {str(e)}")
+                    return 1
+            elif args.target is not None and args.replacement is not None:
+                replacements = {args.target.lower(): args.replacement}
+            else:
+                print("Please give either a word and its replacement, or --map.")
+                return 2
+            records = [replace_record(args.file, replacements, args.output, args.in_place)]
+        else:  # batch
+            records = batch_records(args.paths, args.reference, args.top)
+
+    write_records(records, args.format)
+    return 1 if helpers.any("error" in record for record in records) else 0
+
 
 if __name__ == "__main__":
     # Parse command line arguments to determine whether to run GUI or CLI version of the application
     some_text = "{width}x{height}"  # Still dont know how to put curly brackets in f string
-    parser = argparse.ArgumentParser(description="Word Analysis and Plagiarism Detection System (WAPDS)")  # Setup argument parser
-    parser.add_argument(
-        "run_type",
-        help='Enter "GUI" or "CLI" to determine which version should run, defaults to GUI',
-        nargs="?",  # Optional argument with default
-        default="GUI")  # Default to GUI if not provided
+    parser = argparse.ArgumentParser(description="Word Analysis and Plagiarism Detection System (WAPDS)",
+                                     epilog='Runs the GUI if no command is given. The commands other than "GUI" and "CLI" '
+                                            "are not interactive and print JSON or CSV, for scripts and pipelines.")  # Setup argument parser
     parser.add_argument(
+        "--clear-cache",
+        help=f"Delete the saved analysis results of previously analyzed files (in {result_cache.directory!r}) before starting",
+        action="store_true")
+    subparsers = parser.add_subparsers(dest="run_type", metavar="command")  # Which version or command should run
+    parser.set_defaults(run_type="GUI", GUI_window_size=config.window_size)  # Default to GUI if not provided
+
+    GUI_parser = subparsers.add_parser("GUI", help="Start the GUI version (default)")
+    GUI_parser.add_argument(
         "GUI_window_size",
         help=f"Enter in format of {some_text}, set the GUI window size and will be saved, defaults to last window size (currently {repr(config.window_size)})",
         nargs="?",  # Optional argument for GUI window size configuration
         default=config.window_size)  # Default size of the window
+    subparsers.add_parser("CLI", help="Start the interactive CLI version")
+
+    # Non-interactive commands
+    analyze_parser = subparsers.add_parser("analyze", help="Count the words of files")
+    analyze_parser.add_argument("files", nargs="+", help="Files to analyze")
+    analyze_parser.add_argument("--top", type=int, default=config.single_file_display_line, help="How many of the most frequent words to include")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two files for plagiarism")
+    compare_parser.add_argument("file1", help="The first file")
+    compare_parser.add_argument("file2", help="The second file")
+
+    diff_parser = subparsers.add_parser("diff", help="Show the words that changed between two files")
+    diff_parser.add_argument("file1", help="The original file")
+    diff_parser.add_argument("file2", help="The changed file")
+    diff_parser.add_argument("--context", type=non_negative_int, default=DIFF_CONTEXT_WORDS, help="How many unchanged words to include around every change")
+
+    search_parser = subparsers.add_parser("search", help="Find words or phrases in a file")
+    search_parser.add_argument("file", help="File to search")
+    search_parser.add_argument("targets", nargs="+", help="Words or phrases to search for (quote phrases)")
+    search_mode = search_parser.add_mutually_exclusive_group()
+    search_mode.add_argument("--regex", action="store_true", help="Treat the targets as regular expressions")
+    search_mode.add_argument("--fuzzy", type=int, metavar="DISTANCE", help="Also find words up to DISTANCE letters different")
+
+    replace_parser = subparsers.add_parser("replace", help="Replace words in a file")
+    replace_parser.add_argument("file", help="File to replace words in")
+    replace_parser.add_argument("target", nargs="?", help="Word to replace")
+    replace_parser.add_argument("replacement", nargs="?", help="Word to replace it with")
+    replace_parser.add_argument("--map", help='Mapping file with one "word = replacement" per line, instead of target and replacement')
+    replace_output = replace_parser.add_mutually_exclusive_group()
+    replace_output.add_argument("-o", "--output", help='Where to save the result, defaults to a new "<name>_replaced" file next to the file')
+    replace_output.add_argument("--in-place", action="store_true", help="Overwrite the file itself instead of saving the result to a new file")
+
+    batch_parser = subparsers.add_parser("batch", help="Analyze many files, optionally comparing each with reference files")
+    batch_parser.add_argument("paths", nargs="+", help="Files, directories (all .txt files in them) or glob patterns")
+    batch_parser.add_argument("-r", "--reference", action="append", default=[], help="Reference file to compare every file with (can be repeated)")
+    batch_parser.add_argument("--top", type=int, default=config.single_file_display_line, help="How many of the most frequent words to include per file")
+
+    for subparser in (analyze_parser, compare_parser, diff_parser, search_parser, replace_parser, batch_parser):
+        subparser.add_argument("--format", choices=("json", "csv"), default="json", help="Output format (default: json)")
+
     args = parser.parse_args()  # Parse the command-line arguments
 
+    if args.clear_cache:
+        result_cache.clear()
+        print("Cleared the analysis result cache.", file=sys.stderr)  # Keep stdout clean for machine-readable output
+
     # Start the appropriate interface based on the argument provided
     if args.run_type == "GUI":
         if plt is None:  # if matplotlib is missing
@@ -2815,5 +5411,5 @@ if __name__ == "__main__":
         from helpers import animated_print as print
         mainCLI()  # Launch CLI application
     else:
-        # If an invalid run type is provided, inform the user
-        parser.error(f'Please enter either "GUI" or "CLI" for run type, not {repr(args.run_type)}')
\ No newline at end of file
+        # Non-interactive commands, without any animation
+        sys.exit(run_headless(args))
\ No newline at end of file
@@ -2,6 +2,7 @@ import os
 from os.path import exists
 
 import nltk
+import numpy as np
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 from nltk.tokenize import word_tokenize
@@ -108,19 +109,25 @@ def tfidf_features(texts: list[str]) -> tuple:
     return features, vectorizer
 
 
-def get_similarity_score(query_text, reference_texts):
+def get_similarity_score(query_text, reference_texts, preprocessed=False):
     """
     Calculate the cosine similarity between a query text and one or more reference texts.
 
     Args:
         query_text (str): The query text.
         reference_texts (list): A list of reference texts.
+        preprocessed (bool): Whether the texts already went through preprocess_text(),
+            e.g. because they were cached, so they are not preprocessed again.
 
     Returns:
         list: A list of tuples, where each tuple contains the reference text and its corresponding similarity score.
     """
-    preprocessed_query = preprocess_text(query_text)
-    preprocessed_references = [preprocess_text(text) for text in reference_texts]
+    if preprocessed:
+        preprocessed_query = query_text
+        preprocessed_references = list(reference_texts)
+    else:
+        preprocessed_query = preprocess_text(query_text)
+        preprocessed_references = [preprocess_text(text) for text in reference_texts]
 
     # Extract TF-IDF features for query and reference texts
     features_query, vectorizer = tfidf_features(
@@ -139,6 +146,48 @@ def get_similarity_score(query_text, reference_texts):
     return plagiarism_results
 
 
+def nearest_references(query_text, reference_texts, k=5, preprocessed=False):
+    """
+    Find the k reference texts most similar to a query text, without sorting every score.
+
+    Args:
+        query_text (str): The query text.
+        reference_texts (list): A list of reference texts.
+        k (int): How many of the most similar reference texts to return.
+        preprocessed (bool): Whether the texts already went through preprocess_text(),
+            e.g. because they were cached, so they are not preprocessed again.
+
+    Returns:
+        list: A list of tuples, where each tuple contains the index of a reference text
+            and its cosine similarity score (0 to 1), most similar first. At most k tuples are returned.
+
+    The overlap coefficient is not offered here, main.rank_references() computes it from the
+    word counts the rest of the program uses.
+    """
+    if k <= 0 or not reference_texts:
+        return []
+
+    if preprocessed:
+        preprocessed_query = query_text
+        preprocessed_references = list(reference_texts)
+    else:
+        preprocessed_query = preprocess_text(query_text)
+        preprocessed_references = [preprocess_text(text) for text in reference_texts]
+
+    # TF-IDF rows are L2-normalized, so a single sparse product gives every cosine similarity
+    features, vectorizer = tfidf_features([preprocessed_query] + preprocessed_references)
+    features = features.tocsr()
+    scores = (features[1:] @ features[:1].T).toarray().ravel()
+
+    # Partition the k highest scores to the front, then only those k are sorted
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [(int(i), float(scores[i])) for i in top]
+
+
 if __name__ == "__main__":
     # Read example document from file
     with open("test2_1.txt", "r") as file: